@@ -1,10 +1,39 @@
 import dash
 from dash import html
 import dash_bootstrap_components as dbc
+from utils.activos import hojas_estilo, registrar_activos, scripts, url_activo
+from utils.compresion import registrar_compresion
+from utils.metricas import registrar_metricas
+from utils.perfilado import registrar_perfilado
+from utils.trabajos import gestor_trabajos
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CERULEAN, '/assets/custom.css', dbc.icons.FONT_AWESOME], use_pages=True)
+# plotly importa orjson la primera vez que serializa una figura. Si varios hilos del worker serializan a la vez las
+# primeras respuestas, alguno puede encontrar el módulo a medio inicializar; se importa aquí, antes de atender peticiones
+try:
+    import orjson  # noqa: F401
+except ImportError:
+    pass
+
+# Las hojas de estilo y los scripts de assets/ se incluyen con su huella (ver utils/activos.py) y no con el recorrido de
+# assets/ que hace Dash, que les agrega la marca de tiempo del archivo
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CERULEAN, dbc.icons.FONT_AWESOME] + hojas_estilo(),
+                external_scripts=scripts(), assets_ignore=r'\.(css|js)$', use_pages=True,
+                background_callback_manager=gestor_trabajos)  # Callbacks en segundo plano (ver utils/trabajos.py)
 server = app.server
 
+# Exponer en /metrics las latencias de los callbacks, de la inferencia y de las figuras (ver utils/metricas.py). Se
+# registra antes que la compresión para que Flask ejecute su after_request después y la latencia incluya comprimir
+registrar_metricas(app)
+
+# Perfilar bajo demanda las peticiones de los operadores que traen el encabezado X-Perfilar (ver utils/perfilado.py)
+registrar_perfilado(server)
+
+# Comprimir con brotli o gzip las respuestas de los callbacks y del layout (ver utils/compresion.py)
+registrar_compresion(server)
+
+# Servir assets/ desde memoria, precomprimidos y con caché de un año para las URL con huella (ver utils/activos.py)
+registrar_activos(server)
+
 # ======================================================================================================================
 #                                               LAYOUT PRINCIPAL
 # ======================================================================================================================
@@ -17,7 +46,7 @@ app.layout = html.Div([
             # Logo y título
             html.A(
                 dbc.Row([
-                    dbc.Col(html.Img(src="./assets/croquis-ANT2.png", height="40px"), width="auto"),
+                    dbc.Col(html.Img(src=url_activo("croquis-ANT2.png"), height="40px"), width="auto"),
                     dbc.Col(dbc.NavbarBrand("Saber 11° en Antioquia")),
                 ], align="center"),
             ),
@@ -0,0 +1,75 @@
+// =====================================================================================================================
+//                          CALLBACKS DEL LADO DEL CLIENTE: COMPARACIÓN DE MUNICIPIOS EN EL LINE CHART
+// =====================================================================================================================
+// El conjunto de datos de comparación (ver utils/datos.py: construir_datos_comparacion) llega una sola vez por sesión al
+// dcc.Store 'datos-comparacion'. Aquí se convierte en arreglos tipados y se superponen las series seleccionadas sobre
+// la figura base que construye el servidor, sin hacer ninguna petición adicional.
+
+(function () {
+    // Colores de las series superpuestas
+    const COLORES = ['#e45756', '#f58518', '#54a24b', '#b279a2', '#9d755d', '#eeca3b', '#72b7b2', '#ff9da6'];
+
+    // Datos decodificados del último conjunto recibido (se decodifica una sola vez)
+    let datosRecibidos = null;
+    let datosDecodificados = null;
+
+    function decodificar(datos) {
+        if (datos !== datosRecibidos) {
+            const valores = {};
+            for (const variable in datos.valores) {
+                valores[variable] = Float32Array.from(datos.valores[variable], (valor) => (valor === null ? NaN : valor));
+            }
+            const posiciones = new Map(datos.nombres.map((nombre, i) => [nombre, i]));
+            datosRecibidos = datos;
+            datosDecodificados = { anios: datos.anios, posiciones: posiciones, valores: valores };
+        }
+        return datosDecodificados;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        comparacion: {
+            superponer: function (figuraBase, seleccion, datos) {
+                if (!figuraBase) {
+                    return window.dash_clientside.no_update;
+                }
+                if (!datos || !seleccion || seleccion.length === 0) {
+                    return figuraBase;
+                }
+
+                const { anios, posiciones, valores } = decodificar(datos);
+                const variable = (figuraBase.layout.meta || {}).variable || 'PUNT_GLOBAL';
+                const columna = valores[variable];
+                const n = anios.length;
+
+                const trazas = [];
+                seleccion.forEach((nombre, k) => {
+                    const posicion = posiciones.get(nombre);
+                    if (posicion === undefined || !columna) {
+                        return;
+                    }
+                    const y = Array.from(columna.subarray(posicion * n, (posicion + 1) * n), (valor) => (isNaN(valor) ? null : Math.round(valor * 10) / 10));
+                    const color = COLORES[k % COLORES.length];
+                    trazas.push({
+                        type: 'scatter',
+                        x: anios,
+                        y: y,
+                        name: nombre,
+                        mode: 'lines+markers',
+                        line: { color: color, width: 2, dash: 'dot' },
+                        marker: { color: color, size: 6 },
+                    });
+                });
+
+                // Copia superficial: la figura base se conserva intacta para la siguiente selección
+                return {
+                    data: figuraBase.data.concat(trazas),
+                    layout: Object.assign({}, figuraBase.layout, {
+                        showlegend: trazas.length > 0,
+                        legend: { orientation: 'h', yanchor: 'bottom', y: 1.02, x: 0 },
+                        margin: Object.assign({}, figuraBase.layout.margin, { t: 40 }),
+                    }),
+                };
+            },
+        },
+    });
+})();
@@ -0,0 +1,39 @@
+// =====================================================================================================================
+//                          CALLBACKS DEL LADO DEL CLIENTE: PROGRESO Y LIMPIEZA DEL FORMULARIO
+// =====================================================================================================================
+// La barra de progreso y el botón de limpiar solo cuentan o vacían los valores de los dropdowns, así que se resuelven
+// en el navegador. Cada cambio de un dropdown genera una sola petición al servidor: la de la predicción.
+// Aquí también se lleva la generación del formulario con la que el servidor descarta las predicciones obsoletas.
+
+(function () {
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        formulario: {
+            // Progreso según el número de dropdowns diligenciados (los recursos cuentan siempre como diligenciados). El
+            // último argumento es el estado del botón del barrido de evidencias, que solo dispara el recálculo
+            progreso: function (...args) {
+                const valores = args.slice(0, -1);
+                const total = valores.length + 1;
+                const diligenciados = valores.filter((valor) => valor !== null && valor !== undefined).length + 1;
+                const progreso = Math.round((diligenciados / total) * 100);
+                return [progreso, progreso >= 5 ? `${progreso} %` : ''];
+            },
+
+            // Control de secuencia de las predicciones: un id por pestaña y un contador que sube con cada cambio del
+            // formulario (el servidor descarta las peticiones de generaciones anteriores, ver utils/secuenciacion.py)
+            siguienteGeneracion: function (...args) {
+                const actual = args[args.length - 1];
+                const sesion = actual && actual.sesion ? actual.sesion : Math.random().toString(36).slice(2) + Date.now().toString(36);
+                return { sesion: sesion, generacion: actual ? actual.generacion + 1 : 0 };
+            },
+
+            // Vaciar los dropdowns y los recursos (el último Output). Los valores de los dropdowns llegan como State
+            // solo para saber cuántos son: el renderer de Dash 2.14 no llena outputs_list en los callbacks del cliente
+            limpiar: function (nClicks, ...dropdowns) {
+                if (!nClicks) {
+                    throw window.dash_clientside.PreventUpdate;
+                }
+                return dropdowns.map(() => null).concat([[]]);
+            },
+        },
+    });
+})();
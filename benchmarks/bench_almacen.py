@@ -0,0 +1,48 @@
+"""
+Compara el tiempo de carga y la memoria de las tablas de puntajes leídas desde los CSV y desde el almacén columnar.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_almacen
+"""
+import time
+
+import pandas as pd
+
+from utils.almacen import cargar_tabla
+
+
+def cargar_csv():
+    return [
+        pd.read_csv('datos/df_antioquia_promedios.csv', dtype=str),
+        pd.read_csv('datos/df_antioquia_linechart.csv'),
+        pd.read_csv('datos/df_colombia_linechart.csv'),
+    ]
+
+
+def cargar_almacen():
+    return [
+        cargar_tabla('datos/almacen/antioquia_promedios'),
+        cargar_tabla('datos/almacen/antioquia_linechart'),
+        cargar_tabla('datos/almacen/colombia_linechart'),
+    ]
+
+
+# Función para medir el mejor tiempo (en ms) de varias ejecuciones de una función
+def medir(funcion, repeticiones=20):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+
+def main():
+    print(f"{'Origen':<10}{'Carga (ms)':>12}{'Memoria (KB)':>15}")
+    for nombre, cargar in [('CSV', cargar_csv), ('Almacén', cargar_almacen)]:
+        memoria = sum(df.memory_usage(deep=True).sum() for df in cargar()) / 1024
+        print(f"{nombre:<10}{medir(cargar):>12.2f}{memoria:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Mide los bytes enviados y el tiempo de CPU del servidor por respuesta al comprimir las respuestas de los callbacks del
+mapa y del line chart con gzip y brotli en distintos niveles (ver utils/compresion.py).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_compresion
+"""
+import time
+
+import app
+from utils import compresion
+
+# Peticiones a _dash-update-component: (nombre, cuerpo)
+PETICIONES = [
+    ('Mapa', {
+        'output': 'choropleth-ANT.figure',
+        'outputs': {'id': 'choropleth-ANT', 'property': 'figure'},
+        'inputs': [{'id': 'dropdown-municipios', 'property': 'value', 'value': 'MEDELLÍN'},
+                   {'id': 'year-slider', 'property': 'value', 'value': 2022},
+                   {'id': 'dropdown-puntaje', 'property': 'value', 'value': 'PUNT_GLOBAL'},
+                   {'id': 'switch-subregiones', 'property': 'value', 'value': False}],
+        'changedPropIds': ['dropdown-municipios.value'],
+    }),
+    ('Line chart', {
+        'output': 'line-chart-base.data',
+        'outputs': {'id': 'line-chart-base', 'property': 'data'},
+        'inputs': [{'id': 'dropdown-municipios', 'property': 'value', 'value': 'MEDELLÍN'},
+                   {'id': 'dropdown-puntaje', 'property': 'value', 'value': 'PUNT_GLOBAL'}],
+        'changedPropIds': ['dropdown-municipios.value'],
+    }),
+]
+
+# Configuraciones a comparar: (codificación, nivel)
+CONFIGURACIONES = [('gzip', 1), ('gzip', 3), ('gzip', 6), ('gzip', 9), ('br', 1), ('br', 4), ('br', 6), ('br', 11)]
+
+
+# Función para medir el tiempo de CPU promedio (en ms) de comprimir un contenido
+def medir_cpu(contenido, codificacion, nivel, repeticiones):
+    inicio = time.process_time()
+    for _ in range(repeticiones):
+        comprimido = compresion.comprimir(contenido, codificacion, nivel_gzip=nivel, nivel_brotli=nivel)
+    return (time.process_time() - inicio) / repeticiones * 1000, len(comprimido)
+
+
+def main():
+    cliente = app.server.test_client()
+    cliente.get('/')
+
+    for nombre, cuerpo in PETICIONES:
+        # Respuesta sin comprimir (sin Accept-Encoding)
+        contenido = cliente.post('/_dash-update-component', json=cuerpo).get_data()
+        print(f"\n{nombre}: {len(contenido) / 1024:.1f} KB sin comprimir")
+        print(f"{'Codificación':<14}{'Nivel':>6}{'KB':>10}{'Razón':>8}{'CPU (ms)':>10}")
+        for codificacion, nivel in CONFIGURACIONES:
+            if codificacion == 'br' and compresion.brotli is None:
+                continue
+            repeticiones = 3 if nivel >= 9 else 20
+            cpu, tamano = medir_cpu(contenido, codificacion, nivel, repeticiones)
+            print(f"{codificacion:<14}{nivel:>6}{tamano / 1024:>10.1f}{len(contenido) / tamano:>8.1f}{cpu:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
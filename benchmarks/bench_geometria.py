@@ -0,0 +1,58 @@
+"""
+Compara el tamaño y el tiempo de lectura de la geometría de Antioquia en GeoJSON plano y en TopoJSON cuantizado.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_geometria
+"""
+import gzip
+import json
+import os
+import time
+
+from geojson_rewind import rewind
+
+from utils.topologia import decodificar_topologia
+
+RUTA_GEOJSON = 'datos/MunicipiosVeredas19MB.json'
+RUTA_TOPOJSON = 'datos/MunicipiosAntioquia.topojson'
+
+
+# Función para medir el mejor tiempo (en ms) de varias ejecuciones de una función
+def medir(funcion, repeticiones=10):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+
+def cargar_geojson():
+    with open(RUTA_GEOJSON, encoding='utf-8') as archivo:
+        return rewind(json.load(archivo), rfc7946=False)
+
+
+def cargar_topojson():
+    with open(RUTA_TOPOJSON, encoding='utf-8') as archivo:
+        return rewind(decodificar_topologia(json.load(archivo), 'antioquia'), rfc7946=False)
+
+
+def main():
+    print(f"{'Formato':<10}{'Tamaño (KB)':>14}{'gzip (KB)':>12}{'Lectura (ms)':>15}{'+ decodificar (ms)':>20}")
+    for nombre, ruta, cargar in [('GeoJSON', RUTA_GEOJSON, cargar_geojson), ('TopoJSON', RUTA_TOPOJSON, cargar_topojson)]:
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        tamano = os.path.getsize(ruta) / 1024
+        tamano_gzip = len(gzip.compress(contenido)) / 1024
+        lectura = medir(lambda: json.loads(contenido))
+        total = medir(cargar)
+        print(f"{nombre:<10}{tamano:>14.0f}{tamano_gzip:>12.0f}{lectura:>15.1f}{total:>20.1f}")
+
+    # Tamaño del GeoJSON que se envía al navegador dentro de la figura del choropleth
+    for nombre, cargar in [('GeoJSON', cargar_geojson), ('TopoJSON', cargar_topojson)]:
+        figura = json.dumps(cargar(), separators=(',', ':')).encode('utf-8')
+        print(f"Geometría en la figura ({nombre}): {len(figura) / 1024:.0f} KB, gzip {len(gzip.compress(figura)) / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Genera archivos sintéticos con el formato de los resultados Saber 11 del ICFES y mide el rendimiento de la ingesta
+con uno y varios procesos.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_ingesta --archivos 4 --filas 1000000
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.ingesta import COLUMNAS_PUNTAJES, agregar_archivos
+
+# Columnas adicionales de los archivos reales que la ingesta debe ignorar
+COLUMNAS_IGNORADAS = ['ESTU_CONSECUTIVO', 'ESTU_GENERO', 'FAMI_ESTRATOVIVIENDA', 'COLE_NOMBRE_ESTABLECIMIENTO',
+                      'COLE_MCPIO_UBICACION', 'COLE_DEPTO_UBICACION']
+
+
+# Función para generar un archivo sintético de resultados Saber 11
+def generar_archivo_sintetico(ruta, filas, periodo, semilla=0, separador=';', tamano_bloque=200_000):
+    """
+    Genera un archivo CSV sintético con el formato de los resultados Saber 11. La mitad de los estudiantes son de
+    municipios de Antioquia (códigos DANE de datos/df_antioquia_promedios.csv) y el resto de otros departamentos.
+
+    Args:
+        ruta (str): Ruta del archivo a generar.
+        filas (int): Número de estudiantes.
+        periodo (int): Periodo de la prueba (p. ej. 20224).
+        semilla (int, optional): Semilla del generador aleatorio. Defaults to 0.
+        separador (str, optional): Separador de columnas. Defaults to ';'.
+        tamano_bloque (int, optional): Filas generadas por bloque. Defaults to 200000.
+    """
+    generador = np.random.default_rng(semilla)
+    municipios_antioquia = pd.read_csv('datos/df_antioquia_promedios.csv', usecols=['DPTOMPIO'])['DPTOMPIO'].to_numpy()
+    municipios_otros = np.array([11001, 76001, 8001, 13001, 68001, 17001, 66001, 73001])
+
+    for i, inicio in enumerate(range(0, filas, tamano_bloque)):
+        n = min(tamano_bloque, filas - inicio)
+        es_antioquia = generador.random(n) < 0.5
+        codigos = np.where(es_antioquia, generador.choice(municipios_antioquia, n), generador.choice(municipios_otros, n))
+        puntajes = {columna: np.clip(generador.normal(50, 10, n), 0, 100).round() for columna in COLUMNAS_PUNTAJES[:-1]}
+        puntajes['PUNT_GLOBAL'] = np.clip(generador.normal(250, 45, n), 0, 500).round()
+
+        bloque = pd.DataFrame({
+            'PERIODO': periodo,
+            'ESTU_CONSECUTIVO': [f'SB11{periodo}{inicio + j:09d}' for j in range(n)],
+            'ESTU_GENERO': generador.choice(['F', 'M'], n),
+            'FAMI_ESTRATOVIVIENDA': generador.choice(['Estrato 1', 'Estrato 2', 'Estrato 3', 'Sin Estrato'], n),
+            'COLE_NOMBRE_ESTABLECIMIENTO': 'INSTITUCION EDUCATIVA SINTETICA',
+            'COLE_COD_MCPIO_UBICACION': codigos,
+            'COLE_MCPIO_UBICACION': 'MUNICIPIO',
+            'COLE_DEPTO_UBICACION': np.where(es_antioquia, 'ANTIOQUIA', 'OTRO'),
+            **puntajes,
+        })
+        bloque.to_csv(ruta, sep=separador, index=False, header=(i == 0), mode='w' if i == 0 else 'a')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el rendimiento de la ingesta de microdatos Saber 11.")
+    parser.add_argument('--archivos', type=int, default=4, help="Número de archivos (periodos) sintéticos.")
+    parser.add_argument('--filas', type=int, default=500_000, help="Filas por archivo.")
+    parser.add_argument('--bloque', type=int, default=200_000, help="Filas por bloque de lectura.")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos para la medición en paralelo (por defecto uno por núcleo).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = []
+        for i in range(args.archivos):
+            ruta = os.path.join(directorio, f'saber11_{2015 + i}.csv')
+            generar_archivo_sintetico(ruta, args.filas, periodo=(2015 + i) * 10 + 4, semilla=i)
+            rutas.append(ruta)
+        tamano = sum(os.path.getsize(ruta) for ruta in rutas) / 1024 ** 2
+        print(f"{args.archivos} archivos, {args.filas:,} filas cada uno ({tamano:.0f} MB)")
+
+        for procesos in sorted({1, args.procesos or min(args.archivos, os.cpu_count() or 1)}):
+            inicio = time.perf_counter()
+            municipios, pais, filas = agregar_archivos(rutas, procesos=procesos, tamano_bloque=args.bloque)
+            duracion = time.perf_counter() - inicio
+            print(f"{procesos} proceso(s): {duracion:.2f} s | {filas / duracion:,.0f} filas/s | "
+                  f"{len(municipios)} grupos (año, municipio)")
+
+        memoria = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        print(f"Memoria máxima residente: {memoria / 1024:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
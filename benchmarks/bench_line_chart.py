@@ -0,0 +1,62 @@
+"""
+Mide el tiempo de construcción y serialización de la figura del line chart, y la latencia del callback
+update_line_chart con el caché de figuras vacío y precalentado.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_line_chart
+"""
+import statistics
+import time
+
+import app  # noqa: F401  (registra las páginas de Dash)
+import pages.visualizations as visualizations
+
+
+# Función para medir la latencia (en ms) de un callback para cada municipio
+def medir_municipios(municipios, antes_de_cada=None):
+    tiempos = []
+    for municipio in municipios:
+        if antes_de_cada:
+            antes_de_cada()
+        inicio = time.perf_counter()
+        visualizations.update_line_chart(municipio, 'PUNT_GLOBAL')
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+# Función para medir la mediana (en ms) del tiempo de construcción y de serialización de la figura del line chart
+def medir_figura(municipio, repeticiones=50):
+    construccion, serializacion = [], []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fig = visualizations.construir_line_chart((municipio, 'PUNT_GLOBAL'))
+        construccion.append((time.perf_counter() - inicio) * 1000)
+
+        inicio = time.perf_counter()
+        figura_json = fig.to_json()
+        serializacion.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(construccion), statistics.median(serializacion), len(figura_json)
+
+
+def main():
+    municipios = list(visualizations.df_antioquia['MPIO_CNMBR'])
+    cache = visualizations.cache_line_chart
+
+    construccion, serializacion, tamano = medir_figura('MEDELLÍN')
+    print(f"Figura: construcción {construccion:.2f} ms | serialización {serializacion:.2f} ms | {tamano / 1024:.1f} KB")
+
+    sin_cache = medir_municipios(municipios, antes_de_cada=cache.vaciar)
+
+    inicio = time.perf_counter()
+    cache.precalentar([(municipio, 'PUNT_GLOBAL') for municipio in municipios], visualizations.construir_line_chart)
+    precalentado = (time.perf_counter() - inicio) * 1000
+
+    con_cache = medir_municipios(municipios)
+
+    print(f"Municipios: {len(municipios)} | precalentar el caché: {precalentado:.0f} ms")
+    for nombre, tiempos in [('Sin caché', sin_cache), ('Con caché', con_cache)]:
+        print(f"{nombre:<10} mediana {statistics.median(tiempos):6.2f} ms | máx {max(tiempos):6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Compara configuraciones de gunicorn (workers sync contra workers gthread) bajo la misma carga de usuarios virtuales.
+
+Para cada configuración levanta gunicorn con gunicorn.conf.py, calienta el servidor, ejecuta la prueba de carga de
+benchmarks/carga_callbacks.py y muestrea la memoria de todos los procesos del servidor (PSS: las páginas compartidas
+entre el master y los workers se reparten en lugar de contarse varias veces). Reporta:
+    - throughput y latencia p50/p95 de todas las peticiones;
+    - capacidad: peticiones que el servidor atiende a la vez (workers x hilos; las demás esperan en la cola);
+    - memoria máxima durante la prueba y memoria por petición simultánea (memoria / capacidad).
+
+Con --verificar, en lugar de lo anterior, comprueba que los objetos de inferencia son reentrantes: ejecuta las mismas
+consultas en serie y desde muchos hilos a la vez y compara los resultados (ver utils/inferencia.py).
+
+Uso (desde la raíz del repositorio, con gunicorn instalado y el puerto libre):
+    python -m benchmarks.bench_servidor --usuarios 16 --duracion 30
+    python -m benchmarks.bench_servidor --verificar
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psutil
+import requests
+
+from benchmarks.carga_callbacks import ejecutar_carga
+
+# Configuraciones a comparar: (nombre, clase de worker, workers, hilos). La primera es la configuración anterior
+CONFIGURACIONES = [
+    ('sync 1x1', 'sync', 1, 1),
+    ('sync 4x1', 'sync', 4, 1),
+    ('gthread 1x4', 'gthread', 1, 4),
+    ('gthread 1x8', 'gthread', 1, 8),
+]
+
+
+# Función para levantar gunicorn con una configuración y esperar a que responda
+def levantar(clase, workers, hilos, puerto):
+    entorno = dict(os.environ, PORT=str(puerto), GUNICORN_CLASE=clase, GUNICORN_WORKERS=str(workers),
+                   GUNICORN_HILOS=str(hilos))
+    proceso = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:server', '-c', 'gunicorn.conf.py'], env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{puerto}'
+    limite = time.perf_counter() + 120
+    while time.perf_counter() < limite:
+        try:
+            if requests.get(url + '/_dash-dependencies', timeout=5).ok:
+                return proceso, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proceso.terminate()
+    raise RuntimeError("gunicorn no respondió en 120 s")
+
+
+# Función para medir la memoria (PSS, en MB) del master y de sus workers
+def memoria_servidor(proceso):
+    total = 0
+    master = psutil.Process(proceso.pid)
+    for p in [master] + master.children(recursive=True):
+        try:
+            total += p.memory_full_info().pss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total / 1024 ** 2
+
+
+# Función para ejecutar la carga sobre una configuración y medir la memoria durante la prueba
+def medir_configuracion(clase, workers, hilos, puerto, usuarios, duracion, pausa):
+    proceso, url = levantar(clase, workers, hilos, puerto)
+    try:
+        # Calentar: cada worker carga sus cachés con las primeras peticiones
+        ejecutar_carga(url, usuarios, min(duracion / 3, 10), pausa)
+
+        muestras = []
+        terminar = threading.Event()
+
+        def muestrear():
+            while not terminar.wait(1.0):
+                muestras.append(memoria_servidor(proceso))
+
+        muestreador = threading.Thread(target=muestrear, daemon=True)
+        muestreador.start()
+        resumen = ejecutar_carga(url, usuarios, duracion, pausa)
+        terminar.set()
+        muestreador.join()
+    finally:
+        proceso.terminate()
+        proceso.wait(30)
+
+    # Latencias de todas las peticiones (p50/p95 ponderadas por el número de peticiones de cada callback)
+    callbacks = resumen['callbacks'].values()
+    peticiones = resumen['peticiones'] or 1
+    memoria = max(muestras) if muestras else 0.0
+    return {
+        'throughput': resumen['throughput'],
+        'latencia_media_ms': resumen['latencia_media_ms'],
+        'p50_ms': sum(fila['p50_ms'] * fila['peticiones'] for fila in callbacks) / peticiones,
+        'p95_ms': sum(fila['p95_ms'] * fila['peticiones'] for fila in callbacks) / peticiones,
+        'errores': resumen['errores'],
+        'capacidad': workers * hilos,
+        'memoria_mb': memoria,
+        'memoria_peticion_mb': memoria / (workers * hilos),
+    }
+
+
+# Función para verificar que las consultas concurrentes dan los mismos resultados que en serie
+def verificar_reentrancia(consultas=600, hilos=16, semilla=0):
+    import app  # noqa: F401  (registra las páginas de Dash)
+    import pages.home as home
+
+    aleatorio = random.Random(semilla)
+    lista = []
+    for _ in range(consultas):
+        area = aleatorio.choice(list(home.target_variable))
+        evidencia = {}
+        for param, opciones in home.dd_params.items():
+            if aleatorio.random() < 0.6:
+                evidencia[home.param_name_mapping[0][f'dd_{param}']] = aleatorio.choice(opciones)['value']
+        if aleatorio.random() < 0.5:
+            evidencia['FAMI_RECURSOS'] = aleatorio.randint(0, 4)
+        lista.append((area, evidencia))
+
+    def consultar(consulta):
+        area, evidencia = consulta
+        infer = home.realizar_inferencia(area)
+        return infer.query([home.target_variable[area]], evidence=evidencia, show_progress=False).values
+
+    inicio = time.perf_counter()
+    serie = [consultar(consulta) for consulta in lista]
+    segundos_serie = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        concurrente = list(ejecutor.map(consultar, lista))
+    segundos_concurrente = time.perf_counter() - inicio
+
+    diferentes = sum(not np.allclose(a, b) for a, b in zip(serie, concurrente))
+    print(f"{consultas} consultas: {segundos_serie:.2f} s en serie, {segundos_concurrente:.2f} s con {hilos} hilos; "
+          f"{diferentes} resultados distintos")
+    return diferentes == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara workers sync y gthread de gunicorn bajo carga.")
+    parser.add_argument('--usuarios', type=int, default=16, help="Usuarios virtuales concurrentes. Defaults to 16.")
+    parser.add_argument('--duracion', type=float, default=30, help="Segundos de cada prueba. Defaults to 30.")
+    parser.add_argument('--pausa', type=float, default=0.1, help="Segundos promedio entre acciones. Defaults to 0.1.")
+    parser.add_argument('--puerto', type=int, default=8090, help="Puerto del servidor de prueba. Defaults to 8090.")
+    parser.add_argument('--verificar', action='store_true', help="Solo verificar la reentrancia de la inferencia.")
+    args = parser.parse_args()
+
+    if args.verificar:
+        sys.exit(0 if verificar_reentrancia() else 1)
+
+    print(f"{'Configuración':<14}{'Capacidad':>10}{'req/s':>8}{'Media ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'Errores':>9}"
+          f"{'Memoria MB':>12}{'MB/petición':>13}")
+    for nombre, clase, workers, hilos in CONFIGURACIONES:
+        fila = medir_configuracion(clase, workers, hilos, args.puerto, args.usuarios, args.duracion, args.pausa)
+        print(f"{nombre:<14}{fila['capacidad']:>10}{fila['throughput']:>8.1f}{fila['latencia_media_ms']:>10.1f}"
+              f"{fila['p50_ms']:>9.1f}{fila['p95_ms']:>9.1f}{fila['errores']:>9}{fila['memoria_mb']:>12.0f}"
+              f"{fila['memoria_peticion_mb']:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
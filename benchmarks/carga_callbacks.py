@@ -0,0 +1,337 @@
+"""
+Prueba de carga de la API de callbacks de Dash (_dash-update-component) con recorridos realistas de usuarios.
+
+Cada usuario virtual abre las dos páginas y repite recorridos como los de un usuario real: en la página de inicio llena
+los dropdowns uno por uno, marca recursos, cambia el área (dd_area) y elige un nivel de desempeño; en la de análisis
+municipal mueve el year-slider, cambia de municipio, de puntaje y la capa de subregiones. Las peticiones se construyen
+con la misma forma que envía el navegador, a partir de /_dash-dependencies y del layout que devuelve el servidor, y
+las salidas de cada respuesta se aplican al estado del usuario para disparar los callbacks encadenados (p. ej.
+dd_area -> radios.options). Los callbacks del lado del cliente no generan peticiones y se omiten.
+
+Al terminar se reporta el throughput total y, por callback, el número de peticiones, la latencia p50/p95/p99 y la tasa
+de errores. Cada callback se identifica por el nombre de su función, que se lee del código de pages/ porque
+/_dash-dependencies solo trae las salidas (si no se encuentra, se usa el id de la primera salida). Sirve para dimensionar los workers de gunicorn: levantar el servidor con la configuración a evaluar y
+aumentar --usuarios hasta que la p95 deje de ser aceptable.
+
+Uso (desde la raíz del repositorio, con el servidor corriendo):
+    gunicorn app:server -b :8050 --workers 2
+    python -m benchmarks.carga_callbacks --url http://127.0.0.1:8050 --usuarios 20 --duracion 60
+"""
+import argparse
+import ast
+import glob
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+RUTA_CALLBACKS = '/_dash-update-component'
+SALIDA_PAGINAS = '.._pages_content.children..._pages_store.data..'
+
+
+# Función para separar una salida de Dash ('id.prop' o '..id1.prop1...id2.prop2..') en sus pares (id, propiedad)
+def separar_salidas(salida):
+    if salida.startswith('..'):
+        return [tuple(parte.rsplit('.', 1)) for parte in salida[2:-2].split('...')]
+    return [tuple(salida.rsplit('.', 1))]
+
+
+# Función para obtener el nombre de la función de cada callback a partir del código de las páginas
+def nombres_callbacks(patron='pages/*.py'):
+    """
+    Lee (sin importarlos) los módulos de las páginas y asocia la salida de cada @dash.callback con el nombre de su
+    función, con la misma forma de salida de /_dash-dependencies.
+
+    Args:
+        patron (str, optional): Archivos a revisar. Defaults to 'pages/*.py'.
+
+    Returns:
+        dict: Salida ('id.prop' o '..id1.prop1...id2.prop2..') -> nombre de la función.
+    """
+    nombres = {}
+    for ruta in sorted(glob.glob(patron)):
+        with open(ruta, encoding='utf-8') as archivo:
+            arbol = ast.parse(archivo.read(), filename=ruta)
+        for funcion in ast.walk(arbol):
+            if not isinstance(funcion, ast.FunctionDef):
+                continue
+            for decorador in funcion.decorator_list:
+                if not (isinstance(decorador, ast.Call) and isinstance(decorador.func, ast.Attribute)
+                        and decorador.func.attr == 'callback'):
+                    continue
+                argumento = decorador.args[0] if decorador.args else next(
+                    (clave.value for clave in decorador.keywords if clave.arg == 'output'), None)
+                salidas = [tuple(constante.value for constante in nodo.args[:2])
+                           for nodo in ast.walk(argumento) if isinstance(nodo, ast.Call)
+                           and getattr(nodo.func, 'id', None) == 'Output'
+                           and all(isinstance(constante, ast.Constant) for constante in nodo.args[:2])] if argumento else []
+                if not salidas:
+                    continue
+                texto = '...'.join(f'{componente}.{propiedad}' for componente, propiedad in salidas)
+                nombres[f'..{texto}..' if isinstance(argumento, (ast.List, ast.Tuple)) else texto] = funcion.name
+    return nombres
+
+
+# Función para recorrer el layout de una página y guardar las propiedades de cada componente con id
+def recolectar_componentes(nodo, componentes):
+    if isinstance(nodo, list):
+        for hijo in nodo:
+            recolectar_componentes(hijo, componentes)
+    elif isinstance(nodo, dict) and 'props' in nodo:
+        propiedades = nodo['props']
+        if isinstance(propiedades.get('id'), str):
+            componentes[propiedades['id']] = {clave: valor for clave, valor in propiedades.items() if clave != 'children'}
+        for valor in propiedades.values():
+            recolectar_componentes(valor, componentes)
+    return componentes
+
+
+# Función para obtener los valores que puede tomar un componente (opciones de un dropdown o marcas de un slider)
+def valores_posibles(propiedades):
+    opciones = propiedades.get('options')
+    if isinstance(opciones, dict):
+        return list(opciones)
+    if isinstance(opciones, list):
+        return [opcion['value'] if isinstance(opcion, dict) else opcion for opcion in opciones]
+    if propiedades.get('marks'):
+        return [int(marca) if str(marca).lstrip('-').isdigit() else marca for marca in propiedades['marks']]
+    return []
+
+
+class Estadisticas:
+    """
+    Latencias y errores por callback, compartidos por todos los usuarios virtuales.
+    """
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre, latencia, error):
+        with self._lock:
+            self.latencias[nombre].append(latencia)
+            if error:
+                self.errores[nombre] += 1
+
+    def resumen(self, duracion):
+        """
+        Retorna el throughput total y las estadísticas por callback.
+
+        Args:
+            duracion (float): Segundos de la prueba.
+
+        Returns:
+            dict: {'peticiones', 'throughput', 'latencia_media_ms', 'errores', 'callbacks': {nombre: {...}}}.
+        """
+        callbacks = {}
+        for nombre, latencias in sorted(self.latencias.items()):
+            cuantiles = statistics.quantiles(latencias, n=100, method='inclusive') if len(latencias) > 1 else latencias * 99
+            callbacks[nombre] = {
+                'peticiones': len(latencias),
+                'p50_ms': cuantiles[49] * 1000,
+                'p95_ms': cuantiles[94] * 1000,
+                'p99_ms': cuantiles[98] * 1000,
+                'tasa_errores': self.errores[nombre] / len(latencias),
+            }
+        peticiones = sum(len(latencias) for latencias in self.latencias.values())
+        total = sum(sum(latencias) for latencias in self.latencias.values())
+        return {'peticiones': peticiones, 'throughput': peticiones / duracion if duracion else 0.0,
+                'latencia_media_ms': total / peticiones * 1000 if peticiones else 0.0,
+                'errores': sum(self.errores.values()), 'callbacks': callbacks}
+
+
+class UsuarioVirtual:
+    """
+    Usuario que recorre las páginas enviando las mismas peticiones que el navegador.
+
+    Args:
+        url (str): URL base del servidor.
+        dependencias (list): Respuesta de /_dash-dependencies.
+        estadisticas (Estadisticas): Registro compartido de latencias y errores.
+        pausa (float): Segundos promedio de espera entre acciones (tiempo de "lectura" del usuario).
+        semilla (int): Semilla del generador aleatorio del usuario.
+        nombres (dict, optional): Salida -> nombre de la función del callback (ver nombres_callbacks). Defaults to None.
+    """
+
+    def __init__(self, url, dependencias, estadisticas, pausa, semilla, nombres=None):
+        self.url = url.rstrip('/')
+        self.nombres = nombres or {}
+        self.estadisticas = estadisticas
+        self.pausa = pausa
+        self.azar = random.Random(semilla)
+        self.sesion = requests.Session()
+        self.estado = {}
+
+        # Callbacks del servidor indexados por cada entrada 'id.prop' (sin clientside ni ids con patrones)
+        self.callbacks = [dependencia for dependencia in dependencias
+                          if not dependencia.get('clientside_function') and not dependencia['output'].startswith(('{', '..{'))
+                          and dependencia['output'] != SALIDA_PAGINAS]
+        self.por_entrada = defaultdict(list)
+        for callback in self.callbacks:
+            for entrada in callback['inputs']:
+                self.por_entrada[(entrada['id'], entrada['property'])].append(callback)
+
+    def _enviar(self, nombre, cuerpo):
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.sesion.post(self.url + RUTA_CALLBACKS, json=cuerpo, timeout=60)
+            error = respuesta.status_code not in (200, 204)
+            datos = respuesta.json() if respuesta.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            error, datos = True, None
+        self.estadisticas.registrar(nombre, time.perf_counter() - inicio, error)
+        return datos
+
+    def _valor(self, componente, propiedad):
+        return self.estado.get(componente, {}).get(propiedad)
+
+    def _disparar(self, callback, cambiadas):
+        salidas = separar_salidas(callback['output'])
+        especificacion = [{'id': componente, 'property': propiedad} for componente, propiedad in salidas]
+        cuerpo = {
+            'output': callback['output'],
+            'outputs': especificacion if callback['output'].startswith('..') else especificacion[0],
+            'inputs': [{**entrada, 'value': self._valor(entrada['id'], entrada['property'])} for entrada in callback['inputs']],
+            'state': [{**estado, 'value': self._valor(estado['id'], estado['property'])} for estado in callback['state']],
+            'changedPropIds': cambiadas,
+        }
+        datos = self._enviar(self.nombres.get(callback['output'], salidas[0][0]), cuerpo)
+
+        # Aplicar las salidas al estado y retornar las propiedades que cambiaron (para los callbacks encadenados)
+        actualizadas = []
+        for componente, propiedades in ((datos or {}).get('response') or {}).items():
+            for propiedad, valor in propiedades.items():
+                self.estado.setdefault(componente, {})[propiedad] = valor
+                actualizadas.append((componente, propiedad))
+        return actualizadas
+
+    def _propagar(self, cambiadas):
+        # Cada ronda dispara los callbacks que dependen de lo que cambió en la ronda anterior, como el renderer de Dash
+        while cambiadas:
+            pendientes = []
+            for callback in {id(callback): callback for cambio in cambiadas for callback in self.por_entrada[cambio]}.values():
+                if all(entrada['id'] in self.estado for entrada in callback['inputs']):
+                    pendientes += self._disparar(callback, [f'{componente}.{propiedad}' for componente, propiedad in cambiadas])
+            cambiadas = pendientes
+
+    def cambiar(self, componente, propiedad, valor):
+        self.estado.setdefault(componente, {})[propiedad] = valor
+        self._propagar([(componente, propiedad)])
+        if self.pausa:
+            time.sleep(self.azar.uniform(0.5, 1.5) * self.pausa)
+
+    def abrir_pagina(self, ruta):
+        cuerpo = {
+            'output': SALIDA_PAGINAS,
+            'outputs': [{'id': '_pages_content', 'property': 'children'}, {'id': '_pages_store', 'property': 'data'}],
+            'inputs': [{'id': '_pages_location', 'property': 'pathname', 'value': ruta},
+                       {'id': '_pages_location', 'property': 'search', 'value': ''}],
+            'changedPropIds': ['_pages_location.pathname'],
+        }
+        datos = self._enviar('_pages_content', cuerpo)
+        if not datos:
+            time.sleep(max(self.pausa, 0.1))  # Sin página no hay recorrido: esperar un poco antes de reintentar
+            return False
+
+        # El estado del usuario pasa a ser el de los componentes de la página, y se disparan los callbacks iniciales
+        self.estado = recolectar_componentes(datos['response']['_pages_content']['children'], {})
+        for callback in self.callbacks:
+            if not callback.get('prevent_initial_call') and all(entrada['id'] in self.estado for entrada in callback['inputs']):
+                self._propagar(self._disparar(callback, []))
+        return True
+
+    def recorrido_inicio(self):
+        if not self.abrir_pagina('/'):
+            return
+        # Llenar los dropdowns del formulario uno por uno
+        for componente in [componente for componente in self.estado if componente.startswith('dd_') and componente != 'dd_area']:
+            self.cambiar(componente, 'value', self.azar.choice(valores_posibles(self.estado[componente])))
+        recursos = valores_posibles(self.estado['fami_recursos'])
+        self.cambiar('fami_recursos', 'value', self.azar.sample(recursos, self.azar.randint(0, len(recursos))))
+        # Cambiar de área y consultar la interpretación de un nivel de desempeño
+        for area in self.azar.sample(valores_posibles(self.estado['dd_area']), 2):
+            self.cambiar('dd_area', 'value', area)
+            niveles = valores_posibles(self.estado['radios'])
+            if niveles:
+                self.cambiar('radios', 'value', self.azar.choice(niveles))
+
+    def recorrido_visualizaciones(self):
+        if not self.abrir_pagina('/visualizations'):
+            return
+        anios = valores_posibles(self.estado['year-slider'])
+        municipios = valores_posibles(self.estado['dropdown-municipios'])
+        for _ in range(2):
+            self.cambiar('year-slider', 'value', self.azar.choice(anios))
+        for _ in range(3):
+            self.cambiar('dropdown-municipios', 'value', self.azar.choice(municipios))
+        self.cambiar('dropdown-puntaje', 'value', self.azar.choice(valores_posibles(self.estado['dropdown-puntaje'])))
+        self.cambiar('switch-subregiones', 'value', True)
+        self.cambiar('year-slider', 'value', self.azar.choice(anios))
+        self.cambiar('switch-subregiones', 'value', False)
+
+    def ejecutar(self, fin):
+        while time.perf_counter() < fin:
+            self.recorrido_inicio()
+            self.recorrido_visualizaciones()
+
+
+# Función para ejecutar la prueba de carga con N usuarios concurrentes
+def ejecutar_carga(url, usuarios, duracion, pausa=0.5, semilla=0):
+    """
+    Ejecuta la prueba de carga.
+
+    Args:
+        url (str): URL base del servidor.
+        usuarios (int): Número de usuarios virtuales concurrentes.
+        duracion (float): Segundos de la prueba (cada usuario termina el recorrido en curso).
+        pausa (float, optional): Segundos promedio entre acciones de un usuario. Defaults to 0.5.
+        semilla (int, optional): Semilla de los recorridos. Defaults to 0.
+
+    Returns:
+        dict: Resumen de la prueba (ver Estadisticas.resumen).
+    """
+    dependencias = requests.get(url.rstrip('/') + '/_dash-dependencies', timeout=30).json()
+    nombres = nombres_callbacks()
+    estadisticas = Estadisticas()
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    hilos = [threading.Thread(target=UsuarioVirtual(url, dependencias, estadisticas, pausa, semilla + i, nombres).ejecutar, args=(fin,))
+             for i in range(usuarios)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return estadisticas.resumen(time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los callbacks de Dash con recorridos realistas.")
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help="URL base del servidor. Defaults to http://127.0.0.1:8050.")
+    parser.add_argument('--usuarios', type=int, default=10, help="Usuarios virtuales concurrentes. Defaults to 10.")
+    parser.add_argument('--duracion', type=float, default=30, help="Segundos de la prueba. Defaults to 30.")
+    parser.add_argument('--pausa', type=float, default=0.5, help="Segundos promedio entre acciones (0 = sin pausa). Defaults to 0.5.")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los recorridos. Defaults to 0.")
+    parser.add_argument('--json', help="Ruta donde guardar el resumen en JSON.")
+    args = parser.parse_args()
+
+    resumen = ejecutar_carga(args.url, args.usuarios, args.duracion, args.pausa, args.semilla)
+
+    print(f"Usuarios: {args.usuarios} | peticiones: {resumen['peticiones']} | throughput: {resumen['throughput']:.1f} req/s "
+          f"| errores: {resumen['errores']}")
+    print(f"{'Callback':<30} {'Peticiones':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Errores':>8}")
+    for nombre, fila in resumen['callbacks'].items():
+        print(f"{nombre:<30} {fila['peticiones']:>10} {fila['p50_ms']:>9.1f} {fila['p95_ms']:>9.1f} {fila['p99_ms']:>9.1f} "
+              f"{fila['tasa_errores']:>7.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(resumen, archivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
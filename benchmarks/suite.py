@@ -0,0 +1,225 @@
+"""
+Suite de micro-benchmarks con líneas base en JSON y detección de regresiones.
+
+Casos medidos:
+    - inferencia/<área>/<n>: infer.query de cada área con 0 a 10 evidencias.
+    - figura/desempenho_predicho: create_predicted_performance_chart.
+    - figura/desempenho_plantilla: plantilla preconstruida del mismo gráfico (la que usa la predicción).
+    - callback/update_choropleth: update_choropleth sin memoización (municipios y subregiones).
+    - figura/line_chart: construir_line_chart de 5 municipios (sin el caché de figuras del line chart).
+    - carga/geometria, carga/tablas, carga/modelos: carga de los activos al iniciar.
+
+Cada caso se ejecuta una vez para calentar y luego se repite hasta cumplir un número mínimo de repeticiones y de tiempo;
+se guarda la mediana, el mínimo y la p95 en milisegundos. La comparación usa la mediana, que es la medida más estable
+entre corridas, y marca como regresión todo caso cuya mediana suba más del umbral.
+
+Las líneas base dependen de la máquina: se deben generar y comparar en el mismo equipo (o en el mismo tipo de runner).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.suite ejecutar --guardar benchmarks/lineas_base/base.json
+    python -m benchmarks.suite comparar benchmarks/lineas_base/base.json --umbral 10
+    python -m benchmarks.suite comparar base.json actual.json     (compara dos corridas ya guardadas)
+    python -m benchmarks.suite ejecutar --filtro inferencia/global  (solo los casos cuyo nombre contiene el filtro)
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from geojson_rewind import rewind
+
+import app  # noqa: F401  (registra las páginas de Dash)
+import pages.home as home
+import pages.visualizations as visualizations
+from utils.almacen import cargar_tabla
+from utils.topologia import decodificar_topologia
+from utils.utils import create_predicted_performance_chart
+
+
+# Función para construir las evidencias de un área: la primera opción de cada dropdown y luego los recursos (10 en total)
+def construir_evidencias():
+    evidencias = []
+    for param, opciones in home.dd_params.items():
+        evidencias.append((home.param_name_mapping[0][f'dd_{param}'], opciones[0]['value']))
+    evidencias.append(('FAMI_RECURSOS', 0))
+    return evidencias
+
+
+# Función para armar la lista de casos: [(nombre, función sin argumentos)]
+def casos():
+    lista = []
+
+    # Inferencia por área y número de evidencias
+    evidencias = construir_evidencias()
+    for area, objetivo in home.target_variable.items():
+        infer = home.realizar_inferencia(area)
+        for n in range(len(evidencias) + 1):
+            evidencia = dict(evidencias[:n])
+            lista.append((f'inferencia/{area}/{n:02d}', lambda infer=infer, objetivo=objetivo, evidencia=evidencia:
+                          infer.query([objetivo], evidence=evidencia, show_progress=False)))
+
+    # Figuras y callbacks (sin la memoización, para medir el cálculo y no el caché)
+    lista.append(('figura/desempenho_predicho', lambda: [create_predicted_performance_chart(nivel, 'matematicas') for nivel in range(1, 5)]))
+    lista.append(('figura/desempenho_plantilla', lambda: [home.cache_desempenho.obtener(('matematicas', nivel), None) for nivel in range(1, 5)]))
+    update_choropleth = visualizations.update_choropleth.__wrapped__
+    lista.append(('callback/update_choropleth', lambda: update_choropleth('MEDELLÍN', visualizations.ultimo_anio, 'PUNT_GLOBAL', False)))
+    lista.append(('callback/update_choropleth_subregiones', lambda: update_choropleth('MEDELLÍN', visualizations.ultimo_anio, 'PUNT_GLOBAL', True)))
+    municipios = list(visualizations.df_antioquia['MPIO_CNMBR'])
+    lista.append(('figura/line_chart', lambda: [visualizations.construir_line_chart((municipio, 'PUNT_GLOBAL')) for municipio in municipios[:5]]))
+
+    # Carga de activos
+    def cargar_geometria():
+        with open(visualizations.ruta_geometria, encoding='utf-8') as archivo:
+            geometria = json.load(archivo)
+        if visualizations.ruta_geometria.endswith('.topojson'):
+            geometria = decodificar_topologia(geometria, 'antioquia')
+        return rewind(geometria, rfc7946=False)
+
+    def cargar_modelos():
+        for nombre in home.model_names:
+            with open(f'datos/{nombre}.pkl', 'rb') as archivo:
+                pickle.load(archivo)
+
+    lista.append(('carga/geometria', cargar_geometria))
+    if os.path.exists('datos/almacen/antioquia_promedios'):
+        lista.append(('carga/tablas', lambda: [cargar_tabla(f'datos/almacen/{tabla}') for tabla in
+                                               ['antioquia_promedios', 'antioquia_linechart', 'colombia_linechart']]))
+    lista.append(('carga/modelos', cargar_modelos))
+    return lista
+
+
+# Función para medir un caso: se repite hasta cumplir `minimo` repeticiones y `tiempo_minimo` segundos
+def medir(funcion, minimo=10, tiempo_minimo=1.0, maximo=2000):
+    funcion()  # calentamiento
+    tiempos = []
+    inicio = time.perf_counter()
+    while len(tiempos) < maximo and (len(tiempos) < minimo or time.perf_counter() - inicio < tiempo_minimo):
+        antes = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - antes) * 1000)
+    tiempos.sort()
+    return {
+        'mediana_ms': statistics.median(tiempos),
+        'min_ms': tiempos[0],
+        'p95_ms': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        'repeticiones': len(tiempos),
+    }
+
+
+# Función para describir el entorno de una corrida (las líneas base solo son comparables en el mismo entorno)
+def entorno():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'plataforma': platform.platform(), 'procesador': platform.processor() or platform.machine(), 'cpus': os.cpu_count()}
+
+
+def ejecutar(filtro=None):
+    """
+    Ejecuta la suite y retorna los resultados.
+
+    Args:
+        filtro (str, optional): Si se indica, solo se ejecutan los casos cuyo nombre lo contiene. Defaults to None.
+
+    Returns:
+        dict: {'entorno': {...}, 'casos': {nombre: {'mediana_ms', 'min_ms', 'p95_ms', 'repeticiones'}}}.
+    """
+    resultados = {}
+    for nombre, funcion in casos():
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = medir(funcion)
+        print(f"{nombre:<42} mediana {resultados[nombre]['mediana_ms']:9.3f} ms | p95 {resultados[nombre]['p95_ms']:9.3f} ms "
+              f"| {resultados[nombre]['repeticiones']} rep.")
+    return {'entorno': entorno(), 'casos': resultados}
+
+
+def comparar(base, actual, umbral):
+    """
+    Compara dos corridas y retorna los casos cuya mediana subió más del umbral.
+
+    Args:
+        base (dict): Corrida de referencia.
+        actual (dict): Corrida a evaluar.
+        umbral (float): Porcentaje máximo de aumento permitido.
+
+    Returns:
+        list: Nombres de los casos con regresión.
+    """
+    regresiones = []
+    distintos = [clave for clave in ['python', 'procesador', 'cpus'] if base['entorno'].get(clave) != actual['entorno'].get(clave)]
+    if distintos:
+        print(f"Atención: las corridas se hicieron en entornos distintos ({', '.join(distintos)}); la comparación no es confiable.")
+    print(f"{'Caso':<42} {'Base ms':>10} {'Actual ms':>10} {'Cambio':>8}")
+    for nombre, resultado in actual['casos'].items():
+        if nombre not in base['casos']:
+            print(f"{nombre:<42} {'-':>10} {resultado['mediana_ms']:>10.3f}    nuevo")
+            continue
+        anterior = base['casos'][nombre]['mediana_ms']
+        cambio = (resultado['mediana_ms'] - anterior) / anterior * 100 if anterior else 0.0
+        marca = '  REGRESIÓN' if cambio > umbral else ''
+        print(f"{nombre:<42} {anterior:>10.3f} {resultado['mediana_ms']:>10.3f} {cambio:>+7.1f}%{marca}")
+        if cambio > umbral:
+            regresiones.append(nombre)
+    for nombre in sorted(base['casos'].keys() - actual['casos'].keys()):
+        print(f"{nombre:<42} (no se ejecutó en la corrida actual)")
+    return regresiones
+
+
+def guardar(resultados, ruta):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {ruta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks del tablero con líneas base en JSON.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    parser_ejecutar = subcomandos.add_parser('ejecutar', help="Ejecuta la suite.")
+    parser_ejecutar.add_argument('--guardar', help="Ruta donde guardar los resultados (p. ej. la línea base).")
+    parser_ejecutar.add_argument('--filtro', help="Solo los casos cuyo nombre contiene este texto.")
+
+    parser_comparar = subcomandos.add_parser('comparar', help="Compara contra una línea base; termina con código 1 si hay regresiones.")
+    parser_comparar.add_argument('base', help="JSON de la línea base.")
+    parser_comparar.add_argument('actual', nargs='?', help="JSON de la corrida a evaluar. Si se omite, se ejecuta la suite.")
+    parser_comparar.add_argument('--umbral', type=float, default=10.0, help="Aumento máximo permitido de la mediana, en %%. Defaults to 10.")
+    parser_comparar.add_argument('--filtro', help="Solo los casos cuyo nombre contiene este texto.")
+    parser_comparar.add_argument('--guardar', help="Ruta donde guardar la corrida actual.")
+    args = parser.parse_args()
+
+    if args.comando == 'ejecutar':
+        resultados = ejecutar(args.filtro)
+        if args.guardar:
+            guardar(resultados, args.guardar)
+        return
+
+    with open(args.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    if args.filtro:
+        base['casos'] = {nombre: resultado for nombre, resultado in base['casos'].items() if args.filtro in nombre}
+    if args.actual:
+        with open(args.actual, encoding='utf-8') as archivo:
+            actual = json.load(archivo)
+    else:
+        actual = ejecutar(args.filtro)
+        if args.guardar:
+            guardar(actual, args.guardar)
+
+    regresiones = comparar(base, actual, args.umbral)
+    if regresiones:
+        print(f"\n{len(regresiones)} casos con regresión mayor a {args.umbral:g} %: {', '.join(regresiones)}")
+        sys.exit(1)
+    print(f"\nSin regresiones mayores a {args.umbral:g} %.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+// =====================================================================================================================
+//                      CALLBACKS DEL LADO DEL CLIENTE: NIVELES E INTERPRETACIÓN DEL DESEMPEÑO
+// =====================================================================================================================
+// Las etiquetas de los niveles y sus interpretaciones llegan con la página en el dcc.Store 'datos-interpretaciones'
+// (leído de datos/interpretaciones.json), así que cambiar de nivel o de área no genera peticiones al servidor.
+
+(function () {
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        desempenho: {
+            // Botones de los niveles de desempeño del área (valores 1, 2, ...)
+            opcionesNiveles: function (area, datos) {
+                const info = datos && datos.areas[area];
+                if (!info) {
+                    return [];
+                }
+                return info.niveles.map((nivel, i) => ({ label: nivel.etiqueta, value: i + 1 }));
+            },
+
+            // Interpretación en Markdown del nivel seleccionado: rango de puntaje y descripción (si la tiene)
+            interpretacion: function (nivel, area, datos) {
+                if (!datos) {
+                    return '';
+                }
+                const info = datos.areas[area];
+                if (!info) {
+                    return datos.sin_area;
+                }
+                const descripcion = nivel ? info.niveles[nivel - 1] : undefined;
+                if (!descripcion) {
+                    return datos.sin_nivel;
+                }
+                const texto = `##### ✍🏽 Puntaje: ${descripcion.puntaje}`;
+                return descripcion.descripcion ? `${texto} \n - ${descripcion.descripcion}` : texto;
+            },
+        },
+    });
+})();
@@ -0,0 +1,29 @@
+# ======================================================================================================================
+#                                           CONFIGURACIÓN DE GUNICORN
+# ======================================================================================================================
+# Workers gthread: cada worker atiende varias peticiones a la vez con un pool de hilos, compartiendo en memoria los
+# modelos, las tablas y los cachés del proceso. Con workers sync cada petición concurrente necesita un proceso propio
+# con su copia de todo lo anterior. Los objetos de inferencia son seguros entre hilos (ver utils/inferencia.py).
+# Las cifras para elegir los valores por defecto salen de benchmarks/bench_servidor.py.
+#
+# Uso: gunicorn app:server -c gunicorn.conf.py
+#
+# Variables de entorno:
+#   PORT                Puerto del servidor. Defaults to 8050.
+#   GUNICORN_WORKERS    Número de procesos. Defaults to 1.
+#   GUNICORN_HILOS      Hilos por proceso. Defaults to 8.
+#   GUNICORN_CLASE      Clase de worker ('gthread' o 'sync' para volver a la configuración anterior). Defaults to 'gthread'.
+import os
+
+bind = f":{os.environ.get('PORT', '8050')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', '1'))
+worker_class = os.environ.get('GUNICORN_CLASE', 'gthread')
+threads = int(os.environ.get('GUNICORN_HILOS', '8'))
+
+# Las peticiones largas (p. ej. el primer choropleth) no deben matar al worker; los trabajos pesados van en segundo
+# plano (ver utils/trabajos.py)
+timeout = 60
+
+# Sin preload: la aplicación se importa en cada worker después del fork, de modo que las conexiones de SQLite (caché de
+# los trabajos y de la base de datos de puntajes) no se comparten entre procesos
+preload_app = False
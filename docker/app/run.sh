@@ -1 +1 @@
-gunicorn app:server -b :$PORT 
+gunicorn app:server -c gunicorn.conf.py
\ No newline at end of file
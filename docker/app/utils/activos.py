@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, request
+
+from utils.compresion import brotli, elegir_codificacion
+
+# ======================================================================================================================
+#                               ACTIVOS ESTÁTICOS: HUELLAS, PRECOMPRESIÓN Y CACHÉ DEL NAVEGADOR
+# ======================================================================================================================
+# assets/ solo guarda recursos del navegador (hojas de estilo, scripts e imágenes); los datos y modelos, que solo lee el
+# servidor, están en datos/ y no se publican. Al iniciar, cada activo se lee una vez y se guarda en memoria con:
+#   - una huella (hash de su contenido) que va en su URL: /assets/custom.css?v=<huella>;
+#   - sus versiones comprimidas con gzip 9 y brotli 11 (solo los de texto), calculadas una vez y no en cada petición.
+# Una petición con la huella vigente se responde con Cache-Control: immutable por un año, de modo que el navegador no
+# vuelve a preguntar por el archivo; cuando el archivo cambia, cambia su URL. Sin huella (o con una vieja) se responde
+# con no-cache y un ETag, y el navegador revalida con If-None-Match (304 sin cuerpo si no cambió).
+#
+# Las hojas de estilo y los scripts se incluyen en la página con su huella (ver app.py), en lugar de la marca de tiempo
+# que les agrega Dash. Los activos se leen al iniciar: un cambio en assets/ requiere reiniciar el servidor.
+
+DIRECTORIO_ACTIVOS = 'assets'
+PREFIJO_ACTIVOS = '/assets/'
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+
+# Tipos que vale la pena comprimir (las imágenes PNG/JPG ya vienen comprimidas)
+TIPOS_COMPRIMIBLES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Activo:
+    """
+    Archivo de assets/ con su huella y sus versiones precomprimidas.
+
+    Args:
+        ruta (str): Ruta relativa a assets/ (con '/' como separador).
+        contenido (bytes): Contenido del archivo.
+    """
+
+    def __init__(self, ruta, contenido):
+        self.ruta = ruta
+        self.huella = hashlib.sha256(contenido).hexdigest()[:12]
+        self.tipo = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+
+        # Versiones por codificación (None = sin comprimir); solo se guardan las que resultan más pequeñas
+        self.versiones = {None: contenido}
+        if self.tipo.startswith(TIPOS_COMPRIMIBLES):
+            comprimidas = {'gzip': gzip.compress(contenido, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                comprimidas['br'] = brotli.compress(contenido, quality=11, mode=brotli.MODE_TEXT)
+            self.versiones.update({codificacion: datos for codificacion, datos in comprimidas.items()
+                                   if len(datos) < len(contenido)})
+
+    @property
+    def url(self):
+        return f'{PREFIJO_ACTIVOS}{self.ruta}?v={self.huella}'
+
+
+# Función para leer los activos de un directorio
+def cargar_activos(directorio=DIRECTORIO_ACTIVOS):
+    """
+    Lee los archivos del directorio de activos y calcula sus huellas y versiones comprimidas.
+
+    Args:
+        directorio (str, optional): Directorio de los activos. Defaults to 'assets'.
+
+    Returns:
+        dict: Ruta relativa -> Activo.
+    """
+    activos = {}
+    for actual, _, archivos in sorted(os.walk(directorio)):
+        for archivo in sorted(archivos):
+            ruta_completa = os.path.join(actual, archivo)
+            ruta = os.path.relpath(ruta_completa, directorio).replace(os.sep, '/')
+            with open(ruta_completa, 'rb') as f:
+                activos[ruta] = Activo(ruta, f.read())
+    return activos
+
+
+activos = cargar_activos()
+
+
+# Función para obtener la URL con huella de un activo (p. ej. para el src de una imagen)
+def url_activo(ruta):
+    activo = activos.get(ruta)
+    return activo.url if activo is not None else f'{PREFIJO_ACTIVOS}{ruta}'
+
+
+# Funciones para listar las hojas de estilo y los scripts con su huella (external_stylesheets y external_scripts)
+def hojas_estilo():
+    return [activo.url for ruta, activo in activos.items() if ruta.endswith('.css')]
+
+
+def scripts():
+    return [activo.url for ruta, activo in activos.items() if ruta.endswith('.js')]
+
+
+# Función para registrar el servicio de los activos en el servidor Flask de Dash
+def registrar_activos(server, prefijo=PREFIJO_ACTIVOS):
+    """
+    Registra un before_request que sirve los activos desde memoria con caché del navegador y precompresión.
+
+    Args:
+        server (flask.Flask): Servidor de la aplicación (app.server).
+        prefijo (str, optional): Ruta de los activos. Defaults to '/assets/'.
+    """
+
+    @server.before_request
+    def servir_activo():
+        if not request.path.startswith(prefijo):
+            return None
+        activo = activos.get(request.path[len(prefijo):])
+        if activo is None:
+            return None  # Lo atiende Dash (p. ej. un archivo agregado después de iniciar)
+
+        codificacion = elegir_codificacion(request.headers.get('Accept-Encoding', ''))
+        if codificacion not in activo.versiones:
+            codificacion = None
+        etag = activo.huella + (f'-{codificacion}' if codificacion else '')
+
+        if request.args.get('v') == activo.huella:
+            response = Response(activo.versiones[codificacion], mimetype=activo.tipo)
+            response.headers['Cache-Control'] = CACHE_INMUTABLE
+        elif request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.headers['Cache-Control'] = 'no-cache'
+        else:
+            response = Response(activo.versiones[codificacion], mimetype=activo.tipo)
+            response.headers['Cache-Control'] = 'no-cache'
+
+        response.set_etag(etag)
+        if len(activo.versiones) > 1:
+            response.vary.add('Accept-Encoding')
+        if codificacion is not None and response.status_code == 200:
+            response.headers['Content-Encoding'] = codificacion
+        return response
+
+    return servir_activo
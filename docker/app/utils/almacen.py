@@ -0,0 +1,153 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# ======================================================================================================================
+#                                       ALMACÉN COLUMNAR TIPADO DE PUNTAJES
+# ======================================================================================================================
+# Cada tabla se guarda en un directorio con un arreglo estructurado de NumPy (tabla-<huella>.npy, un campo por columna)
+# y un esquema.json que describe las columnas y nombra el archivo del arreglo:
+#   - Columnas numéricas y códigos DANE: el entero más pequeño que contiene sus valores (p. ej. uint16 para los años,
+#     uint8 para los puntajes por área). Los códigos DANE ('05001') se guardan como enteros. Las columnas numéricas con
+#     valores vacíos se guardan como float64 con NaN.
+#   - Columnas de texto (municipio, subregión, bandera): codificación categórica, es decir, un arreglo de códigos
+#     enteros más la lista de categorías en el esquema.
+# El arreglo se abre con memoria mapeada (mmap_mode='r'), por lo que cargar el almacén no lee ni interpreta texto.
+#
+# Reemplazar una tabla es una sola operación atómica: el arreglo nuevo se escribe con otro nombre (la huella de su
+# contenido) y luego esquema.json se reemplaza con os.replace. Un lector ve el esquema anterior con su arreglo o el
+# nuevo con el suyo, nunca una mezcla, y un worker que tiene mapeado el arreglo anterior conserva ese archivo aunque se
+# borre del directorio (en lugar de verlo truncarse bajo sus pies, que termina en SIGBUS).
+
+# Arreglo de las tablas escritas antes de que el esquema nombrara su archivo
+ARCHIVO_TABLA_ANTERIOR = 'tabla.npy'
+
+TIPOS_ENTEROS = [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.int64]
+
+
+# Función para elegir el tipo entero más pequeño que contiene un rango de valores
+def _tipo_entero(minimo, maximo):
+    for tipo in TIPOS_ENTEROS:
+        if np.iinfo(tipo).min <= minimo and maximo <= np.iinfo(tipo).max:
+            return tipo
+    return np.int64
+
+
+# Función para convertir una columna de un DataFrame a su representación tipada
+def _codificar_columna(serie):
+    if pd.api.types.is_numeric_dtype(serie):
+        valores = serie.to_numpy()
+        if pd.api.types.is_integer_dtype(serie) or (not serie.isna().any() and np.all(np.mod(valores, 1) == 0)):
+            return {'tipo': 'numerico'}, valores.astype(_tipo_entero(valores.min(), valores.max()))
+        return {'tipo': 'numerico'}, valores.astype(np.float64)
+
+    # Columnas de texto cuyos valores no vacíos son todos números (códigos DANE, puntajes leídos con dtype=str): enteros
+    # si no hay vacíos y todos son enteros, y si no float64 con NaN en los vacíos (y no una categoría 'nan')
+    numeros = pd.to_numeric(serie, errors='coerce')
+    vacios = serie.isna() | (serie.astype(str).str.strip() == '')
+    if numeros.notna().any() and (numeros.notna() | vacios).all():
+        valores = numeros.to_numpy(dtype=np.float64)
+        if not vacios.any() and np.all(np.mod(valores, 1) == 0):
+            return {'tipo': 'numerico'}, valores.astype(_tipo_entero(valores.min(), valores.max()))
+        return {'tipo': 'numerico'}, valores
+
+    # Columnas de texto: codificación categórica
+    texto = serie.astype(str)
+    categorias = pd.Categorical(texto)
+    codigos = categorias.codes
+    return ({'tipo': 'categorico', 'categorias': categorias.categories.tolist()},
+            codigos.astype(_tipo_entero(codigos.min(), codigos.max())))
+
+
+# Función para escribir un archivo de forma atómica (temporal en el mismo directorio + os.replace)
+def _escribir_atomico(ruta, contenido):
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    try:
+        with open(temporal, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+# Función para guardar un DataFrame como una tabla del almacén columnar
+def guardar_tabla(df, ruta):
+    """
+    Guarda un DataFrame en el almacén columnar tipado (un arreglo estructurado tabla-<huella>.npy y un esquema.json).
+    Reemplaza la tabla anterior, si existe, en un solo paso.
+
+    Args:
+        df (pd.DataFrame): Tabla a guardar.
+        ruta (str): Directorio de la tabla. Se crea si no existe.
+    """
+    os.makedirs(ruta, exist_ok=True)
+
+    columnas, arreglos = [], []
+    for nombre in df.columns:
+        descripcion, valores = _codificar_columna(df[nombre])
+        columnas.append({'nombre': nombre, 'dtype': str(valores.dtype), **descripcion})
+        arreglos.append(valores)
+
+    # Todas las columnas van en un único arreglo estructurado: un solo archivo que mapear al cargar
+    tabla = np.empty(len(df), dtype=[(columna['nombre'], valores.dtype) for columna, valores in zip(columnas, arreglos)])
+    for columna, valores in zip(columnas, arreglos):
+        tabla[columna['nombre']] = valores
+
+    contenido = io.BytesIO()
+    np.save(contenido, tabla)
+    contenido = contenido.getvalue()
+    archivo_tabla = f'tabla-{hashlib.sha256(contenido).hexdigest()[:12]}.npy'
+
+    # Primero el arreglo con su nombre nuevo y después el esquema que lo nombra (ver el encabezado del módulo). Cada
+    # archivo pasa por un temporal en el mismo directorio + os.replace
+    _escribir_atomico(os.path.join(ruta, archivo_tabla), contenido)
+    esquema = {'filas': len(df), 'archivo': archivo_tabla, 'columnas': columnas}
+    _escribir_atomico(os.path.join(ruta, 'esquema.json'), json.dumps(esquema, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    # Arreglos de versiones anteriores: ya ningún esquema los nombra
+    for anterior in os.listdir(ruta):
+        if anterior.startswith('tabla') and anterior.endswith('.npy') and anterior != archivo_tabla:
+            try:
+                os.remove(os.path.join(ruta, anterior))
+            except FileNotFoundError:  # Otro proceso lo eliminó
+                pass
+
+
+# Función para cargar una tabla del almacén columnar
+def cargar_tabla(ruta):
+    """
+    Carga una tabla del almacén columnar tipado. Las columnas son vistas sobre el archivo mapeado en memoria y las
+    columnas categóricas se reconstruyen como pd.Categorical a partir de sus códigos.
+
+    Args:
+        ruta (str): Directorio de la tabla.
+
+    Returns:
+        pd.DataFrame: Tabla con sus tipos compactos.
+    """
+    # Si la tabla se reemplaza entre la lectura del esquema y la del arreglo, el arreglo nombrado ya no existe: se vuelve
+    # a leer el esquema, que ahora nombra el arreglo nuevo
+    for intento in range(3):
+        with open(os.path.join(ruta, 'esquema.json'), encoding='utf-8') as archivo:
+            esquema = json.load(archivo)
+        try:
+            tabla = np.load(os.path.join(ruta, esquema.get('archivo', ARCHIVO_TABLA_ANTERIOR)), mmap_mode='r')
+            break
+        except FileNotFoundError:
+            if intento == 2:
+                raise
+
+    datos = {}
+    for columna in esquema['columnas']:
+        valores = tabla[columna['nombre']]
+        if columna['tipo'] == 'categorico':
+            datos[columna['nombre']] = pd.Categorical.from_codes(valores, categories=columna['categorias'], validate=False)
+        else:
+            datos[columna['nombre']] = valores
+
+    return pd.DataFrame(datos, copy=False)
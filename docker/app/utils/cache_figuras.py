@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metricas import construccion_figuras, serializacion_figuras
+
+# ======================================================================================================================
+#                                           CACHÉ DE FIGURAS SERIALIZADAS
+# ======================================================================================================================
+# Las figuras que dependen solo de datos estáticos (que no cambian entre despliegues) se construyen una sola vez y se
+# guardan serializadas en JSON. En cada consulta se devuelve una copia nueva (json.loads), de modo que el callback
+# no pasa por la construcción ni la validación de plotly y las copias entregadas nunca comparten estado.
+
+
+class CacheFiguras:
+    """
+    Caché acotado (LRU) de figuras de plotly serializadas en JSON.
+
+    Args:
+        max_entradas (int, optional): Número máximo de figuras guardadas. Defaults to 256.
+        nombre (str, optional): Nombre de la figura en las métricas de construcción y serialización. Defaults to 'figura'.
+    """
+
+    def __init__(self, max_entradas=256, nombre='figura'):
+        self.max_entradas = max_entradas
+        self.nombre = nombre
+        self._figuras = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._figuras)
+
+    def obtener(self, clave, constructor):
+        """
+        Retorna la figura asociada a la clave, construyéndola con `constructor` si no está en el caché.
+
+        Args:
+            clave (hashable): Clave de la figura. Por ejemplo (municipio, variable).
+            constructor (callable): Función sin argumentos que construye la figura (go.Figure).
+
+        Returns:
+            dict: Figura lista para retornar desde un callback de Dash.
+        """
+        with self._lock:
+            figura_json = self._figuras.get(clave)
+            if figura_json is not None:
+                self._figuras.move_to_end(clave)
+                self.aciertos += 1
+
+        if figura_json is None:
+            figura_json = self._construir(constructor)
+            with self._lock:
+                self.fallos += 1
+                self._guardar(clave, figura_json)
+
+        return json.loads(figura_json)
+
+    def precalentar(self, claves, constructor):
+        """
+        Construye y guarda de antemano las figuras de todas las claves indicadas.
+
+        Args:
+            claves (iterable): Claves de las figuras a construir.
+            constructor (callable): Función que recibe una clave y construye su figura (go.Figure).
+        """
+        for clave in claves:
+            figura_json = self._construir(lambda: constructor(clave))
+            with self._lock:
+                self._guardar(clave, figura_json)
+
+    # Construye y serializa una figura registrando el tiempo de cada paso (ver utils/metricas.py)
+    def _construir(self, constructor):
+        inicio = time.perf_counter()
+        figura = constructor()
+        serializacion = time.perf_counter()
+        figura_json = figura.to_json()
+        construccion_figuras.observar(serializacion - inicio, self.nombre)
+        serializacion_figuras.observar(time.perf_counter() - serializacion, self.nombre)
+        return figura_json
+
+    def vaciar(self):
+        with self._lock:
+            self._figuras.clear()
+
+    def _guardar(self, clave, figura_json):
+        self._figuras[clave] = figura_json
+        self._figuras.move_to_end(clave)
+        while len(self._figuras) > self.max_entradas:
+            self._figuras.popitem(last=False)
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# ======================================================================================================================
+#                                       ESTRUCTURAS DE DATOS PARA visualizations.py
+# ======================================================================================================================
+
+# Función para construir el registro de municipios que consultan los callbacks de la página de visualizaciones
+def construir_registro_municipios(df_antioquia):
+    """
+    Construye, en una sola pasada, un diccionario indexado por nombre de municipio con la información que necesitan
+    los callbacks. Así cada selección es una búsqueda en un diccionario y no una comparación sobre toda la columna.
+
+    Args:
+        df_antioquia (pd.DataFrame): Información de los municipios (columnas 'MPIO_CNMBR', 'BANDERA' y 'SUBREGION').
+
+    Returns:
+        dict: {nombre del municipio: {'posicion', 'bandera', 'subregion'}}, donde 'posicion' es la fila del municipio
+            en df_antioquia (y su posición en el eje de municipios del cubo de puntajes).
+    """
+    registro = {}
+    columnas = df_antioquia[['MPIO_CNMBR', 'BANDERA', 'SUBREGION']]
+    for posicion, (municipio, bandera, subregion) in enumerate(columnas.itertuples(index=False)):
+        registro[municipio] = {
+            'posicion': posicion,
+            'bandera': bandera,
+            'subregion': subregion,
+        }
+
+    return registro
+
+
+# Función para construir el cubo denso de puntajes (año x municipio x puntaje)
+def construir_cubo_puntajes(df_antioquia, df_linechart, variables):
+    """
+    Construye un arreglo denso de tres dimensiones con los puntajes de todos los municipios, de modo que cambiar de
+    año, municipio o puntaje en los callbacks sea tomar una rebanada del arreglo y no filtrar un DataFrame.
+
+    Args:
+        df_antioquia (pd.DataFrame): Información de los municipios (columna 'MPIO_CNMBR'); define el orden del eje de
+            municipios.
+        df_linechart (pd.DataFrame): Puntajes por año y municipio (columnas 'AÑO', 'COLE_MCPIO_UBICACION' y `variables`).
+        variables (list): Columnas de puntajes. Por ejemplo ['PUNT_GLOBAL', 'PUNT_MATEMATICAS'].
+
+    Returns:
+        dict: {'anios': [...], 'variables': [...], 'cubo': np.ndarray}, donde cubo[i, j, k] es el puntaje `variables[k]`
+            del municipio en la fila j de df_antioquia en el año `anios[i]` (NaN si no hay dato).
+    """
+    anios = sorted(df_linechart['AÑO'].unique().tolist())
+
+    # Posición de cada fila de df_linechart en los ejes de año y de municipio
+    fila_anio = pd.Index(anios).get_indexer(df_linechart['AÑO'])
+    fila_municipio = pd.Index(df_antioquia['MPIO_CNMBR']).get_indexer(df_linechart['COLE_MCPIO_UBICACION'])
+    validas = fila_municipio >= 0
+
+    cubo = np.full((len(anios), len(df_antioquia), len(variables)), np.nan, dtype=np.float32)
+    cubo[fila_anio[validas], fila_municipio[validas]] = df_linechart[variables].to_numpy(dtype=np.float32)[validas]
+
+    return {'anios': anios, 'variables': list(variables), 'cubo': cubo}
+
+
+# Función para alinear los puntajes nacionales con el eje de años del cubo
+def construir_vectores_pais(df_colombia, anios, variables):
+    """
+    Alinea los puntajes nacionales con el eje de años del cubo, para la línea de comparación de Colombia.
+
+    Args:
+        df_colombia (pd.DataFrame): Puntajes nacionales por año (columnas 'AÑO' y `variables`).
+        anios (list): Eje de años del cubo de puntajes.
+        variables (list): Columnas de puntajes, en el orden del cubo.
+
+    Returns:
+        np.ndarray: Arreglo de len(anios) x len(variables) (NaN en los años sin dato nacional).
+    """
+    return df_colombia.set_index('AÑO')[variables].reindex(anios).to_numpy(dtype=np.float32)
+
+
+# Función para convertir los conteos de estudiantes de los resúmenes de ingesta en pesos alineados con el cubo
+def construir_conteos_estudiantes(resumen_municipios, df_antioquia, anios, variables):
+    """
+    Convierte los conteos de estudiantes por periodo y municipio (ver utils/ingesta.py) en un arreglo alineado con el
+    cubo de puntajes, para ponderar los promedios de subregión y de departamento.
+
+    Args:
+        resumen_municipios (pd.DataFrame): Resumen indexado por ('PERIODO', 'COLE_COD_MCPIO_UBICACION') con columnas N_*.
+        df_antioquia (pd.DataFrame): Información de los municipios (columna 'DPTOMPIO'); define el eje de municipios.
+        anios (list): Eje de años del cubo.
+        variables (list): Puntajes, en el orden del cubo.
+
+    Returns:
+        np.ndarray: Arreglo de len(anios) x len(df_antioquia) x len(variables) con el número de estudiantes (0 si no
+            hay conteo).
+    """
+    resumen = resumen_municipios.reset_index()
+    resumen['AÑO'] = resumen['PERIODO'].astype(int) // 10
+    conteos = resumen.groupby(['AÑO', 'COLE_COD_MCPIO_UBICACION'])[[f'N_{variable}' for variable in variables]].sum()
+
+    fila_anio = pd.Index(anios).get_indexer(conteos.index.get_level_values('AÑO'))
+    fila_municipio = pd.Index(df_antioquia['DPTOMPIO'].astype(int)).get_indexer(conteos.index.get_level_values('COLE_COD_MCPIO_UBICACION').astype(int))
+    validas = (fila_anio >= 0) & (fila_municipio >= 0)
+
+    arreglo = np.zeros((len(anios), len(df_antioquia), len(variables)), dtype=np.float64)
+    arreglo[fila_anio[validas], fila_municipio[validas]] = conteos.to_numpy(dtype=np.float64)[validas]
+    return arreglo
+
+
+# Función para precalcular los promedios por subregión y por departamento (año x subregión x puntaje)
+def construir_agregados_subregiones(df_antioquia, cubo_puntajes, conteos=None):
+    """
+    Precalcula los promedios de cada subregión y del departamento para todos los años y puntajes, de modo que los
+    callbacks solo tengan que indexar arreglos.
+
+    Los promedios se ponderan por número de estudiantes cuando hay conteos; en los años sin conteos (p. ej. años que no
+    vienen de los microdatos) cada municipio pesa lo mismo.
+
+    Args:
+        df_antioquia (pd.DataFrame): Información de los municipios (columna 'SUBREGION'), en el orden del cubo.
+        cubo_puntajes (dict): Cubo de puntajes (ver construir_cubo_puntajes).
+        conteos (np.ndarray, optional): Número de estudiantes con la forma del cubo. Defaults to None.
+
+    Returns:
+        dict: {'subregiones': [...], 'indice': {subregión: s}, 'subregion_municipio': np.ndarray,
+            'cubo': np.ndarray, 'departamento': np.ndarray}, donde cubo[i, s, k] es el promedio de la subregión s,
+            departamento[i, k] el de Antioquia y subregion_municipio[j] la subregión del municipio j.
+    """
+    cubo = cubo_puntajes['cubo']
+    subregiones = sorted(df_antioquia['SUBREGION'].unique().tolist())
+    subregion_municipio = pd.Index(subregiones).get_indexer(df_antioquia['SUBREGION'])
+
+    # Pesos: estudiantes si hay conteos para ese año y puntaje, 1 por municipio si no; 0 donde no hay puntaje
+    con_dato = ~np.isnan(cubo)
+    pesos = np.ones(cubo.shape) if conteos is None else conteos.astype(np.float64)
+    pesos = np.where(pesos.sum(axis=1, keepdims=True) == 0, 1.0, pesos)
+    pesos = np.where(con_dato, pesos, 0.0)
+    ponderados = np.where(con_dato, cubo, 0.0) * pesos
+
+    # Suma por subregión de todos los años y puntajes a la vez (matriz de pertenencia subregión x municipio)
+    pertenencia = np.zeros((len(subregiones), len(df_antioquia)))
+    pertenencia[subregion_municipio, np.arange(len(df_antioquia))] = 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cubo_subregiones = (np.einsum('sm,ymv->ysv', pertenencia, ponderados)
+                            / np.einsum('sm,ymv->ysv', pertenencia, pesos)).astype(np.float32)
+        departamento = (ponderados.sum(axis=1) / pesos.sum(axis=1)).astype(np.float32)
+
+    return {
+        'subregiones': subregiones,
+        'indice': {subregion: s for s, subregion in enumerate(subregiones)},
+        'subregion_municipio': subregion_municipio,
+        'cubo': cubo_subregiones,
+        'departamento': departamento,
+    }
+
+
+# Función para construir el conjunto de datos compacto que usa el gráfico de comparación en el navegador
+def construir_datos_comparacion(df_antioquia, cubo_puntajes, agregados):
+    """
+    Construye un conjunto de datos columnar y compacto con las series de todos los municipios y los promedios por
+    subregión, para enviarlo una sola vez al navegador (dcc.Store) y superponer series sin volver al servidor.
+
+    Los valores de cada variable se guardan en un único arreglo plano de len(nombres) * len(anios) posiciones
+    (la serie del nombre i ocupa las posiciones i * len(anios) a (i + 1) * len(anios) - 1), que el navegador convierte
+    en un Float32Array. Los años sin dato se guardan como None.
+
+    Args:
+        df_antioquia (pd.DataFrame): Información de los municipios (columna 'MPIO_CNMBR'), en el orden del cubo.
+        cubo_puntajes (dict): Cubo de puntajes (ver construir_cubo_puntajes).
+        agregados (dict): Promedios por subregión (ver construir_agregados_subregiones).
+
+    Returns:
+        dict: {'anios': [...], 'nombres': [...], 'valores': {variable: [...]}}.
+    """
+    valores = {}
+    for k, variable in enumerate(cubo_puntajes['variables']):
+        # Series por fila (municipio o subregión) y año; los promedios de subregión se redondean a un decimal
+        plano = np.concatenate([cubo_puntajes['cubo'][:, :, k].T.astype(float).ravel(),
+                                np.round(agregados['cubo'][:, :, k].T.astype(float), 1).ravel()])
+
+        # Los enteros se envían sin decimales para que el JSON sea más corto
+        valores[variable] = [None if np.isnan(valor) else (int(valor) if valor.is_integer() else float(valor)) for valor in plano]
+
+    return {
+        'anios': cubo_puntajes['anios'],
+        'nombres': df_antioquia['MPIO_CNMBR'].tolist() + [f'Subregión {subregion}' for subregion in agregados['subregiones']],
+        'valores': valores,
+    }
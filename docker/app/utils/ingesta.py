@@ -0,0 +1,208 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from utils.almacen import guardar_tabla, cargar_tabla
+
+# ======================================================================================================================
+#                               INGESTA DE LOS MICRODATOS DE RESULTADOS SABER 11 (ICFES)
+# ======================================================================================================================
+# Los archivos de resultados del ICFES tienen una fila por estudiante (millones por periodo y varios GB por archivo).
+# Cada archivo se lee por bloques y solo con las columnas necesarias; de cada bloque se guardan sumas y conteos por
+# (periodo, municipio), que se acumulan sin mantener el archivo en memoria. Las sumas y conteos de varios bloques o
+# archivos se combinan sumándolos, y al final se convierten en los promedios por año de los CSV del line chart.
+#
+# Los resúmenes se guardan por periodo en el almacén columnar (tablas parciales_municipios y parciales_pais). Así,
+# cuando el ICFES publica un periodo nuevo basta con ingerir ese archivo y anexar su resumen: los periodos que ya
+# estaban se conservan y un periodo ingerido de nuevo reemplaza al anterior en lugar de sumarse dos veces.
+
+COLUMNAS_PUNTAJES = ['PUNT_LECTURA_CRITICA', 'PUNT_MATEMATICAS', 'PUNT_C_NATURALES', 'PUNT_SOCIALES_CIUDADANAS',
+                     'PUNT_INGLES', 'PUNT_GLOBAL']
+
+# Código DANE del departamento de Antioquia
+DEPARTAMENTO_ANTIOQUIA = 5
+
+
+# Función para detectar el separador de un archivo de resultados (el ICFES ha publicado archivos con ',' y con ';')
+def _detectar_separador(ruta, encoding):
+    with open(ruta, encoding=encoding, errors='replace') as archivo:
+        encabezado = archivo.readline()
+    return ';' if encabezado.count(';') > encabezado.count(',') else ','
+
+
+# Función para resumir un bloque de microdatos como sumas y conteos por grupo
+def _resumir(bloque, claves):
+    agrupado = bloque.groupby(claves)[COLUMNAS_PUNTAJES]
+    sumas = agrupado.sum().astype('float64').add_prefix('SUMA_')  # float64 para no perder precisión al acumular
+    conteos = agrupado.count().add_prefix('N_')
+    return pd.concat([sumas, conteos], axis=1)
+
+
+# Función para combinar resúmenes parciales (de distintos bloques o archivos) sumándolos
+def combinar_parciales(parciales):
+    """
+    Combina resúmenes parciales de sumas y conteos.
+
+    Args:
+        parciales (list): DataFrames indexados por las claves de agrupación con columnas SUMA_* y N_*.
+
+    Returns:
+        pd.DataFrame: Resumen combinado con las mismas columnas.
+    """
+    parciales = [parcial for parcial in parciales if len(parcial)]
+    if not parciales:
+        return pd.DataFrame()
+    return pd.concat(parciales).groupby(level=list(range(parciales[0].index.nlevels))).sum()
+
+
+# Función para agregar un archivo de resultados Saber 11 leyéndolo por bloques
+def agregar_archivo(ruta, departamento=DEPARTAMENTO_ANTIOQUIA, tamano_bloque=500_000, encoding='utf-8'):
+    """
+    Lee un archivo de resultados Saber 11 por bloques y calcula sumas y conteos de los puntajes por periodo y
+    municipio (solo para el departamento indicado) y por periodo para todo el país.
+
+    Args:
+        ruta (str): Ruta del archivo CSV de resultados.
+        departamento (int, optional): Código DANE del departamento a conservar. Defaults to 5 (Antioquia).
+        tamano_bloque (int, optional): Número de filas por bloque. Defaults to 500000.
+        encoding (str, optional): Codificación del archivo. Defaults to 'utf-8'.
+
+    Returns:
+        tuple: (resumen por periodo y municipio, resumen nacional por periodo, filas leídas).
+    """
+    lector = pd.read_csv(
+        ruta,
+        sep=_detectar_separador(ruta, encoding),
+        encoding=encoding,
+        usecols=['PERIODO', 'COLE_COD_MCPIO_UBICACION'] + COLUMNAS_PUNTAJES,
+        dtype={'PERIODO': 'Int32', 'COLE_COD_MCPIO_UBICACION': 'Int32', **{columna: 'float32' for columna in COLUMNAS_PUNTAJES}},
+        chunksize=tamano_bloque,
+    )
+
+    parciales_municipios, parciales_pais, filas = [], [], 0
+    for bloque in lector:
+        filas += len(bloque)
+        bloque = bloque.dropna(subset=['PERIODO'])
+
+        parciales_pais.append(_resumir(bloque, ['PERIODO']))
+
+        bloque = bloque[bloque['COLE_COD_MCPIO_UBICACION'] // 1000 == departamento]
+        parciales_municipios.append(_resumir(bloque, ['PERIODO', 'COLE_COD_MCPIO_UBICACION']))
+
+        # Combinar de inmediato para que la memoria no crezca con el número de bloques
+        parciales_municipios = [combinar_parciales(parciales_municipios)]
+        parciales_pais = [combinar_parciales(parciales_pais)]
+
+    return parciales_municipios[0], parciales_pais[0], filas
+
+
+# Función para agregar varios archivos de resultados en paralelo
+def agregar_archivos(rutas, procesos=None, **kwargs):
+    """
+    Agrega varios archivos de resultados Saber 11 en paralelo (un proceso por archivo) y combina sus resúmenes.
+
+    Args:
+        rutas (list): Rutas de los archivos CSV de resultados.
+        procesos (int, optional): Número de procesos. Defaults to None (uno por núcleo, sin superar el número de archivos).
+        **kwargs: Argumentos adicionales para agregar_archivo.
+
+    Returns:
+        tuple: (resumen por periodo y municipio, resumen nacional por periodo, filas leídas).
+    """
+    procesos = procesos or min(len(rutas), os.cpu_count() or 1)
+
+    if procesos <= 1:
+        resultados = [agregar_archivo(ruta, **kwargs) for ruta in rutas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            futuros = [ejecutor.submit(agregar_archivo, ruta, **kwargs) for ruta in rutas]
+            resultados = [futuro.result() for futuro in futuros]
+
+    municipios = combinar_parciales([resultado[0] for resultado in resultados])
+    pais = combinar_parciales([resultado[1] for resultado in resultados])
+    return municipios, pais, sum(resultado[2] for resultado in resultados)
+
+
+# Función para anexar los resúmenes de periodos nuevos a los ya guardados
+def anexar_parciales(existentes, nuevos):
+    """
+    Anexa resúmenes de sumas y conteos de periodos nuevos a los existentes. Si un periodo aparece en ambos, se
+    conserva el nuevo (volver a ingerir un archivo no duplica sus estudiantes).
+
+    Args:
+        existentes (pd.DataFrame): Resumen guardado, indexado por 'PERIODO' (y municipio), o None.
+        nuevos (pd.DataFrame): Resumen de los archivos recién ingeridos, con el mismo índice.
+
+    Returns:
+        pd.DataFrame: Resumen combinado, ordenado por su índice.
+    """
+    if existentes is None or len(existentes) == 0:
+        return nuevos.sort_index()
+    periodos_nuevos = nuevos.index.get_level_values('PERIODO').unique()
+    conservados = existentes[~existentes.index.get_level_values('PERIODO').isin(periodos_nuevos)]
+    return pd.concat([conservados, nuevos]).sort_index()
+
+
+# Funciones para guardar y cargar los resúmenes en el almacén columnar
+def guardar_parciales(resumen, ruta):
+    guardar_tabla(resumen.reset_index(), ruta)
+
+
+def cargar_parciales(ruta, claves):
+    try:
+        return cargar_tabla(ruta).set_index(claves)
+    except FileNotFoundError:
+        return None
+
+
+# Función para convertir sumas y conteos por periodo en promedios redondeados por año
+def _promedios(resumen, claves):
+    resumen = resumen.reset_index()
+
+    # El periodo tiene la forma AAAAP (p. ej. 20224 = 2022, segundo semestre); los periodos de un año se suman
+    resumen['AÑO'] = resumen['PERIODO'].astype(int) // 10
+    resumen = resumen.groupby(['AÑO'] + claves).sum(numeric_only=True)
+
+    promedios = pd.DataFrame(index=resumen.index)
+    for columna in COLUMNAS_PUNTAJES:
+        promedios[columna] = (resumen[f'SUMA_{columna}'] / resumen[f'N_{columna}']).round().astype('Int64')
+    return promedios.reset_index()
+
+
+# Función para construir las tablas del line chart a partir de los resúmenes de sumas y conteos
+def materializar(resumen_municipios, resumen_pais, catalogo_municipios, df_antioquia_previo=None, df_colombia_previo=None):
+    """
+    Construye las tablas df_antioquia_linechart y df_colombia_linechart a partir de los resúmenes de sumas y conteos.
+
+    Los años de las tablas previas que no tienen resumen (p. ej. años cuyos microdatos no se ingirieron con esta
+    herramienta) se conservan tal como están.
+
+    Args:
+        resumen_municipios (pd.DataFrame): Resumen indexado por ('PERIODO', 'COLE_COD_MCPIO_UBICACION').
+        resumen_pais (pd.DataFrame): Resumen indexado por 'PERIODO'.
+        catalogo_municipios (dict): Código DANE (int) -> nombre del municipio tal como aparece en el GeoJSON.
+        df_antioquia_previo (pd.DataFrame, optional): Tabla df_antioquia_linechart vigente. Defaults to None.
+        df_colombia_previo (pd.DataFrame, optional): Tabla df_colombia_linechart vigente. Defaults to None.
+
+    Returns:
+        tuple: (df_antioquia_linechart, df_colombia_linechart) con las columnas de los CSV del tablero.
+    """
+    df_municipios = _promedios(resumen_municipios, ['COLE_COD_MCPIO_UBICACION'])
+    df_municipios['COLE_MCPIO_UBICACION'] = df_municipios['COLE_COD_MCPIO_UBICACION'].map(catalogo_municipios)
+    df_municipios['COLE_COD_MCPIO_UBICACION'] = df_municipios['COLE_COD_MCPIO_UBICACION'].astype(int).map('{:05d}'.format)
+    df_pais = _promedios(resumen_pais, [])
+
+    # Conservar los años previos que no están en los resúmenes
+    if df_antioquia_previo is not None:
+        previo = df_antioquia_previo[~df_antioquia_previo['AÑO'].isin(df_municipios['AÑO'])].copy()
+        previo['COLE_COD_MCPIO_UBICACION'] = previo['COLE_COD_MCPIO_UBICACION'].astype(int).map('{:05d}'.format)
+        df_municipios = pd.concat([previo, df_municipios], ignore_index=True)
+    if df_colombia_previo is not None:
+        df_pais = pd.concat([df_colombia_previo[~df_colombia_previo['AÑO'].isin(df_pais['AÑO'])], df_pais], ignore_index=True)
+
+    df_municipios = df_municipios.sort_values(['AÑO', 'COLE_COD_MCPIO_UBICACION'], ignore_index=True)
+    df_pais = df_pais.sort_values('AÑO', ignore_index=True)
+
+    return (df_municipios[['AÑO', 'COLE_COD_MCPIO_UBICACION'] + COLUMNAS_PUNTAJES + ['COLE_MCPIO_UBICACION']],
+            df_pais[['AÑO'] + COLUMNAS_PUNTAJES])
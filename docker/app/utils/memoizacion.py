@@ -0,0 +1,290 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from plotly.io.json import to_json_plotly
+
+from utils.validacion import hash_archivos
+
+# ======================================================================================================================
+#                                       MEMOIZACIÓN DE LOS CALLBACKS DE DASH
+# ======================================================================================================================
+# Las salidas de los callbacks son funciones puras de sus entradas (y de los datos y modelos cargados al iniciar), así
+# que se pueden guardar y reutilizar. El decorador @memoizar() se pone debajo de @dash.callback y guarda el resultado
+# de cada combinación de argumentos en uno de dos backends:
+#   - 'memoria': diccionario LRU acotado dentro del proceso (por defecto).
+#   - 'archivos': un archivo por resultado en un directorio compartido, de modo que todos los workers de gunicorn
+#     aprovechan lo que calculó cualquiera de ellos. Las escrituras son atómicas (archivo temporal + os.replace).
+# Ambos guardan los resultados en el JSON que Dash envía al navegador (deserializar un go.Figure con pickle vuelve a
+# validarlo y cuesta casi lo mismo que construirlo) y aceptan un tiempo de vida (TTL) y un número máximo de entradas.
+# También en un fallo se retorna la copia deserializada de ese JSON y no el go.Figure: así la figura se convierte a JSON
+# una sola vez (to_json_plotly) y no otra vez al armar la respuesta.
+# El de memoria se acota además por bytes: una figura del choropleth lleva su propia copia del GeoJSON (~3 MB), así que
+# el límite de entradas por sí solo permitiría que el caché ocupara gigas.
+#
+# La llave de cada resultado incluye una versión calculada con el hash de los datos y modelos de la carpeta datos/: si
+# cambian, las llaves anteriores dejan de usarse y el backend de archivos se vacía en el siguiente arranque.
+#
+# Variables de entorno:
+#   CACHE_CALLBACKS       'memoria', 'archivos' o 'ninguno'. Defaults to 'memoria'.
+#   CACHE_CALLBACKS_DIR   Directorio del backend de archivos. Defaults to '.cache/callbacks'.
+#   CACHE_CALLBACKS_MAX   Número máximo de resultados guardados. Defaults to 1024.
+#   CACHE_CALLBACKS_MB    Megabytes máximos de JSON guardados por proceso en el backend de memoria. Defaults to 256.
+#   CACHE_CALLBACKS_TTL   Segundos de vida de cada resultado (0 = sin vencimiento). Defaults to 0.
+
+# Archivos de los que dependen las salidas de los callbacks (datos y modelos)
+PATRONES_VERSION = ['datos/*.pkl', 'datos/*.csv', 'datos/*.JSON', 'datos/*.topojson', 'datos/almacen/*/*']
+
+
+class BackendMemoria:
+    """
+    Backend LRU acotado dentro del proceso. Guarda cada resultado serializado en JSON y lo limita por número de
+    entradas y por bytes.
+
+    Args:
+        max_entradas (int): Número máximo de resultados guardados.
+        ttl (float, optional): Segundos de vida de cada resultado. Defaults to None (sin vencimiento).
+        max_bytes (int, optional): Bytes máximos de JSON guardados. Defaults to None (sin límite).
+    """
+
+    def __init__(self, max_entradas, ttl=None, max_bytes=None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, llave):
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if entrada is None:
+                return False, None
+            guardado, contenido = entrada
+            if self.ttl and time.time() - guardado > self.ttl:
+                del self._entradas[llave]
+                self.bytes -= len(contenido)
+                return False, None
+            self._entradas.move_to_end(llave)
+        # Cada consulta recibe una copia nueva (fuera del lock: json.loads de una figura grande toma unos milisegundos)
+        return True, json.loads(contenido)
+
+    def guardar(self, llave, valor):
+        contenido = to_json_plotly(valor).encode('utf-8')
+        if self.max_bytes is not None and len(contenido) > self.max_bytes:
+            return json.loads(contenido)
+        with self._lock:
+            anterior = self._entradas.pop(llave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior[1])
+            self._entradas[llave] = (time.time(), contenido)
+            self.bytes += len(contenido)
+            while len(self._entradas) > self.max_entradas or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, (_, eliminado) = self._entradas.popitem(last=False)
+                self.bytes -= len(eliminado)
+        return json.loads(contenido)
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes = 0
+
+
+class BackendArchivos:
+    """
+    Backend en disco compartido entre procesos: un archivo JSON por resultado, con el hash de la llave como nombre.
+
+    Args:
+        directorio (str): Directorio de los resultados.
+        max_entradas (int): Número máximo de resultados guardados (se eliminan los más antiguos).
+        ttl (float, optional): Segundos de vida de cada resultado. Defaults to None (sin vencimiento).
+        version (str, optional): Versión de los datos. Si difiere de la guardada en el directorio, este se vacía.
+    """
+
+    # Cada cuántas escrituras se revisa el número de archivos (listar el directorio en cada escritura sería costoso)
+    INTERVALO_PODA = 32
+
+    def __init__(self, directorio, max_entradas, ttl=None, version=None):
+        self.directorio = directorio
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._escrituras = 0
+        os.makedirs(directorio, exist_ok=True)
+
+        ruta_version = os.path.join(directorio, 'VERSION')
+        try:
+            with open(ruta_version, encoding='utf-8') as archivo:
+                version_guardada = archivo.read().strip()
+        except FileNotFoundError:
+            version_guardada = None
+        if version is not None and version != version_guardada:
+            self.vaciar()
+            self._escribir_atomico(ruta_version, version.encode('utf-8'))
+
+    def _ruta(self, llave):
+        return os.path.join(self.directorio, llave + '.json')
+
+    def _escribir_atomico(self, ruta, contenido):
+        temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporal, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+
+    def obtener(self, llave):
+        ruta = self._ruta(llave)
+        try:
+            if self.ttl and time.time() - os.path.getmtime(ruta) > self.ttl:
+                os.remove(ruta)
+                return False, None
+            with open(ruta, 'rb') as archivo:
+                return True, json.load(archivo)
+        except (FileNotFoundError, ValueError):
+            return False, None
+
+    def guardar(self, llave, valor):
+        contenido = to_json_plotly(valor).encode('utf-8')
+        self._escribir_atomico(self._ruta(llave), contenido)
+        self._escrituras += 1
+        if self._escrituras % self.INTERVALO_PODA == 0:
+            self._podar()
+        return json.loads(contenido)
+
+    def _podar(self):
+        rutas = glob.glob(os.path.join(self.directorio, '*.json'))
+        if len(rutas) <= self.max_entradas:
+            return
+        fechas = {}
+        for ruta in rutas:
+            try:
+                fechas[ruta] = os.path.getmtime(ruta)
+            except FileNotFoundError:  # Otro worker lo eliminó
+                pass
+        for ruta in sorted(fechas, key=fechas.get)[:len(fechas) - self.max_entradas]:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+    def vaciar(self):
+        for ruta in glob.glob(os.path.join(self.directorio, '*.json')):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+#                                          CONFIGURACIÓN Y ESTADÍSTICAS
+# ----------------------------------------------------------------------------------------------------------------------
+_backend = None
+_version = None
+_lock_configuracion = threading.Lock()
+
+# Aciertos y fallos por callback: {nombre: {'aciertos': int, 'fallos': int}}. Con los workers gthread varios hilos los
+# incrementan a la vez (+= no es atómico), así que se actualizan con _lock_estadisticas
+_estadisticas = {}
+_lock_estadisticas = threading.Lock()
+
+
+# Función para calcular la versión de los datos y modelos de los que dependen los callbacks
+def version_datos(patrones=PATRONES_VERSION):
+    rutas = [ruta for patron in patrones for ruta in glob.glob(patron) if os.path.isfile(ruta)]
+    return hash_archivos(rutas)[:16]
+
+
+# Función para obtener el backend configurado (se crea la primera vez que un callback lo necesita)
+def obtener_backend():
+    global _backend, _version
+    if _backend is None:
+        with _lock_configuracion:
+            if _backend is None:
+                tipo = os.environ.get('CACHE_CALLBACKS', 'memoria')
+                max_entradas = int(os.environ.get('CACHE_CALLBACKS_MAX', '1024'))
+                ttl = float(os.environ.get('CACHE_CALLBACKS_TTL', '0')) or None
+                _version = version_datos()
+                if tipo == 'archivos':
+                    _backend = BackendArchivos(os.environ.get('CACHE_CALLBACKS_DIR', '.cache/callbacks'), max_entradas, ttl, _version)
+                elif tipo == 'ninguno':
+                    _backend = False
+                else:
+                    max_bytes = int(float(os.environ.get('CACHE_CALLBACKS_MB', '256')) * 1024 * 1024) or None
+                    _backend = BackendMemoria(max_entradas, ttl, max_bytes)
+    return _backend
+
+
+# Función para reemplazar el backend (p. ej. en benchmarks o para usar uno propio, con los métodos obtener, guardar
+# (que retorna el valor que recibe el callback) y vaciar)
+def configurar(backend, version=None):
+    global _backend, _version
+    with _lock_configuracion:
+        _backend = backend
+        _version = version if version is not None else version_datos()
+
+
+# Función para vaciar todos los resultados guardados (p. ej. después de actualizar datos o modelos sin reiniciar)
+def vaciar_todo():
+    backend = obtener_backend()
+    if backend:
+        backend.vaciar()
+
+
+def estadisticas():
+    """
+    Retorna los aciertos, fallos y tasa de aciertos de cada callback memoizado.
+
+    Returns:
+        dict: {nombre: {'aciertos', 'fallos', 'tasa_aciertos'}}.
+    """
+    with _lock_estadisticas:
+        copia = {nombre: dict(conteo) for nombre, conteo in _estadisticas.items()}
+    resultado = {}
+    for nombre, conteo in copia.items():
+        total = conteo['aciertos'] + conteo['fallos']
+        resultado[nombre] = {**conteo, 'tasa_aciertos': conteo['aciertos'] / total if total else 0.0}
+    return resultado
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+#                                                   DECORADOR
+# ----------------------------------------------------------------------------------------------------------------------
+def memoizar(nombre=None):
+    """
+    Decorador que guarda el resultado de una función pura para cada combinación de argumentos. Se pone debajo de
+    @dash.callback. Las excepciones (p. ej. PreventUpdate) no se guardan.
+
+    Args:
+        nombre (str, optional): Nombre del callback en las estadísticas. Defaults to None (módulo.función).
+
+    Returns:
+        callable: Decorador.
+    """
+    def decorador(funcion):
+        nombre_callback = nombre or f'{funcion.__module__}.{funcion.__name__}'
+        conteo = _estadisticas.setdefault(nombre_callback, {'aciertos': 0, 'fallos': 0})
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            backend = obtener_backend()
+            if not backend:
+                return funcion(*args, **kwargs)
+
+            llave = hashlib.sha256(pickle.dumps((nombre_callback, _version, args, sorted(kwargs.items())),
+                                                protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+            encontrado, valor = backend.obtener(llave)
+            with _lock_estadisticas:
+                conteo['aciertos' if encontrado else 'fallos'] += 1
+            if encontrado:
+                return valor
+
+            # El backend retorna el resultado tal como lo guardó (ya serializado una vez)
+            return backend.guardar(llave, funcion(*args, **kwargs))
+
+        return envoltura
+
+    return decorador
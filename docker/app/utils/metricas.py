@@ -0,0 +1,192 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+# ======================================================================================================================
+#                                   MÉTRICAS DEL TABLERO EN FORMATO DE TEXTO DE PROMETHEUS
+# ======================================================================================================================
+# Registro mínimo de métricas (histogramas e indicadores) expuesto en /metrics con el formato de texto de Prometheus.
+# Registrar una observación cuesta una búsqueda binaria en los límites y dos sumas bajo un lock (~1 µs), así que se
+# puede medir en el camino de cada petición sin afectar la latencia.
+#
+# Las tasas de aciertos de los cachés no se registran en cada consulta: se leen de los contadores que ya llevan los
+# cachés (CacheFiguras, FuentePuntajes y la memoización de callbacks) en el momento en que Prometheus consulta /metrics.
+#
+# Cada worker de gunicorn tiene su propio registro: con varios workers, cada consulta a /metrics refleja el worker que
+# la atendió (la instancia se distingue con la etiqueta que agrega Prometheus).
+
+# Límites de los histogramas de latencia, en segundos (de 1 ms a 10 s)
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metricas = []
+_coleccionistas = []
+
+
+# Función para escapar el valor de una etiqueta (\, " y saltos de línea)
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Función para escribir las etiquetas de una muestra ({nombre="valor",...})
+def _formatear_etiquetas(nombres, valores, extra=()):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    pares += [f'{nombre}="{valor}"' for nombre, valor in extra]
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class Histograma:
+    """
+    Histograma acumulativo con etiquetas.
+
+    Args:
+        nombre (str): Nombre de la métrica. Por ejemplo 'dash_callback_duracion_segundos'.
+        ayuda (str): Descripción de la métrica.
+        etiquetas (tuple, optional): Nombres de las etiquetas. Defaults to ().
+        limites (tuple, optional): Límites superiores de los buckets. Defaults to LIMITES_LATENCIA.
+    """
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.limites = tuple(limites)
+        self._series = {}  # valores de las etiquetas -> [conteos por bucket, suma, total]
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def observar(self, valor, *valores_etiquetas):
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            if serie is None:
+                serie = self._series[valores_etiquetas] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def medir(self, *valores_etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, *valores_etiquetas)
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        with self._lock:
+            series = [(valores, list(conteos), suma, total) for valores, (conteos, suma, total) in self._series.items()]
+        for valores, conteos, suma, total in sorted(series, key=lambda serie: tuple(map(str, serie[0]))):
+            acumulado = 0
+            for limite, conteo in zip(self.limites + (float('inf'),), conteos):
+                acumulado += conteo
+                le = '+Inf' if limite == float('inf') else repr(limite)
+                lineas.append(f'{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, valores, [("le", le)])} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_formatear_etiquetas(self.etiquetas, valores)} {suma}')
+            lineas.append(f'{self.nombre}_count{_formatear_etiquetas(self.etiquetas, valores)} {total}')
+        return lineas
+
+
+class Indicador:
+    """
+    Indicador (gauge) con etiquetas.
+
+    Args:
+        nombre (str): Nombre de la métrica.
+        ayuda (str): Descripción de la métrica.
+        etiquetas (tuple, optional): Nombres de las etiquetas. Defaults to ().
+    """
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        _metricas.append(self)
+
+    def establecer(self, valor, *valores_etiquetas):
+        self._valores[valores_etiquetas] = valor
+
+    @contextmanager
+    def medir(self, *valores_etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.establecer(time.perf_counter() - inicio, *valores_etiquetas)
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} gauge']
+        for valores, valor in sorted(self._valores.items(), key=lambda item: tuple(map(str, item[0]))):
+            lineas.append(f'{self.nombre}{_formatear_etiquetas(self.etiquetas, valores)} {valor}')
+        return lineas
+
+
+# Función para registrar un coleccionista: se llama al exponer las métricas y retorna
+# [(nombre, tipo, ayuda, etiquetas, [(valores de las etiquetas, valor)])]
+def registrar_coleccionista(funcion):
+    _coleccionistas.append(funcion)
+    return funcion
+
+
+# Función para generar el texto de todas las métricas
+def exponer_metricas():
+    lineas = []
+    for metrica in _metricas:
+        lineas += metrica.exponer()
+    for coleccionista in _coleccionistas:
+        for nombre, tipo, ayuda, etiquetas, muestras in coleccionista():
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+            lineas += [f'{nombre}{_formatear_etiquetas(etiquetas, valores)} {valor}' for valores, valor in muestras]
+    return '\n'.join(lineas) + '\n'
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+#                                        MÉTRICAS COMUNES DEL TABLERO
+# ----------------------------------------------------------------------------------------------------------------------
+latencia_callbacks = Histograma('dash_callback_duracion_segundos', "Duración de las peticiones a _dash-update-component por callback.", ['callback'])
+latencia_inferencia = Histograma('modelo_inferencia_duracion_segundos', "Duración de la inferencia de los modelos por área y número de evidencias.", ['area', 'evidencias'])
+construccion_figuras = Histograma('figura_construccion_duracion_segundos', "Tiempo de construcción de figuras de plotly.", ['figura'])
+serializacion_figuras = Histograma('figura_serializacion_duracion_segundos', "Tiempo de serialización de figuras de plotly a JSON.", ['figura'])
+carga_activos = Indicador('activo_carga_duracion_segundos', "Tiempo de carga de los datos y modelos al iniciar.", ['activo'])
+
+
+# Función para registrar el endpoint /metrics y la medición de la latencia de los callbacks en el servidor de Dash
+def registrar_metricas(app, ruta='/metrics'):
+    """
+    Registra /metrics y mide la duración de cada petición a _dash-update-component, etiquetada con el nombre de la
+    función del callback.
+
+    Args:
+        app (dash.Dash): Aplicación de Dash.
+        ruta (str, optional): Ruta del endpoint. Defaults to '/metrics'.
+    """
+    server = app.server
+    nombres_callbacks = {}  # salida del callback -> nombre de la función (se resuelve una vez por salida)
+
+    def nombre_callback(salida):
+        nombre = nombres_callbacks.get(salida)
+        if nombre is None:
+            funcion = app.callback_map.get(salida, {}).get('callback')
+            nombre = nombres_callbacks[salida] = getattr(funcion, '__name__', salida)
+        return nombre
+
+    @server.before_request
+    def iniciar_medicion():
+        if request.path.endswith('/_dash-update-component'):
+            g.inicio_callback = time.perf_counter()
+
+    @server.after_request
+    def terminar_medicion(response):
+        inicio = g.pop('inicio_callback', None)
+        if inicio is not None:
+            cuerpo = request.get_json(silent=True) or {}
+            latencia_callbacks.observar(time.perf_counter() - inicio, nombre_callback(cuerpo.get('output', 'desconocido')))
+        return response
+
+    @server.route(ruta)
+    def metricas():
+        return Response(exponer_metricas(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,123 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from dash.exceptions import PreventUpdate
+
+# ======================================================================================================================
+#                               SECUENCIACIÓN DE PETICIONES Y DESCARTE DE TRABAJO OBSOLETO
+# ======================================================================================================================
+# Quien cambia tres dropdowns seguidos dispara tres inferencias, pero el navegador solo muestra la última. Cada pestaña
+# envía, junto con el formulario, un control {'sesion': id de la pestaña, 'generacion': contador} que se incrementa en
+# el navegador con cada cambio (ver assets/formulario.js). En el servidor:
+#   - Al llegar, la petición anuncia su generación: desde ese momento las anteriores de la misma sesión quedan obsoletas.
+#   - Las peticiones de una misma sesión se atienden de a una (un lock por sesión). La que espera en la cola y al obtener
+#     su turno ya es obsoleta se descarta sin calcular nada.
+#   - Durante el cálculo, verificar() descarta el trabajo que quedó obsoleto entre un paso y otro (p. ej. entre la
+#     inferencia y la construcción de la figura).
+# Descartar es lanzar PreventUpdate: el navegador deja la salida como está y muestra la respuesta de la última petición.
+#
+# El registro es por proceso: con varios workers de gunicorn, el descarte funciona para las peticiones de una sesión que
+# atiende el mismo worker.
+
+# Turno en curso del hilo (secuenciador, estado de la sesión, generación), para verificar() dentro del cálculo
+_turno_actual = contextvars.ContextVar('turno_actual', default=None)
+
+
+class _EstadoSesion:
+    def __init__(self):
+        self.ultima = -1
+        self.lock = threading.Lock()
+
+
+class Secuenciador:
+    """
+    Registro de la última generación de cada sesión con conteo del trabajo descartado.
+
+    Args:
+        max_sesiones (int, optional): Número máximo de sesiones recordadas (se olvidan las más antiguas). Defaults to 10000.
+    """
+
+    def __init__(self, max_sesiones=10000):
+        self.max_sesiones = max_sesiones
+        self._sesiones = OrderedDict()
+        self._lock = threading.Lock()
+        self.solicitudes = 0
+        self.descartadas_cola = 0
+        self.descartadas_curso = 0
+        self.completadas = 0
+        self.segundos_completadas = 0.0
+
+    def _anunciar(self, sesion, generacion):
+        with self._lock:
+            self.solicitudes += 1
+            estado = self._sesiones.get(sesion)
+            if estado is None:
+                estado = self._sesiones[sesion] = _EstadoSesion()
+                while len(self._sesiones) > self.max_sesiones:
+                    self._sesiones.popitem(last=False)
+            self._sesiones.move_to_end(sesion)
+            estado.ultima = max(estado.ultima, generacion)
+            return estado
+
+    @contextmanager
+    def turno(self, control):
+        """
+        Ejecuta el bloque en el turno de la sesión, o lo descarta (PreventUpdate) si la petición ya es obsoleta.
+
+        Args:
+            control (dict): {'sesion': str, 'generacion': int} enviado por el navegador. Si es None (p. ej. un cliente que
+                no lo envía) el bloque se ejecuta sin secuenciación.
+        """
+        if not control or control.get('sesion') is None or control.get('generacion') is None:
+            yield
+            return
+
+        generacion = control['generacion']
+        estado = self._anunciar(control['sesion'], generacion)
+        with estado.lock:
+            if generacion < estado.ultima:
+                with self._lock:
+                    self.descartadas_cola += 1
+                raise PreventUpdate
+
+            token = _turno_actual.set((self, estado, generacion))
+            inicio = time.perf_counter()
+            try:
+                yield
+            finally:
+                _turno_actual.reset(token)
+            with self._lock:
+                self.completadas += 1
+                self.segundos_completadas += time.perf_counter() - inicio
+
+    def estadisticas(self):
+        """
+        Retorna los conteos de peticiones y una estimación del cómputo ahorrado (descartes por duración promedio).
+
+        Returns:
+            dict: {'solicitudes', 'completadas', 'descartadas_cola', 'descartadas_curso', 'segundos_ahorrados'}.
+        """
+        with self._lock:
+            promedio = self.segundos_completadas / self.completadas if self.completadas else 0.0
+            return {
+                'solicitudes': self.solicitudes,
+                'completadas': self.completadas,
+                'descartadas_cola': self.descartadas_cola,
+                'descartadas_curso': self.descartadas_curso,
+                'segundos_ahorrados': (self.descartadas_cola + self.descartadas_curso) * promedio,
+            }
+
+
+# Función para descartar el cálculo en curso si una petición más nueva de la misma sesión ya llegó
+def verificar():
+    turno = _turno_actual.get()
+    if turno is None:
+        return
+    secuenciador, estado, generacion = turno
+    if generacion < estado.ultima:
+        with secuenciador._lock:
+            secuenciador.descartadas_curso += 1
+        raise PreventUpdate
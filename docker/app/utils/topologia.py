@@ -0,0 +1,206 @@
+from itertools import accumulate
+
+# ======================================================================================================================
+#                               CODIFICACIÓN TOPOLÓGICA CUANTIZADA DE LA GEOMETRÍA DEL MAPA
+# ======================================================================================================================
+# El GeoJSON de los municipios repite cada frontera dos veces (una por cada municipio vecino) y escribe las coordenadas
+# como flotantes de 15-17 cifras. La codificación TopoJSON elimina ambas redundancias:
+#   1. Cuantización: las coordenadas se llevan a una grilla entera (transform.scale / transform.translate).
+#   2. Arcos compartidos: las fronteras comunes se guardan una sola vez y cada anillo las referencia por índice
+#      (un índice negativo ~i indica que el arco i se recorre en sentido contrario).
+#   3. Codificación delta: cada arco guarda su primer punto y luego solo los desplazamientos entre puntos.
+# El resultado es TopoJSON estándar, por lo que también puede decodificarse en el navegador con topojson-client.
+# Cada departamento se guarda como un objeto independiente dentro de la misma topología, de modo que las fronteras
+# entre departamentos también se comparten al agregar nuevos.
+
+
+# Función para extraer los polígonos (lista de anillos) de una geometría GeoJSON
+def _poligonos(geometria):
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates']]
+    elif geometria['type'] == 'MultiPolygon':
+        return geometria['coordinates']
+    raise ValueError(f"Tipo de geometría no soportado: {geometria['type']}")
+
+
+# Función para cuantizar un anillo y eliminar los puntos consecutivos repetidos tras la cuantización
+def _cuantizar_anillo(anillo, x0, y0, kx, ky):
+    puntos = []
+    for x, y in anillo:
+        punto = (round((x - x0) / kx), round((y - y0) / ky))
+        if not puntos or punto != puntos[-1]:
+            puntos.append(punto)
+
+    # Garantizar que el anillo quede cerrado
+    if puntos[0] != puntos[-1]:
+        puntos.append(puntos[0])
+    return puntos
+
+
+# Función para normalizar un arco cerrado (anillo sin fronteras compartidas) rotándolo para que empiece en su punto mínimo
+def _rotar_al_minimo(puntos):
+    abiertos = puntos[:-1]
+    inicio = abiertos.index(min(abiertos))
+    rotados = abiertos[inicio:] + abiertos[:inicio]
+    return rotados + [rotados[0]]
+
+
+# Función para codificar un conjunto de FeatureCollections como una topología cuantizada
+def codificar_topologia(objetos, cuantizacion=100000):
+    """
+    Codifica uno o varios FeatureCollection de polígonos como una topología TopoJSON con arcos compartidos,
+    coordenadas cuantizadas y codificación delta.
+
+    Args:
+        objetos (dict): Diccionario {nombre del objeto: FeatureCollection}. Por ejemplo {'antioquia': geo_json}.
+        cuantizacion (int, optional): Tamaño de la grilla de cuantización por eje. Defaults to 100000.
+
+    Returns:
+        dict: Topología en formato TopoJSON.
+    """
+
+    # Caja envolvente de todas las coordenadas
+    xs, ys = [], []
+    for coleccion in objetos.values():
+        for feature in coleccion['features']:
+            for poligono in _poligonos(feature['geometry']):
+                for anillo in poligono:
+                    for x, y in anillo:
+                        xs.append(x)
+                        ys.append(y)
+    x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+    kx = (x1 - x0) / (cuantizacion - 1) or 1
+    ky = (y1 - y0) / (cuantizacion - 1) or 1
+
+    # Cuantizar todos los anillos, conservando a qué geometría y polígono pertenece cada uno
+    anillos = []
+    estructura = {}
+    for nombre, coleccion in objetos.items():
+        estructura[nombre] = []
+        for feature in coleccion['features']:
+            poligonos = []
+            for poligono in _poligonos(feature['geometry']):
+                indices = []
+                for anillo in poligono:
+                    indices.append(len(anillos))
+                    anillos.append(_cuantizar_anillo(anillo, x0, y0, kx, ky))
+                poligonos.append(indices)
+            estructura[nombre].append((feature, poligonos))
+
+    # Registrar qué anillos contienen cada segmento (sin importar el sentido en que se recorre)
+    duenos_segmento = {}
+    for i, puntos in enumerate(anillos):
+        for a, b in zip(puntos, puntos[1:]):
+            duenos_segmento.setdefault((a, b) if a < b else (b, a), set()).add(i)
+
+    # Partir cada anillo en arcos: un arco es una secuencia maximal de segmentos con el mismo conjunto de dueños
+    arcos = []
+    indice_arcos = {}
+
+    def registrar_arco(puntos):
+        clave = tuple(puntos)
+        if clave in indice_arcos:
+            return indice_arcos[clave]
+        clave_inversa = tuple(reversed(puntos))
+        if clave_inversa in indice_arcos:
+            return ~indice_arcos[clave_inversa]
+        indice_arcos[clave] = len(arcos)
+        arcos.append(puntos)
+        return indice_arcos[clave]
+
+    arcos_por_anillo = []
+    for i, puntos in enumerate(anillos):
+        firmas = [frozenset(duenos_segmento[(a, b) if a < b else (b, a)]) for a, b in zip(puntos, puntos[1:])]
+        cortes = [j for j in range(len(firmas)) if firmas[j] != firmas[j - 1]]
+
+        if not cortes:
+            # Anillo cerrado sin cambios de vecino: se normaliza en ambos sentidos para poder compartirlo
+            directo = _rotar_al_minimo(puntos)
+            inverso = _rotar_al_minimo(list(reversed(puntos)))
+            clave_inversa = tuple(inverso)
+            if tuple(directo) not in indice_arcos and clave_inversa in indice_arcos:
+                arcos_por_anillo.append([~indice_arcos[clave_inversa]])
+            else:
+                arcos_por_anillo.append([registrar_arco(directo)])
+            continue
+
+        # Rotar el anillo para que empiece en el primer corte y recorrer los tramos entre cortes consecutivos
+        abiertos = puntos[:-1]
+        rotados = abiertos[cortes[0]:] + abiertos[:cortes[0]] + [abiertos[cortes[0]]]
+        posiciones = [c - cortes[0] for c in cortes] + [len(abiertos)]
+        arcos_por_anillo.append([registrar_arco(rotados[inicio:fin + 1])
+                                 for inicio, fin in zip(posiciones, posiciones[1:])])
+
+    # Construir los objetos de la topología
+    objetos_topologia = {}
+    for nombre, geometrias in estructura.items():
+        lista = []
+        for feature, poligonos in geometrias:
+            arcos_poligonos = [[arcos_por_anillo[i] for i in indices] for indices in poligonos]
+            if feature['geometry']['type'] == 'Polygon':
+                geometria = {'type': 'Polygon', 'arcs': arcos_poligonos[0]}
+            else:
+                geometria = {'type': 'MultiPolygon', 'arcs': arcos_poligonos}
+            geometria['properties'] = feature.get('properties', {})
+            lista.append(geometria)
+        objetos_topologia[nombre] = {'type': 'GeometryCollection', 'geometries': lista}
+
+    # Codificación delta de los arcos
+    arcos_delta = []
+    for puntos in arcos:
+        delta = [list(puntos[0])]
+        for (xa, ya), (xb, yb) in zip(puntos, puntos[1:]):
+            delta.append([xb - xa, yb - ya])
+        arcos_delta.append(delta)
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [kx, ky], 'translate': [x0, y0]},
+        'objects': objetos_topologia,
+        'arcs': arcos_delta,
+    }
+
+
+# Función para decodificar un objeto de una topología cuantizada a GeoJSON
+def decodificar_topologia(topologia, nombre_objeto, decimales=6):
+    """
+    Decodifica un objeto de una topología TopoJSON a un FeatureCollection de GeoJSON.
+
+    Args:
+        topologia (dict): Topología en formato TopoJSON (ver codificar_topologia).
+        nombre_objeto (str): Nombre del objeto a decodificar. Por ejemplo 'antioquia'.
+        decimales (int, optional): Decimales con los que se redondean las coordenadas. Defaults to 6.
+
+    Returns:
+        dict: FeatureCollection de GeoJSON.
+    """
+    (kx, ky), (x0, y0) = topologia['transform']['scale'], topologia['transform']['translate']
+
+    # Deshacer la codificación delta y la cuantización de todos los arcos
+    arcos = []
+    for arco in topologia['arcs']:
+        xs = accumulate(punto[0] for punto in arco)
+        ys = accumulate(punto[1] for punto in arco)
+        arcos.append([[round(x * kx + x0, decimales), round(y * ky + y0, decimales)] for x, y in zip(xs, ys)])
+
+    # Unir los arcos de cada anillo; los arcos contiguos comparten su punto extremo
+    def anillo(indices):
+        coordenadas = []
+        for indice in indices:
+            puntos = arcos[indice] if indice >= 0 else arcos[~indice][::-1]
+            coordenadas.extend(puntos[1:] if coordenadas else puntos)
+        return coordenadas
+
+    features = []
+    for geometria in topologia['objects'][nombre_objeto]['geometries']:
+        if geometria['type'] == 'Polygon':
+            coordenadas = [anillo(indices) for indices in geometria['arcs']]
+        else:
+            coordenadas = [[anillo(indices) for indices in poligono] for poligono in geometria['arcs']]
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': geometria['type'], 'coordinates': coordenadas},
+            'properties': geometria.get('properties', {}),
+        })
+
+    return {'type': 'FeatureCollection', 'features': features}
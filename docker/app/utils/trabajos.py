@@ -0,0 +1,53 @@
+import os
+
+try:
+    import diskcache
+    import multiprocess  # noqa: F401  (lo requiere DiskcacheManager para ejecutar los trabajos)
+    import psutil  # noqa: F401
+    from dash import DiskcacheManager
+except ImportError:  # Sin diskcache no hay callbacks en segundo plano
+    diskcache = None
+
+from utils.memoizacion import version_datos
+
+# ======================================================================================================================
+#                                   GESTOR DE LOS CALLBACKS EN SEGUNDO PLANO (BACKGROUND)
+# ======================================================================================================================
+# Los trabajos largos (p. ej. el barrido de evidencias de la página de inicio, que hace una inferencia por cada valor de
+# una variable y cada área) no deben ocupar un hilo del servidor web. Dash los ejecuta en un proceso aparte con el
+# DiskcacheManager, y el navegador consulta su progreso y su resultado cada cierto intervalo. El caché en disco es
+# compartido por todos los workers de gunicorn, así que la consulta puede llegar a cualquiera.
+#
+# Los resultados se guardan con una llave que combina el código del callback, sus argumentos y la versión de los datos y
+# modelos (ver utils/memoizacion.py): repetir una consulta devuelve el resultado guardado en la primera consulta de
+# progreso, sin volver a calcular. La versión se calcula una sola vez al iniciar, porque Dash la pide en cada petición.
+#
+# Variables de entorno:
+#   TRABAJOS_DIR          Directorio del caché de los trabajos. Defaults to '.cache/trabajos'.
+#   TRABAJOS_EXPIRACION   Segundos sin uso tras los cuales se elimina un resultado. Defaults to 86400.
+
+
+# Función para crear el gestor de trabajos en segundo plano
+def crear_gestor_trabajos(directorio=None, expiracion=None):
+    """
+    Crea el DiskcacheManager de los callbacks en segundo plano.
+
+    Args:
+        directorio (str, optional): Directorio del caché. Defaults to None (TRABAJOS_DIR o '.cache/trabajos').
+        expiracion (float, optional): Segundos sin uso antes de eliminar un resultado. Defaults to None
+            (TRABAJOS_EXPIRACION o 86400).
+
+    Returns:
+        DiskcacheManager: Gestor de trabajos, o None si diskcache, multiprocess o psutil no están instalados.
+    """
+    if diskcache is None:
+        print("diskcache no está instalado. Los callbacks en segundo plano quedan deshabilitados.")
+        return None
+
+    directorio = directorio or os.environ.get('TRABAJOS_DIR', '.cache/trabajos')
+    expiracion = expiracion or float(os.environ.get('TRABAJOS_EXPIRACION', '86400'))
+    version = version_datos()
+    return DiskcacheManager(diskcache.Cache(directorio), cache_by=[lambda: version], expire=expiracion)
+
+
+gestor_trabajos = crear_gestor_trabajos()
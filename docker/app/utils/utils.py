@@ -1,6 +1,7 @@
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
+import numpy as np
 
 # ======================================================================================================================
 #                                       FUNCIONES AUXILIARES PARA home.py
@@ -32,6 +33,10 @@ def create_dd(id, label, options, placeholder, width=12, optionHeight=35):
         ),
     ], width=width)
 
+# Función que retorna el número de niveles de desempeño de un área (5 en inglés y en el global, 4 en las demás)
+def numero_niveles(area_conocimiento):
+    return 5 if area_conocimiento == 'ingles' or area_conocimiento == 'global' else 4
+
 # Función para crear un gráfico de bloques
 def create_predicted_performance_chart(selected_blocks, area_conocimiento):
     """
@@ -46,7 +51,7 @@ def create_predicted_performance_chart(selected_blocks, area_conocimiento):
     """
 
     # Determina el total de bloques según el área de conocimiento (por ejemplo, 4 bloques para áreas distintas a inglés, 5 para inglés)
-    total_blocks = 5 if area_conocimiento == 'ingles' or area_conocimiento == 'global' else 4
+    total_blocks = numero_niveles(area_conocimiento)
 
     # Define colores según el nivel de desempeño predicho
     colors = ['blue' if i < selected_blocks else 'lightgrey' for i in range(total_blocks)]
@@ -105,115 +110,43 @@ def create_predicted_performance_chart(selected_blocks, area_conocimiento):
     return fig
 
 
-# ======================================================================================================================
-#                                       FUNCIONES AUXILIARES PARA visualizations.py
-# ======================================================================================================================
-
-# Función que retorna interpretación del desempeño por área del conocimiento y por nivel de desempeño
-def interpretar_desempenho(area_conocimiento, nivel_desempenho):
+# Función para crear el gráfico del barrido de evidencias
+def create_barrido_chart(variable, etiquetas_valores, niveles_esperados):
     """
-    Retorna la interpretación del desempeño de un estudiante en la prueba Saber para un área específica del conocimiento.
+    Crea un gráfico con el nivel de desempeño esperado de cada área para cada valor de una variable del formulario.
 
     Args:
-        area_conocimiento (str): Área del conocimiento para la cual se está realizando la predicción.
-        nivel_desempenho (int): Nivel de desempeño predicho.
+        variable (str): Nombre de la variable barrida (título del eje x).
+        etiquetas_valores (list): Etiquetas de los valores de la variable.
+        niveles_esperados (dict): Nombre del área -> lista con el nivel esperado para cada valor.
 
     Returns:
-        str: Interpretación del desempeño.
+        go.Figure: Gráfico de líneas con una serie por área.
     """
+    fig = go.Figure()
+    for area, niveles in niveles_esperados.items():
+        fig.add_trace(go.Scatter(
+            x=etiquetas_valores,
+            y=niveles,
+            mode='lines+markers',
+            name=area,
+            hovertemplate="%{x}: nivel esperado %{y:.2f}<extra>" + area + "</extra>",
+        ))
 
-    # Definir el texto de interpretación según el área del conocimiento
-    if area_conocimiento == 'matematicas':
-
-        # Definir el texto de interpretación según el nivel de desempeño
-        if nivel_desempenho == 1:
-            return "##### ✍🏽 Puntaje: 0 a 35 \n - El estudiante que se ubica en este nivel probablemente puede leer información puntual (un dato, por ejemplo) relacionada con situaciones cotidianas y presentada en tablas o gráficas con escala explícita, cuadrícula o, por lo menos, líneas horizontales."
-        elif nivel_desempenho == 2:
-            return "##### ✍🏽 Puntaje: 36 a 50 \n - Además de lo descrito en el nivel 1, el estudiante que se ubica en este nivel es capaz de comparar y establecer relaciones entre los datos presentados, e identificar y extraer información local y global de manera directa. Lo anterior en contextos familiares o personales que involucran gráficas con escala explícita, cuadrícula o, por lo menos, líneas horizontales u otros formatos con poca información."
-        elif nivel_desempenho == 3:
-            return "##### ✍🏽 Puntaje: 51 a 70 \n - Además de lo descrito en los niveles 1 y 2, el estudiante que se ubica en este nivel selecciona información, señala errores y hace distintos tipos de transformaciones y manipulaciones aritméticas y algebraicas sencillas; esto para enfrentarse a problemas que involucran el uso de conceptos de proporcionalidad, factores de conversión, áreas y desarrollos planos, en contextos laborales u ocupacionales, matemáticos o científicos, y comunitarios o sociales."
-        elif nivel_desempenho == 4:
-            return "##### ✍🏽 Puntaje: 71 a 100 \n - Además de lo descrito en los niveles 1, 2 y 3, el estudiante que se ubica en este nivel resuelve problemas y justifica la veracidad o falsedad de afirmaciones que requieren el uso de conceptos de probabilidad, propiedades algebraicas, relaciones trigonométricas y características de funciones reales. Lo anterior, en contextos principalmente matemáticos o científicos abstractos."
-        else:
-            return "Selecciona un nivel de desempeño para ver la interpretación."
-
-    elif area_conocimiento == 'ciencias_naturales':
-
-        # Definir el texto de interpretación según el nivel de desempeño
-        if nivel_desempenho == 1:
-            return "##### ✍🏽 Puntaje: 0 a 40 \n - El estudiante que se ubica en este nivel muy posiblemente alcanza a reconocer información explícita, presentada de manera ordenada en tablas o gráficas, con un lenguaje cotidiano y que implica la lectura de una sola variable independiente. Por lo tanto, estos estudiantes demuestran un insuficiente desarrollo de la competencia *Indagación* definida en el marco teórico de la prueba."
-        elif nivel_desempenho == 2:
-            return "##### ✍🏽 Puntaje: 41 a 55 \n - Además de lo descrito en el nivel 1, el estudiante que se ubica en este nivel reconoce información suministrada en tablas, gráficas y esquemas de una sola variable independiente, y la asocia con nociones de los conceptos básicos de las ciencias naturales (*tiempo, posición, velocidad, imantación y filtración*)."
-        elif nivel_desempenho == 3:
-            return "##### ✍🏽 Puntaje: 56 a 70 \n - Además de lo descrito en los niveles 1 y 2, el estudiante que se ubica en este nivel interrelaciona conceptos, leyes y teorías científicas con información presentada en diversos contextos, en los que intervienen dos o más variables, para hacer inferencias sobre una situación problema o un fenómeno natural."
-        elif nivel_desempenho == 4:
-            return "##### ✍🏽 Puntaje: 71 a 100 \n - Además de lo descrito en los niveles 1, 2 y 3, el estudiante que se ubica en este nivel usa conceptos, teorías o leyes en la solución de situaciones problema que involucran procedimientos, habilidades, conocimientos y un lenguaje propio de las ciencias naturales."
-        else:
-            return "Selecciona un nivel de desempeño para ver la interpretación."    
-
-
-    elif area_conocimiento == 'ciencias_sociales':
-
-        # Definir el texto de interpretación según el nivel de desempeño
-        if nivel_desempenho == 1:
-            return "##### ✍🏽 Puntaje: 0 a 40 \n - El estudiante que se ubica en este nivel podría reconocer algunos derechos ciudadanos en situaciones sencillas. Adicionalmente, podría reconocer factores que generan un conflicto e identificar creencias que explican algunos comportamientos."
-        elif nivel_desempenho == 2:
-            return "##### ✍🏽 Puntaje: 41 a 55 \n - Además de lo descrito en el nivel anterior, el estudiante que se ubica en este nivel reconoce deberes del Estado colombiano y situaciones de protección o vulneración de derechos en el marco del Estado social de derecho; identifica relaciones entre conductas de las personas y sus cosmovisiones; y reconoce las dimensiones presentes en una situación, problema, decisión tomada o propuesta de solución. Además, contextualiza fuentes y procesos sociales."
-        elif nivel_desempenho == 3:
-            return "##### ✍🏽 Puntaje: 56 a 70 \n - Además de lo descrito en los niveles anteriores, el estudiante que se ubica en este nivel identifica prejuicios o intenciones contenidos en una afirmación y reconoce las dimensiones e intereses involucrados en un problema o alternativa de solución. Asimismo, identifica algunos conceptos básicos de las ciencias sociales y modelos conceptuales, y valora y contextualiza la información presentada en una fuente."
-        elif nivel_desempenho == 4:
-            return "##### ✍🏽 Puntaje: 71 a 100 \n - Además de lo descrito en los niveles anteriores, el estudiante que se ubica en este nivel conoce algunas disposiciones de la Constitución Política de Colombia que posibilitan la participación ciudadana y el control a los poderes públicos; analiza y compara enunciados, intereses y argumentos; y evalúa alternativas de solución a un problema. \n Este estudiante analiza situaciones a partir de conceptos básicos de las ciencias sociales o de contextos históricos y/o geográficos. A su vez, relaciona fuentes y políticas con modelos conceptuales, y valora los contenidos de una fuente."
-        else:
-            return "Selecciona un nivel de desempeño para ver la interpretación." 
-        
-    elif area_conocimiento == 'lectura_critica':
-
-        # Definir el texto de interpretación según el nivel de desempeño
-        if nivel_desempenho == 1:
-            return "##### ✍🏽 Puntaje: 0 a 35 \n - El estudiante que se ubica en este nivel probablemente identifica elementos literales en textos continuos y discontinuos sin establecer relaciones de significado."
-        elif nivel_desempenho == 2:
-            return "##### ✍🏽 Puntaje: 36 a 50 \n - Además de lo que logra hacer en el nivel 1, el estudiante que se ubica en este nivel comprende textos continuos y discontinuos de manera literal. Asimismo, reconoce información explícita y la relaciona con el contexto."
-        elif nivel_desempenho == 3:
-            return "##### ✍🏽 Puntaje: 51 a 65 \n - Además de lo descrito en los niveles 1 y 2, el estudiante que se ubica en este nivel interpreta información de textos al inferir contenidos implícitos y reconocer estructuras, estrategias discursivas y juicios valorativos."
-        elif nivel_desempenho == 4:
-            return "##### ✍🏽 Puntaje: 66 a 100 \n - Además de lo descrito en los niveles 1, 2 y 3, el estudiante que se ubica en este nivel reflexiona a partir de un texto sobre la visión de mundo del autor (costumbres, creencias, juicios, carácter ideológico-político y posturas éticas, entre otros). Asimismo, da cuenta de elementos paratextuales significativos presentes en el texto. Finalmente, valora y contrasta los elementos mencionados."
-        else:
-            return "Selecciona un nivel de desempeño para ver la interpretación." 
-
-
-    elif area_conocimiento == 'ingles':
-
-        # Definir el texto de interpretación según el nivel de desempeño
-        if nivel_desempenho == 1:
-            return "##### ✍🏽 Puntaje: 0 a 47 \n - El estudiante promedio clasificado en este nivel probablemente puede comprender algunas oraciones simples como preguntas o instrucciones, y utilizar vocabulario básico para nombrar personas u objetos que le son familiares."
-        elif nivel_desempenho == 2:
-            return "##### ✍🏽 Puntaje: 48 a 57 \n - Además de lo descrito en el nivel A-, el estudiante que se clasifica en este nivel puede comprender situaciones comunicativas sencillas y concretas en las que se haga uso de expresiones básicas para proporcionar información personal, y fórmulas de saludo, despedida, indicaciones de lugares, etc."
-        elif nivel_desempenho == 3:
-            return "##### ✍🏽 Puntaje: 58 a 67 \n - Además de lo descrito en los niveles A- y A1, el estudiante que se clasifica en este nivel puede comprender información específica en textos sencillos cotidianos, además de comunicarse mediante el uso de expresiones de uso diario para realizar y responder invitaciones, sugerencias, disculpas, etc."
-        elif nivel_desempenho == 4:
-            return "##### ✍🏽 Puntaje: 68 a 78 \n - Además de lo descrito en los niveles A-, A1y A2, el estudiante que se clasifica en este nivel posee un amplio vocabulario para comprender textos de temáticas específicas que son de su interés personal. De igual manera, el estudiante en este nivel logra comunicarse con cierta seguridad en asuntos que le son poco habituales, y puede expresar y comprender diversas opiniones y actitudes."
-        elif nivel_desempenho == 5:
-            return "##### ✍🏽 Puntaje: 79 a 100 \n - El estudiante promedio clasificado en este nivel supera las preguntas de mayor complejidad de la prueba. Este estudiante, además de lo descrito en los niveles A-, A1, A2 y B1, probablemente puede comprender textos y discursos sobre temáticas abstractas, gracias a que posee un amplio vocabulario de lectura. Asimismo, el estudiante probablemente puede comunicarse en diferentes contextos generales o académicos de manera espontánea."
-        else:
-            return "Selecciona un nivel de desempeño para ver la interpretación."
-        
-    elif area_conocimiento == 'global':
-
-        # Definir el texto de interpretación según el nivel de desempeño
-        if nivel_desempenho == 1:
-            return "##### ✍🏽 Puntaje: 0 a 100"
-        elif nivel_desempenho == 2:
-            return "##### ✍🏽 Puntaje: 101 a 200"
-        elif nivel_desempenho == 3:
-            return "##### ✍🏽 Puntaje: 201 a 300"
-        elif nivel_desempenho == 4:
-            return "##### ✍🏽 Puntaje: 301 a 400"
-        elif nivel_desempenho == 5:
-            return "##### ✍🏽 Puntaje: 401 a 500"
-        
-    else:
-        return "Selecciona un área del conocimiento para ver la interpretación de los niveles de desempeño."
-    
+    fig.update_layout(
+        xaxis_title=variable,
+        yaxis_title="Nivel de desempeño esperado",
+        margin=dict(t=10, b=0, l=0, r=0),
+        legend=dict(orientation='h', y=-0.3),
+        height=320,
+    )
+
+    return fig
+
+
+# ======================================================================================================================
+#                                       FUNCIONES AUXILIARES PARA visualizations.py
+# ======================================================================================================================
 
 # Función para crear el contenido del offcanvas que muestra la información de las subregiones de antioquia. Retorna html.Div
 # Valle de Aburrá, Oriente, Occidente, Suroeste, Nordeste, Norte, Urabá, Bajo Cauca, Magdalena Medio
@@ -521,3 +454,131 @@ def create_offcanvas_content(subregion):
         ])
 
             
+
+
+# Función para crear la tabla de promedios de una subregión y de Antioquia que se muestra en el offcanvas
+def create_tabla_promedios(subregion, anio, filas):
+    """
+    Crea la tabla con los promedios de cada puntaje en una subregión y en Antioquia.
+
+    Args:
+        subregion (str): Nombre de la subregión.
+        anio (int): Año de los promedios.
+        filas (list): Tuplas (nombre del puntaje, promedio de la subregión, promedio de Antioquia).
+
+    Returns:
+        html.Div: Título y tabla de promedios.
+    """
+    def formato(valor):
+        return '—' if np.isnan(valor) else f'{valor:.1f}'
+
+    return html.Div([
+        html.H6([html.I(className="fa fa-chart-simple"), f'\t Promedios {anio}'], style={'padding-top': '5px'}),
+        dbc.Table(
+            [html.Thead(html.Tr([html.Th('Puntaje'), html.Th(subregion), html.Th('Antioquia')]))] +
+            [html.Tbody([html.Tr([html.Td(nombre), html.Td(formato(valor_subregion)), html.Td(formato(valor_departamento))])
+                         for nombre, valor_subregion, valor_departamento in filas])],
+            bordered=False, hover=True, size='sm', style={'font-size': '13px'},
+        ),
+    ])
+
+
+# Función para crear el diagrama de línea con los puntajes históricos de un municipio comparados con los de Colombia
+def create_line_chart(anios, puntajes_municipio, puntajes_colombia, municipio, variable='PUNT_GLOBAL'):
+    """
+    Crea el diagrama de línea con el promedio histórico de un puntaje para un municipio y para Colombia.
+
+    Args:
+        anios (array-like): Años del eje x.
+        puntajes_municipio (array-like): Puntajes del municipio en cada año (NaN si no hay dato).
+        puntajes_colombia (array-like): Puntajes de Colombia en cada año (NaN si no hay dato).
+        municipio (str): Nombre del municipio.
+        variable (str, optional): Puntaje graficado. Defaults to 'PUNT_GLOBAL'.
+
+    Returns:
+        go.Figure: Diagrama de línea con los puntajes por año.
+    """
+    anios = np.asarray(anios)
+
+    # Series a graficar: (nombre, años, puntajes, color, símbolo del marcador). Los años sin dato se omiten
+    series = []
+    for nombre, puntajes, color, simbolo in [(municipio, puntajes_municipio, 'blue', 'circle'),
+                                             ('COLOMBIA', puntajes_colombia, 'grey', 'square')]:
+        puntajes = np.asarray(puntajes, dtype=float)
+        con_dato = ~np.isnan(puntajes)
+        series.append((nombre, anios[con_dato].tolist(), puntajes[con_dato].tolist(), color, simbolo))
+
+    # Trazas de línea con marcadores, una por serie
+    traces = [
+        go.Scatter(x=x, y=y, mode='lines+markers', name=nombre, line=dict(color=color, width=2), marker=dict(color=color, size=8, symbol=simbolo))
+        for nombre, x, y, color, simbolo in series
+    ]
+
+    # Puntajes de todas las series como una sola traza de texto (en lugar de una anotación por punto)
+    y_puntajes = np.concatenate([y for _, _, y, _, _ in series]).astype(float)
+    traces.append(go.Scatter(
+        x=np.concatenate([x for _, x, _, _, _ in series]).tolist(),
+        y=(y_puntajes + 3).tolist(),
+        text=np.char.mod('%.0f', y_puntajes).tolist(),
+        mode='text',
+        textposition='middle center',
+        textfont=dict(family='Arial', size=10, color='black'),
+        hoverinfo='skip',
+        showlegend=False,
+        cliponaxis=False,
+    ))
+
+    # Nombres de las series a la izquierda del primer punto con dato de cada línea, también como una sola traza de texto
+    traces.append(go.Scatter(
+        x=[x[0] if len(x) else None for _, x, _, _, _ in series],
+        y=[y[0] if len(y) else None for _, _, y, _, _ in series],
+        text=[nombre + ' ' for nombre, _, _, _, _ in series],
+        mode='text',
+        textposition='middle left',
+        textfont=dict(family='Arial', size=12, color=[color for _, _, _, color, _ in series]),
+        hoverinfo='skip',
+        showlegend=False,
+        cliponaxis=False,
+    ))
+
+    # Configurar el diseño en una sola operación (update_layout repetido es lo más costoso de construir la figura)
+    layout = dict(
+        # title='Promedio de ' + variable + ' en ' + municipio,
+        xaxis_title='Año',
+        xaxis=dict(
+            showline=True,
+            showgrid=False,
+            showticklabels=True,
+            linecolor='rgb(204, 204, 204)',
+            linewidth=2,
+            ticks='outside',
+        ),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            showline=False,
+            showticklabels=False,
+        ),
+        autosize=True,
+        plot_bgcolor='white',
+        showlegend=False,
+        hovermode="x unified",
+        margin=dict(t=10, l=30, r=30),
+        height=300,
+        # Variable graficada (la usa el gráfico de comparación en el navegador, ver assets/comparacion.js)
+        meta=dict(variable=variable),
+        # Anotación de la fuente
+        annotations=[
+            dict(
+                xref='paper', yref='paper', x=0.5, y=-0.27,
+                xanchor='center', yanchor='top',
+                text='Fuente: ICFES (2023). DataIcfes. Saber 11. <a href="https://www.icfes.gov.co/web/guest/data-icfes" target="_blank">[Enlace]</a>',
+                font=dict(family='Arial', size=12, color='rgb(150,150,150)'),
+                showarrow=False
+            )
+        ],
+    )
+
+    fig = go.Figure(data=traces, layout=layout)
+
+    return fig
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# ======================================================================================================================
+#                                   VALIDACIÓN DE LOS DATOS DEL TABLERO AL CARGARLOS
+# ======================================================================================================================
+# Un nombre de municipio que no coincide entre las tablas y la geometría hace que el mapa pierda polígonos sin ningún
+# error. Antes de construir las estructuras de la página se revisan, con operaciones vectorizadas (pandas/NumPy y no
+# ciclos por fila), los cruces de llaves, la cobertura de años, los rangos de los puntajes y las llaves duplicadas.
+#   - Errores (la aplicación no arranca y se muestra el reporte completo): llaves duplicadas, nombres de municipio que
+#     no cruzan entre tablas y geometría, códigos DANE distintos y puntajes fuera de rango.
+#   - Advertencias (se imprimen y la aplicación arranca): años sin dato de un municipio o de Colombia y puntajes vacíos.
+#     Son huecos que el tablero soporta: se conservan como NaN en el cubo de puntajes y en el line chart.
+#
+# Cuando los datos pasan la validación se escribe un marcador cuyo nombre es el hash de los archivos de origen y de la
+# versión de las reglas; en los siguientes arranques, si no cambiaron, la validación se omite y solo se repiten las
+# advertencias guardadas en el marcador.
+
+DIRECTORIO_MARCADORES = '.cache/validacion'
+
+# Versión de las reglas de validación: se debe subir al cambiarlas, para que los marcadores anteriores dejen de valer
+VERSION_REGLAS = 2
+
+# Rango válido de cada puntaje (los puntajes por área van de 0 a 100 y el global de 0 a 500)
+RANGOS_PUNTAJES = {
+    'PUNT_LECTURA_CRITICA': (0, 100),
+    'PUNT_MATEMATICAS': (0, 100),
+    'PUNT_C_NATURALES': (0, 100),
+    'PUNT_SOCIALES_CIUDADANAS': (0, 100),
+    'PUNT_INGLES': (0, 100),
+    'PUNT_GLOBAL': (0, 500),
+}
+
+
+# Función para resumir en el reporte una lista de valores problemáticos (sin imprimir miles de filas)
+def _muestra(valores, maximo=10):
+    valores = sorted({str(valor) for valor in valores})
+    texto = ', '.join(valores[:maximo])
+    return texto + (f' ... (+{len(valores) - maximo})' if len(valores) > maximo else '')
+
+
+# Funciones de revisión: cada una retorna una lista de problemas (vacía si todo está bien). _revisar_rangos y
+# _revisar_cobertura retornan además las advertencias
+def _revisar_duplicados(df, llaves, nombre):
+    duplicadas = df.duplicated(subset=llaves, keep=False).to_numpy()
+    if not duplicadas.any():
+        return []
+    filas = df.loc[duplicadas, llaves].astype(str).agg(' / '.join, axis=1)
+    return [f"{nombre}: {duplicadas.sum()} filas con llave ({', '.join(llaves)}) duplicada: {_muestra(filas)}"]
+
+
+def _revisar_cruce(valores, referencia, descripcion):
+    valores = pd.unique(np.asarray(valores, dtype=object))
+    faltantes = valores[~np.isin(valores, np.asarray(referencia, dtype=object))]
+    if len(faltantes) == 0:
+        return []
+    return [f"{descripcion}: {len(faltantes)} sin correspondencia: {_muestra(faltantes)}"]
+
+
+def _revisar_rangos(df, nombre):
+    problemas, advertencias = [], []
+    for columna, (minimo, maximo) in RANGOS_PUNTAJES.items():
+        if columna not in df.columns:
+            problemas.append(f"{nombre}: falta la columna {columna}")
+            continue
+        valores = pd.to_numeric(df[columna], errors='coerce').to_numpy(dtype=float)
+        nulos = np.isnan(valores)
+        fuera = ~nulos & ((valores < minimo) | (valores > maximo))
+        if nulos.any():
+            advertencias.append(f"{nombre}: {nulos.sum()} valores vacíos o no numéricos en {columna}")
+        if fuera.any():
+            problemas.append(f"{nombre}: {fuera.sum()} valores de {columna} fuera de [{minimo}, {maximo}]: {_muestra(valores[fuera])}")
+    return problemas, advertencias
+
+
+def _revisar_cobertura(df_linechart, df_colombia, anios):
+    advertencias = []
+
+    # Número de años con dato por municipio: un solo conteo agrupado en lugar de revisar municipio por municipio
+    conteo = df_linechart.groupby('COLE_MCPIO_UBICACION', observed=True)['AÑO'].nunique()
+    incompletos = conteo[conteo < len(anios)]
+    if len(incompletos):
+        advertencias.append(f"df_antioquia_linechart: {len(incompletos)} municipios sin todos los años {anios[0]}-{anios[-1]}: "
+                         f"{_muestra(incompletos.index)}")
+
+    faltantes = np.setdiff1d(anios, df_colombia['AÑO'].to_numpy())
+    if len(faltantes):
+        advertencias.append(f"df_colombia_linechart: faltan los años {_muestra(faltantes)}")
+    return advertencias
+
+
+# Función para validar los datos de la página de visualizaciones
+def validar_datos(geo_json, df_antioquia, df_linechart, df_colombia):
+    """
+    Revisa la consistencia de la geometría y las tablas de puntajes.
+
+    Args:
+        geo_json (dict): GeoJSON de los municipios (propiedad 'MPIO_CNMBR').
+        df_antioquia (pd.DataFrame): Información de los municipios (df_antioquia_promedios).
+        df_linechart (pd.DataFrame): Puntajes por año y municipio (df_antioquia_linechart).
+        df_colombia (pd.DataFrame): Puntajes nacionales por año (df_colombia_linechart).
+
+    Returns:
+        tuple: (errores, advertencias), dos listas de textos. Los datos son válidos si no hay errores.
+    """
+    municipios_geometria = np.array([feature['properties'].get('MPIO_CNMBR') for feature in geo_json['features']], dtype=object)
+    municipios = df_antioquia['MPIO_CNMBR'].astype(str).to_numpy(dtype=object)
+    anios = np.unique(df_linechart['AÑO'].to_numpy())
+
+    problemas = []
+
+    # Llaves duplicadas
+    problemas += _revisar_duplicados(pd.DataFrame({'MPIO_CNMBR': municipios_geometria}), ['MPIO_CNMBR'], 'Geometría')
+    problemas += _revisar_duplicados(df_antioquia, ['MPIO_CNMBR'], 'df_antioquia_promedios')
+    problemas += _revisar_duplicados(df_antioquia, ['DPTOMPIO'], 'df_antioquia_promedios')
+    problemas += _revisar_duplicados(df_linechart, ['AÑO', 'COLE_MCPIO_UBICACION'], 'df_antioquia_linechart')
+    problemas += _revisar_duplicados(df_colombia, ['AÑO'], 'df_colombia_linechart')
+
+    # Cruces de llaves: cada municipio de las tablas debe tener polígono y viceversa
+    problemas += _revisar_cruce(municipios, municipios_geometria, "Municipios de df_antioquia_promedios sin polígono en la geometría")
+    problemas += _revisar_cruce(municipios_geometria, municipios, "Polígonos de la geometría sin municipio en df_antioquia_promedios")
+    problemas += _revisar_cruce(df_linechart['COLE_MCPIO_UBICACION'].astype(str).to_numpy(dtype=object), municipios,
+                                "Municipios de df_antioquia_linechart sin fila en df_antioquia_promedios")
+
+    # El código DANE de cada municipio debe ser el mismo en ambas tablas
+    codigos = pd.Series(df_antioquia['DPTOMPIO'].astype(str).str.zfill(5).to_numpy(), index=municipios)
+    codigos_linechart = df_linechart['COLE_COD_MCPIO_UBICACION'].astype(str).str.zfill(5).to_numpy()
+    esperados = codigos.reindex(df_linechart['COLE_MCPIO_UBICACION'].astype(str)).to_numpy(dtype=object)
+    distintos = pd.notna(esperados) & (esperados != codigos_linechart)
+    if distintos.any():
+        problemas.append(f"df_antioquia_linechart: {distintos.sum()} filas con código DANE distinto al de df_antioquia_promedios: "
+                         f"{_muestra(df_linechart.loc[distintos, 'COLE_MCPIO_UBICACION'])}")
+
+    # Cobertura de años (solo advertencias) y rangos de los puntajes
+    advertencias = _revisar_cobertura(df_linechart, df_colombia, anios)
+    for df, nombre in [(df_linechart, 'df_antioquia_linechart'), (df_colombia, 'df_colombia_linechart')]:
+        errores_rangos, advertencias_rangos = _revisar_rangos(df, nombre)
+        problemas += errores_rangos
+        advertencias += advertencias_rangos
+
+    return problemas, advertencias
+
+
+# Función para imprimir las advertencias de la validación
+def _imprimir_advertencias(advertencias):
+    for advertencia in advertencias:
+        print(f"Advertencia de validación: {advertencia}")
+
+
+# Función para calcular el hash de un conjunto de archivos (contenido y ruta)
+def hash_archivos(rutas):
+    resumen = hashlib.sha256()
+    for ruta in sorted(rutas):
+        resumen.update(ruta.encode('utf-8'))
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b''):
+                resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+# Función para validar los datos una sola vez por versión de los archivos de origen
+def validar_con_marcador(rutas, validar, directorio=DIRECTORIO_MARCADORES):
+    """
+    Ejecuta la validación solo si no existe un marcador para el hash actual de los archivos de origen y de las reglas.
+    Si hay errores se lanza ValueError con el reporte; las advertencias se imprimen. Si no hay errores, se escribe el
+    marcador con las advertencias, que se vuelven a imprimir cuando la validación se omite.
+
+    Args:
+        rutas (list): Archivos de los que dependen los datos validados. Si está vacía (p. ej. datos leídos de una base
+            de datos) la validación se ejecuta siempre.
+        validar (callable): Función sin argumentos que retorna (errores, advertencias) (ver validar_datos).
+        directorio (str, optional): Directorio de los marcadores. Defaults to '.cache/validacion'.
+
+    Returns:
+        bool: True si se ejecutó la validación y False si se omitió por existir el marcador.
+    """
+    marcador = None
+    if rutas:
+        version = hashlib.sha256(f"reglas {VERSION_REGLAS}\n{hash_archivos(rutas)}".encode('utf-8')).hexdigest()
+        marcador = os.path.join(directorio, version)
+    if marcador is not None and os.path.exists(marcador):
+        try:
+            with open(marcador, encoding='utf-8') as archivo:
+                _imprimir_advertencias(json.load(archivo).get('advertencias', []))
+        except (OSError, ValueError):
+            pass
+        return False
+
+    problemas, advertencias = validar()
+    _imprimir_advertencias(advertencias)
+    if problemas:
+        raise ValueError("Los datos del tablero no pasaron la validación:\n" + '\n'.join(f"  - {problema}" for problema in problemas))
+
+    if marcador is not None:
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            with open(marcador, 'w', encoding='utf-8') as archivo:
+                json.dump({'rutas': sorted(rutas), 'advertencias': advertencias}, archivo, ensure_ascii=False, indent=2)
+        except OSError:
+            print("No se pudo escribir el marcador de validación. Los datos se validarán de nuevo en el próximo arranque.")
+    return True
@@ -1,13 +1,19 @@
 import dash
-from dash import html, dcc, Input, Output, State
+from dash import html, dcc, Input, Output, State, ClientsideFunction
 import dash_bootstrap_components as dbc
 from dash_bootstrap_templates import load_figure_template
 import plotly.graph_objects as go
 import json
 import pickle
-from pgmpy.inference import VariableElimination
 from dash.exceptions import PreventUpdate
-from utils.utils import create_dd, create_predicted_performance_chart, interpretar_desempenho
+from utils.inferencia import InferenciaConcurrente
+from utils.utils import create_dd, create_predicted_performance_chart, create_barrido_chart, numero_niveles
+from utils.cache_figuras import CacheFiguras
+from utils.memoizacion import memoizar
+from utils.metricas import carga_activos, latencia_inferencia, registrar_coleccionista
+from utils.secuenciacion import Secuenciador, verificar
+from utils.trabajos import gestor_trabajos
+import time
 
 templates = ["cerulean"]
 load_figure_template(templates)
@@ -22,7 +28,7 @@ dash.register_page(__name__, path='/')
 
 # Cargar el archivo JSON
 try:
-    with open('assets/parameter_options.JSON', 'r', encoding='utf-8') as json_file:
+    with open('datos/parameter_options.JSON', 'r', encoding='utf-8') as json_file:
         all_params = json.load(json_file)
 except FileNotFoundError:
     print("El archivo JSON no se encontró.")
@@ -36,6 +42,15 @@ dd_params = all_params.get('dropdown_params', {})
 # Obtener el diccionario de correspondencias entre los nombres de los parámetros y los nombres de las variables del modelo
 param_name_mapping = all_params.get('param_name_mapping', {})
 
+# Cargar las etiquetas de los niveles de desempeño de cada área y sus interpretaciones (se envían al navegador con la
+# página, ver assets/desempenho.js)
+try:
+    with open('datos/interpretaciones.json', 'r', encoding='utf-8') as json_file:
+        interpretaciones = json.load(json_file)
+except (FileNotFoundError, json.JSONDecodeError):
+    print("Error al cargar las interpretaciones de los niveles de desempeño.")
+    interpretaciones = {'sin_area': '', 'sin_nivel': '', 'areas': {}}
+
 
 
 # ======================================================================================================================
@@ -47,10 +62,11 @@ model_names = ['modelo_entrenado_ENG', 'modelo_entrenado_LEC', 'modelo_entrenado
 # Crear un diccionario para almacenar los modelos cargados
 loaded_models = {}
 
-# Cargar los modelos desde los archivos .pkl en la carpeta 'assets'
+# Cargar los modelos desde los archivos .pkl en la carpeta 'datos'
+inicio_carga = time.perf_counter()
 for model_name in model_names:
     try:
-        with open(f'assets/{model_name}.pkl', 'rb') as f:
+        with open(f'datos/{model_name}.pkl', 'rb') as f:
             loaded_models[model_name] = pickle.load(f)
     except FileNotFoundError:
         print(f"El archivo del modelo {model_name} no se encontró.")
@@ -59,9 +75,10 @@ for model_name in model_names:
         print(f"Error al cargar el modelo {model_name}.")
         loaded_models[model_name] = None
 
-# Crear objetos de inferencia para cada modelo cargado
-inference_objects = {model_name: VariableElimination(loaded_model) if loaded_model else None
+# Crear objetos de inferencia para cada modelo cargado (compartidos por los hilos del worker, ver utils/inferencia.py)
+inference_objects = {model_name: InferenciaConcurrente(loaded_model) if loaded_model else None
                      for model_name, loaded_model in loaded_models.items()}
+carga_activos.establecer(time.perf_counter() - inicio_carga, 'modelos')
 
 # Mapeo de áreas a modelos de inferencia
 area_to_model_mapping = all_params.get('area_to_model_mapping', {})[0]
@@ -78,7 +95,7 @@ def realizar_inferencia(area_seleccionada):
         area_seleccionada (str): Nombre del área seleccionada.
 
     returns:
-        objeto_de_inferencia (VariableElimination): Objeto de inferencia para el área seleccionada.
+        objeto_de_inferencia (InferenciaConcurrente): Objeto de inferencia para el área seleccionada.
     """
     modelo_entrenado_key = area_to_model_mapping.get(area_seleccionada)
     
@@ -90,6 +107,74 @@ def realizar_inferencia(area_seleccionada):
 
 
 
+# Plantillas del gráfico de predicción del desempeño: la figura solo depende del área y del nivel predicho, así que las
+# 27 variantes (niveles 1 a 4 de cuatro áreas, 1 a 5 de inglés y del global, y el gráfico vacío de antes de elegir un
+# área) se construyen y serializan una sola vez al iniciar. La predicción solo toma la suya (ver utils/cache_figuras.py)
+def construir_grafico_desempenho(clave):
+    area, nivel = clave
+    return create_predicted_performance_chart(nivel, area)
+
+cache_desempenho = CacheFiguras(max_entradas=32, nombre='desempenho_predicho')
+cache_desempenho.precalentar([(area, nivel) for area in target_variable for nivel in range(1, numero_niveles(area) + 1)]
+                             + [(None, 0)], construir_grafico_desempenho)
+
+
+
+# Función para construir el diccionario de evidencias del modelo a partir de los valores del formulario
+def construir_evidencia(dropdown_values, recursos):
+    evidence = {}
+
+    # Evidencias de los dropdowns
+    for param, value in zip(dd_params.keys(), dropdown_values):
+        if value is not None:
+            correct_param_name = param_name_mapping[0].get(f'dd_{param}', f'Unknown parameter: {param}')
+            evidence[correct_param_name] = value  # Agregar el parámetro al diccionario
+
+    # Evidencias de los recursos
+    if recursos is not None:
+        evidence['FAMI_RECURSOS'] = sum(recursos)
+
+    return evidence
+
+# Nombres de las áreas del conocimiento y de las variables del formulario que se pueden barrer
+ETIQUETAS_AREAS = {
+    'matematicas': 'Matemáticas',
+    'ciencias_naturales': 'Ciencias naturales',
+    'ciencias_sociales': 'Ciencias sociales',
+    'lectura_critica': 'Lectura crítica',
+    'ingles': 'Inglés',
+    'global': 'Global',
+}
+ETIQUETAS_VARIABLES = {
+    'cole_subregion': 'Subregión',
+    'semaforo_viol': 'Nivel de violencia',
+    'cole_area_ubicacion': 'Área de ubicación de la Sede',
+    'cole_jornada': 'Jornada',
+    'cole_bilingue': 'Bilingüe',
+    'estu_genero': 'Género del estudiante',
+    'estu_edad': 'Edad del estudiante',
+    'fami_educacion_mop': 'Educación de la madre o el padre',
+    'fami_estratovivienda': 'Estrato de vivienda',
+}
+
+# Secuenciador de las predicciones: descarta las peticiones que quedaron obsoletas por un cambio más reciente del
+# formulario en la misma pestaña
+secuenciador_predicciones = Secuenciador()
+
+@registrar_coleccionista
+def metricas_secuenciacion():
+    conteos = secuenciador_predicciones.estadisticas()
+    return [
+        ('prediccion_solicitudes_total', 'counter', "Peticiones de predicción recibidas con control de secuencia.", [],
+         [((), conteos['solicitudes'])]),
+        ('prediccion_descartadas_total', 'counter', "Predicciones descartadas por obsoletas, según la etapa.", ['etapa'],
+         [(('cola',), conteos['descartadas_cola']), (('curso',), conteos['descartadas_curso'])]),
+        ('prediccion_segundos_ahorrados', 'counter', "Estimación del cómputo ahorrado (descartes por duración promedio).", [],
+         [((), conteos['segundos_ahorrados'])]),
+    ]
+
+
+
 # ======================================================================================================================
 #                                               CONTENIDO DE LA PÁGINA
 # ======================================================================================================================
@@ -133,6 +218,8 @@ layout = html.Div([
             dbc.Col([
                 dbc.Label("Barra de progreso", html_for="progress-bar", size="sm"),
                 dbc.Progress(id="progress-bar", value=0, striped=True, animated=False, style={'height': '25px'}),
+                # Control de secuencia de las predicciones de esta pestaña: {'sesion', 'generacion'}
+                dcc.Store(id='control-prediccion', storage_type='memory'),
             ], width=8, style={'margin-bottom': '10px'}),
             
         ], justify="center", style={'margin-bottom': '10px'}),
@@ -259,14 +346,7 @@ layout = html.Div([
         dbc.Row([
             dbc.Col([
                 dcc.Dropdown(id="dd_area",
-                    options=[
-                        {'label': 'Matemáticas', 'value': 'matematicas'},
-                        {'label': 'Ciencias naturales', 'value': 'ciencias_naturales'},
-                        {'label': 'Ciencias sociales', 'value': 'ciencias_sociales'},
-                        {'label': 'Lectura crítica', 'value': 'lectura_critica'},
-                        {'label': 'Inglés', 'value': 'ingles'},
-                        {'label': 'Global', 'value': 'global'}
-                    ],
+                    options=[{'label': etiqueta, 'value': area} for area, etiqueta in ETIQUETAS_AREAS.items()],
                     placeholder="Área del conocimiento",
                     optionHeight=35,
                     persistence=True,
@@ -280,6 +360,7 @@ layout = html.Div([
             dbc.Spinner(
                 dcc.Graph(
                     id='predicted-performance-chart',
+                    figure=cache_desempenho.obtener((None, 0), lambda: construir_grafico_desempenho((None, 0))),
                     config={'displayModeBar': False, 'scrollZoom': False},
                 ),
                 size="lg",  # Ajusta el tamaño del spinner según tus preferencias
@@ -309,6 +390,29 @@ layout = html.Div([
         # Markdown con la interpretación del desempeño
         dcc.Markdown(id='interpretacion-desempenho', dangerously_allow_html=True, style={'margin-top': '10px'}),
 
+        # Niveles e interpretaciones de todas las áreas, para resolver los dos componentes anteriores en el navegador
+        dcc.Store(id='datos-interpretaciones', data=interpretaciones),
+
+        html.Hr(),
+
+        # Barrido de evidencias: nivel esperado de cada área para cada valor de una variable (se calcula en segundo plano)
+        html.H4([html.I(className="fa fa-chart-line"),'\t Barrido de evidencias']),
+        dcc.Markdown("Escoge una variable para ver cómo cambia el nivel de desempeño esperado de cada área con cada uno de sus "
+                     "valores, dejando fijo el resto del formulario." if gestor_trabajos is not None else
+                     "El barrido de evidencias no está disponible en este servidor."),
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(id='variable-barrido',
+                             options=[{'label': etiqueta, 'value': param} for param, etiqueta in ETIQUETAS_VARIABLES.items()],
+                             value='fami_estratovivienda', clearable=False),
+            ], width=6),
+            dbc.Col([
+                dbc.Button("Calcular", id='boton-barrido', color="primary", className="me-2", disabled=gestor_trabajos is None),
+                dbc.Button("Cancelar", id='cancelar-barrido', color="secondary", disabled=True),
+            ], width=6),
+        ], style={'margin-bottom': '10px'}),
+        dcc.Graph(id='grafico-barrido', config={'displayModeBar': False}),
+
         # TODO: Eliminar estos componentes de prueba
         # Mostrar valores de dropdowns seleccionados
         html.Div(id='dd-output-container', style={'margin-top': '10px'}),
@@ -334,45 +438,56 @@ layout = html.Div([
      ],  
     [Input(f'dd_{param}', 'value') for param in dd_params.keys()],
     [Input('fami_recursos', 'value')],
-    [Input('dd_area', 'value')]
+    [Input('dd_area', 'value')],
+    [Input('control-prediccion', 'data')]
 )
 def display_selected_values(*values):
+    # Sin área seleccionada (p. ej. al cargar la página, porque dd_area no tiene valor inicial) no hay modelo con el cual
+    # predecir: se deja el gráfico como está en lugar de fallar con KeyError (un 500 en cada carga de la página). Se
+    # revisa antes de pedir turno, para no ocupar el secuenciador ni calcular la llave del caché
+    if values[-2] not in target_variable:
+        raise PreventUpdate
+
+    # El último valor es el control {'sesion', 'generacion'} del navegador: si mientras esta petición espera o se
+    # calcula llega una más nueva de la misma pestaña, se descarta (ver utils/secuenciacion.py)
+    with secuenciador_predicciones.turno(values[-1]):
+        return predecir_desempenho(*values[:-1])
+
+
+# Función para predecir el desempeño y construir su gráfico (pura en sus argumentos, por eso se memoiza)
+@memoizar()
+def predecir_desempenho(*values):
 
     # Separar los valores de los dropdowns de los valores de los recursos y el área de conocimiento
     dropdown_values = values[:-2]
     recursos = values[-2]
     selected_area = values[-1]
 
-    # Crear un diccionario para almacenar las evidencias
-    evidence = {}
-
-    # Evidencias de los dropdowns
-    for param, value in zip(dd_params.keys(), dropdown_values):
-        if value is not None:
-            correct_param_name = param_name_mapping[0].get(f'dd_{param}', f'Unknown parameter: {param}')
-            evidence[correct_param_name] = value  # Agregar el parámetro al diccionario
-
-    # Evidencias de los recursos
-    if recursos is not None:
-        evidence['FAMI_RECURSOS'] = sum(recursos)
+    # Diccionario de evidencias con los valores del formulario
+    evidence = construir_evidencia(dropdown_values, recursos)
 
     # Crear un objeto de inferencia por de acuerdo al área seleccionada
     infer = realizar_inferencia(selected_area)
 
     # Selección de la variable objetivo del modelo y hacer query con objeto de inferencia
     target = target_variable[selected_area]
-    inferencia = infer.query([target], evidence=evidence) # Target: éxito académico
+    with latencia_inferencia.medir(selected_area, len(evidence)):
+        inferencia = infer.query([target], evidence=evidence) # Target: éxito académico
     
     # Desempeño: Corresponde al índice del valor máximo en inferencia.values + 1  
     desempenho = inferencia.values.argmax()+1
 
+    # Si mientras tanto el usuario volvió a cambiar el formulario, no vale la pena construir esta figura
+    verificar()
+
     # Impresiones de prueba
     # print(inferencia) 
     # print(inferencia.values)
     # print(desempenho)
 
-    # Crear el gráfico de predicción del desempeño
-    fig = create_predicted_performance_chart(desempenho, selected_area)
+    # Gráfico de predicción del desempeño (plantilla preconstruida, sin pasar por plotly)
+    clave = (selected_area, int(desempenho))
+    fig = cache_desempenho.obtener(clave, lambda: construir_grafico_desempenho(clave))
    
     # # TODO: Eliminar esta salida cuando se conecte con el modelo
     # salida = html.Pre(json.dumps(evidence, indent=4, ensure_ascii=False))
@@ -385,79 +500,116 @@ def display_selected_values(*values):
 # ----------------------------------------------------------------------------------------------------------------------
 #                                                BOTONES DE NIVELES DE DESEMPEÑO
 # ----------------------------------------------------------------------------------------------------------------------
-@dash.callback(
+# Se resuelve en el navegador (assets/desempenho.js) con las etiquetas de datos/interpretaciones.json
+dash.clientside_callback(
+    ClientsideFunction(namespace='desempenho', function_name='opcionesNiveles'),
     Output('radios', 'options'),
-    [Input('dd_area', 'value')]
+    Input('dd_area', 'value'),
+    State('datos-interpretaciones', 'data'),
 )
-def generate_radio_options(selected_area):
-    if selected_area == 'ingles':
-        text_values = ["A-", "A1", "A2", "B1", "B+"]
-    elif selected_area != None:
-        if selected_area == 'global':
-            total_blocks = 5
-        else:
-            total_blocks = 4  # Define el total de bloques según tus necesidades
-        text_values = [str(i + 1) for i in range(total_blocks)]
-    else:
-        text_values = []
-
-    options = [{'label': label, 'value': i + 1} for i, label in enumerate(text_values)]
-
-    return options
 
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 #                                                INTERPRETACIÓN DEL DESEMPEÑO
 # ----------------------------------------------------------------------------------------------------------------------
-@dash.callback(
+# Se resuelve en el navegador (assets/desempenho.js): cambiar de nivel o de área no genera peticiones al servidor
+dash.clientside_callback(
+    ClientsideFunction(namespace='desempenho', function_name='interpretacion'),
     Output('interpretacion-desempenho', 'children'),
-    [Input('radios', 'value'), Input('dd_area', 'value')]
+    Input('radios', 'value'),
+    Input('dd_area', 'value'),
+    State('datos-interpretaciones', 'data'),
 )
-def update_interpretacion_desempenho(nivel_desempenho, area_conocimiento):
-    return interpretar_desempenho(area_conocimiento, nivel_desempenho)
 
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 #                                                       LIMPIAR FORMULARIO
 # ----------------------------------------------------------------------------------------------------------------------
-@dash.callback(
+# Se resuelve en el navegador (assets/formulario.js): vaciar el formulario no necesita al servidor
+dash.clientside_callback(
+    ClientsideFunction(namespace='formulario', function_name='limpiar'),
     [Output(f'dd_{param}', 'value') for param in dd_params.keys()] +
     [Output("fami_recursos", "value")],
     [Input('clear-button', 'n_clicks')],
+    [State(f'dd_{param}', 'value') for param in dd_params.keys()],
     prevent_initial_call=True
 )
-def clear_form(n_clicks):
-    if n_clicks is not None and n_clicks > 0:
-        
-        # Clear the dropdowns
-        output_values = {f'dd_{param}': None for param in dd_params.keys()}
-
-        # Clear the fami_recursos switches
-        fami_recursos_value = []
-
-        return [output_values[param] for param in output_values] + [fami_recursos_value]
-    
-    else:
-        raise PreventUpdate
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 #                                                       PROGRESO
 # ----------------------------------------------------------------------------------------------------------------------
-@dash.callback(
-    [Output('progress-bar', 'value'),Output('progress-bar', 'label')],
+# Se calcula en el navegador (assets/formulario.js), de modo que cada cambio de un dropdown solo hace una petición al
+# servidor (la de la predicción) en lugar de dos
+# El barrido de evidencias también reporta su avance en esta barra: cuando termina o se cancela, el botón se vuelve a
+# habilitar y el progreso del formulario se recalcula
+dash.clientside_callback(
+    ClientsideFunction(namespace='formulario', function_name='progreso'),
+    [Output('progress-bar', 'value'), Output('progress-bar', 'label')],
     [Input(f'dd_{param}', 'value') for param in dd_params.keys()],
+    [Input('boton-barrido', 'disabled')],
 )
-def update_progress_bar(*values):
-    # Calcula el progreso en función del número de valores ingresados
-    total_params = len(dd_params)+1  # Total de parámetros (dropdowns y recursos)
-    
-    # Cuenta el número de parámetros diligenciados en dropdowns
-    filled_params = sum([value is not None for value in values])+1 # Suma 1 por los recursos
-       
-    # Calcula el progreso con dos decimales
-    progress = round(filled_params / total_params * 100)
 
-    return progress, f"{progress} %" if progress >= 5 else ""
\ No newline at end of file
+
+# ----------------------------------------------------------------------------------------------------------------------
+#                                                  SECUENCIA DE LAS PREDICCIONES
+# ----------------------------------------------------------------------------------------------------------------------
+# Cada cambio del formulario incrementa en el navegador la generación de la pestaña; la predicción la recibe como entrada
+dash.clientside_callback(
+    ClientsideFunction(namespace='formulario', function_name='siguienteGeneracion'),
+    Output('control-prediccion', 'data'),
+    [Input(f'dd_{param}', 'value') for param in dd_params.keys()] +
+    [Input('fami_recursos', 'value'), Input('dd_area', 'value')],
+    State('control-prediccion', 'data'),
+)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+#                                               BARRIDO DE EVIDENCIAS
+# ----------------------------------------------------------------------------------------------------------------------
+# Callback en segundo plano (ver utils/trabajos.py): corre en un proceso aparte, reporta su avance en la barra de
+# progreso, se puede cancelar y guarda su resultado según sus argumentos (sin contar n_clicks), de modo que repetir una
+# consulta no vuelve a calcular
+if gestor_trabajos is not None:
+    @dash.callback(
+        Output('grafico-barrido', 'figure'),
+        Input('boton-barrido', 'n_clicks'),
+        State('variable-barrido', 'value'),
+        [State(f'dd_{param}', 'value') for param in dd_params.keys()],
+        State('fami_recursos', 'value'),
+        prevent_initial_call=True,
+        background=True,
+        manager=gestor_trabajos,
+        running=[(Output('boton-barrido', 'disabled'), True, False),
+                 (Output('cancelar-barrido', 'disabled'), False, True)],
+        cancel=[Input('cancelar-barrido', 'n_clicks')],
+        progress=[Output('progress-bar', 'value'), Output('progress-bar', 'label')],
+        cache_args_to_ignore=[0],
+        interval=500,
+    )
+    def barrer_evidencias(set_progress, n_clicks, variable, *values):
+        dropdown_values = list(values[:-1])
+        recursos = values[-1]
+        posicion = list(dd_params.keys()).index(variable)
+        opciones = dd_params[variable]
+
+        niveles_esperados = {}
+        total = len(target_variable) * len(opciones)
+        for k, (area, target) in enumerate(target_variable.items()):
+            infer = realizar_inferencia(area)
+            niveles = []
+            for j, opcion in enumerate(opciones):
+                dropdown_values[posicion] = opcion['value']
+                evidence = construir_evidencia(dropdown_values, recursos)
+                inferencia = infer.query([target], evidence=evidence, show_progress=False)
+
+                # Nivel esperado: promedio de los niveles ponderado por su probabilidad
+                niveles.append(float((inferencia.values * range(1, len(inferencia.values) + 1)).sum()))
+
+                progreso = round((k * len(opciones) + j + 1) / total * 100)
+                set_progress((progreso, f"Barrido {progreso} %"))
+            niveles_esperados[ETIQUETAS_AREAS.get(area, area)] = niveles
+
+        return create_barrido_chart(ETIQUETAS_VARIABLES.get(variable, variable), [opcion['label'] for opcion in opciones], niveles_esperados)
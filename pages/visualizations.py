@@ -1,13 +1,28 @@
 import dash
-from dash import html, dcc, Input, Output, State
+from dash import html, dcc, Input, Output, State, ClientsideFunction
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from dash_bootstrap_templates import load_figure_template
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import json
+import os
+import time
 from geojson_rewind import rewind
-from utils.utils import create_offcanvas_content
+from utils.activos import url_activo
+from utils.utils import create_offcanvas_content, create_line_chart, create_tabla_promedios
+from utils.cache_figuras import CacheFiguras
+from utils.datos import (construir_registro_municipios, construir_datos_comparacion, construir_cubo_puntajes, construir_vectores_pais,
+                         construir_conteos_estudiantes, construir_agregados_subregiones)
+from utils.ingesta import cargar_parciales
+import numpy as np
+from utils.topologia import decodificar_topologia
+from utils.almacen import cargar_tabla
+from utils.base_datos import FuentePuntajes
+from utils.validacion import validar_datos, validar_con_marcador
+from utils.memoizacion import memoizar, estadisticas
+from utils.metricas import carga_activos, construccion_figuras, registrar_coleccionista
 
 
 templates = ["cerulean"]
@@ -21,26 +36,167 @@ dash.register_page(__name__, path='/visualizations')
 # ======================================================================================================================
 #                                               CHOROPLETH DE ANTIOQUIA
 # ======================================================================================================================
-# Cargar GeoJSON
-with open('assets/MunicipiosVeredas19MB.json', encoding='utf-8') as geojson:
-    geo_json = json.load(geojson)
+# Cargar la geometría de los municipios. Se prefiere la versión TopoJSON cuantizada (ver scripts/construir_topologia.py),
+# que es ~7 veces más liviana que el GeoJSON; si no existe se usa el GeoJSON original
+inicio_carga = time.perf_counter()
+try:
+    ruta_geometria = 'datos/MunicipiosAntioquia.topojson'
+    with open(ruta_geometria, encoding='utf-8') as topojson:
+        geo_json = decodificar_topologia(json.load(topojson), 'antioquia')
+except FileNotFoundError:
+    print("El archivo TopoJSON no se encontró. Se usará el GeoJSON original.")
+    ruta_geometria = 'datos/MunicipiosVeredas19MB.json'
+    with open(ruta_geometria, encoding='utf-8') as geojson:
+        geo_json = json.load(geojson)
 
 # Usamos geojson_rewind para corregir la orientación de los polígonos del GeoJSON. Esto es necesario para que el choropleth funcione correctamente
 geo_json = rewind(geo_json, rfc7946=False)
+carga_activos.establecer(time.perf_counter() - inicio_carga, 'geometria')
 
 
 
 # ======================================================================================================================
-#                                              PROMEDIOS PARA EL CHOROPLETH
+#                               PROMEDIOS PARA EL CHOROPLETH Y BASES DE DATOS PARA LINE CHART
 # ======================================================================================================================
-# Importar archivo df_antioquia_promedios.csv
-df_antioquia = pd.read_csv('assets/df_antioquia_promedios.csv', dtype=str)
+# Si la variable de entorno PUNTAJES_DB tiene una cadena de conexión (PostgreSQL o 'sqlite:///ruta'), los puntajes se
+# leen desde esa base de datos (ver utils/base_datos.py y scripts/cargar_base_datos.py): las tablas completas una vez al
+# iniciar y, en los callbacks, consultas preparadas por municipio y por año con caché de resultados.
+#
+# Si no, las tablas se cargan desde el almacén columnar tipado (ver scripts/construir_almacen.py): enteros pequeños
+# para años y puntajes, categorías para municipios y subregiones, y arreglos mapeados en memoria. Si tampoco existe,
+# se leen los CSV
+inicio_carga = time.perf_counter()
+fuente_puntajes = None
+if os.environ.get('PUNTAJES_DB'):
+    fuente_puntajes = FuentePuntajes(os.environ['PUNTAJES_DB'], max_conexiones=int(os.environ.get('PUNTAJES_DB_CONEXIONES', '4')))
+    df_antioquia = fuente_puntajes.tabla('antioquia_promedios')
+    df_antioquia_promedios = fuente_puntajes.tabla('antioquia_linechart')
+    df_colombia = fuente_puntajes.tabla('colombia_linechart')
+else:
+    try:
+        df_antioquia = cargar_tabla('datos/almacen/antioquia_promedios')
+        df_antioquia_promedios = cargar_tabla('datos/almacen/antioquia_linechart')
+        df_colombia = cargar_tabla('datos/almacen/colombia_linechart')
+    except FileNotFoundError:
+        print("El almacén columnar no se encontró. Se leerán los archivos CSV.")
+        df_antioquia = pd.read_csv('datos/df_antioquia_promedios.csv', dtype=str)
+        df_antioquia_promedios = pd.read_csv('datos/df_antioquia_linechart.csv')
+        df_colombia = pd.read_csv('datos/df_colombia_linechart.csv')
+carga_activos.establecer(time.perf_counter() - inicio_carga, 'tablas')
+
+# Validar los cruces de llaves, la cobertura de años, los rangos y los duplicados antes de construir nada (ver
+# utils/validacion.py; los años faltantes y los puntajes vacíos solo generan advertencias). Si los archivos de origen
+# no cambiaron desde la última validación exitosa, se omite
+if fuente_puntajes is not None:
+    archivos_datos = []  # Los datos vienen de la base de datos: se validan en cada arranque
+elif os.path.exists('datos/almacen/antioquia_promedios'):
+    # El esquema nombra el arreglo por la huella de su contenido, así que su hash cubre también los datos
+    archivos_datos = [os.path.join('datos/almacen', tabla, 'esquema.json') for tabla in ['antioquia_promedios', 'antioquia_linechart', 'colombia_linechart']]
+else:
+    archivos_datos = ['datos/df_antioquia_promedios.csv', 'datos/df_antioquia_linechart.csv', 'datos/df_colombia_linechart.csv']
+with carga_activos.medir('validacion'):
+    validar_con_marcador([ruta_geometria] + archivos_datos if archivos_datos else [],
+                         lambda: validar_datos(geo_json, df_antioquia, df_antioquia_promedios, df_colombia))
+
+# Registro de municipios: nombre -> posición, bandera y subregión (se construye una sola vez)
+registro_municipios = construir_registro_municipios(df_antioquia)
+
+# Puntajes disponibles y su nombre en el selector
+variables_puntajes = [columna for columna in df_antioquia_promedios.columns if columna.startswith('PUNT_')]
+ETIQUETAS_PUNTAJES = {
+    'PUNT_GLOBAL': 'Puntaje global',
+    'PUNT_LECTURA_CRITICA': 'Lectura crítica',
+    'PUNT_MATEMATICAS': 'Matemáticas',
+    'PUNT_C_NATURALES': 'Ciencias naturales',
+    'PUNT_SOCIALES_CIUDADANAS': 'Sociales y ciudadanas',
+    'PUNT_INGLES': 'Inglés',
+}
+
+# Cubo denso año x municipio x puntaje (municipios en el orden de df_antioquia) y puntajes nacionales alineados con sus
+# años: cambiar de año o de puntaje en los callbacks es tomar una rebanada, no filtrar un DataFrame
+inicio_carga = time.perf_counter()
+cubo_puntajes = construir_cubo_puntajes(df_antioquia, df_antioquia_promedios, variables_puntajes)
+vectores_colombia = construir_vectores_pais(df_colombia, cubo_puntajes['anios'], variables_puntajes)
+indice_variable = {variable: k for k, variable in enumerate(variables_puntajes)}
+
+# Años disponibles en los datos: el slider y el choropleth los siguen automáticamente al anexar un periodo nuevo
+anios_disponibles = cubo_puntajes['anios']
+indice_anio = {anio: i for i, anio in enumerate(anios_disponibles)}
+ultimo_anio = anios_disponibles[-1]
+
+# Rango de colores de cada puntaje en el choropleth (fijo entre años para que los colores sean comparables)
+rango_puntajes = {variable: (float(np.nanmin(cubo_puntajes['cubo'][:, :, k])), float(np.nanmax(cubo_puntajes['cubo'][:, :, k])))
+                  for variable, k in indice_variable.items()}
+
+# Promedios por subregión y de Antioquia para todos los años y puntajes, ponderados por número de estudiantes si la
+# ingesta de microdatos dejó conteos en el almacén (ver scripts/ingestar_saber11.py)
+parciales_municipios = cargar_parciales('datos/almacen/parciales_municipios', ['PERIODO', 'COLE_COD_MCPIO_UBICACION'])
+conteos_estudiantes = None
+if parciales_municipios is not None:
+    conteos_estudiantes = construir_conteos_estudiantes(parciales_municipios, df_antioquia, anios_disponibles, variables_puntajes)
+agregados_subregiones = construir_agregados_subregiones(df_antioquia, cubo_puntajes, conteos_estudiantes)
+
+# Conjunto de datos compacto para comparar municipios y subregiones en el navegador (se envía una vez por sesión)
+datos_comparacion = construir_datos_comparacion(df_antioquia, cubo_puntajes, agregados_subregiones)
+carga_activos.establecer(time.perf_counter() - inicio_carga, 'agregados')
+
+
+# Funciones de consulta que usan los callbacks: desde la base de datos si está configurada y, si no, rebanadas del
+# cubo en memoria. Ambas retornan arreglos alineados con los ejes del cubo
+def puntajes_municipio(municipio, variable):
+    if fuente_puntajes is not None:
+        serie = fuente_puntajes.serie_municipio(municipio)
+        return serie.set_index('AÑO')[variable].reindex(anios_disponibles).to_numpy(dtype=float)
+    return cubo_puntajes['cubo'][:, registro_municipios[municipio]['posicion'], indice_variable[variable]]
+
+def puntajes_anio(anio, variable):
+    if anio not in indice_anio:
+        anio = ultimo_anio
+    if fuente_puntajes is not None:
+        puntajes = fuente_puntajes.puntajes_anio(anio)
+        return puntajes.set_index('COLE_MCPIO_UBICACION')[variable].reindex(df_antioquia['MPIO_CNMBR']).to_numpy(dtype=float)
+    return cubo_puntajes['cubo'][indice_anio[anio], :, indice_variable[variable]]
+
+# Promedio de la subregión de cada municipio (para la capa de subregiones del choropleth)
+def puntajes_subregiones_anio(anio, variable):
+    anio = anio if anio in indice_anio else ultimo_anio
+    promedios = agregados_subregiones['cubo'][indice_anio[anio], :, indice_variable[variable]]
+    return np.round(promedios[agregados_subregiones['subregion_municipio']].astype(float), 1)
+
 
 # ======================================================================================================================
-#                                    BASES DE DATOS PARA LINE CHART DE MUNICIPIO
+#                                        CACHÉ DE FIGURAS DEL LINE CHART DE MUNICIPIO
 # ======================================================================================================================
-df_antioquia_promedios = pd.read_csv('assets/df_antioquia_linechart.csv')
-df_colombia = pd.read_csv('assets/df_colombia_linechart.csv')
+# Los puntajes históricos son estáticos entre despliegues, así que la figura de cada (municipio, variable) se construye
+# una sola vez y se guarda serializada. Con PRECONSTRUIR_FIGURAS=1 se construyen todas al iniciar la aplicación.
+def construir_line_chart(clave):
+    municipio, variable = clave
+    return create_line_chart(anios_disponibles, puntajes_municipio(municipio, variable),
+                             vectores_colombia[:, indice_variable[variable]], municipio, variable)
+
+# Caben las figuras de todos los puntajes de todos los municipios
+cache_line_chart = CacheFiguras(max_entradas=1024, nombre='line_chart')
+
+if os.environ.get('PRECONSTRUIR_FIGURAS', '0') == '1':
+    cache_line_chart.precalentar([(municipio, 'PUNT_GLOBAL') for municipio in df_antioquia['MPIO_CNMBR']], construir_line_chart)
+
+
+# Tasas de aciertos de los cachés, leídas de sus contadores al consultar /metrics (ver utils/metricas.py)
+@registrar_coleccionista
+def metricas_caches():
+    conteos = {'callback:' + nombre: (conteo['aciertos'], conteo['fallos']) for nombre, conteo in estadisticas().items()}
+    conteos['line_chart'] = (cache_line_chart.aciertos, cache_line_chart.fallos)
+    if fuente_puntajes is not None:
+        conteos['base_datos'] = (fuente_puntajes.aciertos, fuente_puntajes.fallos)
+
+    return [
+        ('cache_aciertos_total', 'counter', "Aciertos de cada caché.", ['cache'],
+         [((nombre,), aciertos) for nombre, (aciertos, fallos) in conteos.items()]),
+        ('cache_fallos_total', 'counter', "Fallos de cada caché.", ['cache'],
+         [((nombre,), fallos) for nombre, (aciertos, fallos) in conteos.items()]),
+        ('cache_tasa_aciertos', 'gauge', "Proporción de consultas resueltas por cada caché.", ['cache'],
+         [((nombre,), aciertos / (aciertos + fallos) if aciertos + fallos else 0.0) for nombre, (aciertos, fallos) in conteos.items()]),
+    ]
 
 
 # ======================================================================================================================
@@ -53,8 +209,8 @@ fig = go.Figure()
 fig.add_trace(
     go.Choropleth(
         geojson=geo_json,
-        locations=df_antioquia_promedios['COLE_MCPIO_UBICACION'],
-        z=df_antioquia_promedios['PUNT_GLOBAL'][df_antioquia_promedios['AÑO'] == 2022],
+        locations=df_antioquia['MPIO_CNMBR'],
+        z=puntajes_anio(ultimo_anio, 'PUNT_GLOBAL'),
         featureidkey="properties.MPIO_CNMBR",
         colorscale="Blues",
         # colorbar=dict(title="AVG_PUNT_GLOBAL"),
@@ -78,7 +234,18 @@ fig.update_layout(
 layout = html.Div([
 
     dbc.Row([
-        html.H4([html.I(className="fa fa-location-dot"),'\t Promedio de puntaje global por municipio']),
+        # Título y selector del puntaje que muestran el mapa y el diagrama de línea
+        html.Div([
+            html.H4([html.I(className="fa fa-location-dot"),'\t Promedio por municipio:'], style={'margin-bottom': '0px'}),
+            dcc.Dropdown(
+                id='dropdown-puntaje',
+                options=[{'label': ETIQUETAS_PUNTAJES.get(variable, variable), 'value': variable} for variable in variables_puntajes],
+                value='PUNT_GLOBAL',
+                persistence=True,
+                clearable=False,
+                style={'width': '260px', 'margin-left': '10px'},
+            ),
+        ], style={'display': 'flex', 'align-items': 'center'}),
     ], style={'padding-left': '20px', 'padding-right': '20px', 'padding-top': '10px'}),
 
     dbc.Row([
@@ -87,6 +254,12 @@ layout = html.Div([
         #                                                   OFFCANVAS
         # ---------------------------------------------------------------------------------------------------------------
         dbc.Offcanvas(
+            [
+                # Promedios de la subregión y de Antioquia en el año seleccionado
+                html.Div(id='promedios-subregion'),
+                # Descripción de la subregión
+                html.Div(id='contenido-subregion'),
+            ],
             id="offcanvas-subregion",
             is_open=False,
             placement='end',
@@ -100,7 +273,9 @@ layout = html.Div([
         # ---------------------------------------------------------------------------------------------------------------
         dbc.Col([
             dcc.Graph(id="choropleth-ANT", figure=fig,style={'padding-bottom': '15px'}), 
-            dcc.Slider(id='year-slider', marks={str(year): str(year) for year in range(2015, 2023)}, value=2022, step=1, persistence=True),
+            dcc.Slider(id='year-slider', marks={str(year): str(year) for year in anios_disponibles}, value=ultimo_anio, step=1, persistence=True),
+            dbc.Switch(id='switch-subregiones', label="Colorear por promedio de subregión", value=False, persistence=True,
+                       style={'padding-left': '25px', 'padding-top': '10px'}),
         ], width=5),
 
 
@@ -120,7 +295,7 @@ layout = html.Div([
                         
                         # Logo con id para poder modificarlo con callbacks
                         html.Img(
-                            src="./assets/croquis-ANT2.png", 
+                            src=url_activo("croquis-ANT2.png"),
                             height="40px",
                             id='flag-img',
                             style={
@@ -154,6 +329,20 @@ layout = html.Div([
 
                         html.Hr(),
 
+                        # Dropdown para superponer otros municipios o promedios de subregión en el diagrama de línea
+                        dcc.Dropdown(
+                            id='dropdown-comparar',
+                            options=[{'label': nombre, 'value': nombre} for nombre in datos_comparacion['nombres']],
+                            multi=True,
+                            placeholder="Comparar con otros municipios o subregiones",
+                            persistence=True,
+                            style={'margin-bottom': '10px'},
+                        ),
+
+                        # Figura base del diagrama de línea (la construye el servidor) y datos para la comparación
+                        dcc.Store(id='line-chart-base'),
+                        dcc.Store(id='datos-comparacion', storage_type='session'),
+
                         # Crear diagrama de linea con puntajes por año (solo graph con id para modificarlo con callbacks)
                         dbc.Spinner(
                             dcc.Graph(
@@ -186,20 +375,40 @@ layout = html.Div([
 @dash.callback(
     Output('choropleth-ANT', 'figure'),
     [Input('dropdown-municipios', 'value'),
-     Input('year-slider', 'value')]
+     Input('year-slider', 'value'),
+     Input('dropdown-puntaje', 'value'),
+     Input('switch-subregiones', 'value')]
 )
-def update_choropleth(selected_municipio, selected_year):
+@memoizar()
+def update_choropleth(selected_municipio, selected_year, variable='PUNT_GLOBAL', por_subregion=False):
+    # Resaltar el borde del municipio seleccionado
+    colores_borde = ['#444'] * len(registro_municipios)
+    anchos_borde = [1] * len(registro_municipios)
+    if selected_municipio in registro_municipios:
+        posicion = registro_municipios[selected_municipio]['posicion']
+        colores_borde[posicion] = 'orange'
+        anchos_borde[posicion] = 4
+
+    # Capa de municipios o de subregiones (cada municipio con el promedio precalculado de su subregión)
+    if por_subregion:
+        z = puntajes_subregiones_anio(selected_year, variable)
+        etiqueta = ETIQUETAS_PUNTAJES.get(variable, variable) + " (promedio de la subregión)"
+    else:
+        z = puntajes_anio(selected_year, variable)
+        etiqueta = ETIQUETAS_PUNTAJES.get(variable, variable)
+
     # Crear el objeto gráfico de mapa
+    inicio = time.perf_counter()
     fig = go.Figure()
 
     # Añadir la capa de choropleth
     fig.add_trace(
         go.Choropleth(
             geojson=geo_json,
-        locations=df_antioquia_promedios['COLE_MCPIO_UBICACION'],
-        z=df_antioquia_promedios['PUNT_GLOBAL'][df_antioquia_promedios['AÑO'] == selected_year],
-        zmin=180,
-        zmax=300,
+        locations=df_antioquia['MPIO_CNMBR'],
+        z=z,
+        zmin=rango_puntajes[variable][0],
+        zmax=rango_puntajes[variable][1],
         featureidkey="properties.MPIO_CNMBR",
         colorscale="Blues",
             geo="geo",
@@ -207,13 +416,13 @@ def update_choropleth(selected_municipio, selected_year):
             hovertemplate="<br>".join([
                 "<b>%{location}</b>",
                 "Subregión: %{customdata}",
-                "Puntaje global: %{z}",
+                etiqueta + ": %{z}",
             ]),
             customdata=df_antioquia['SUBREGION'],
             marker=dict(
                 line=dict(
-                    color=['orange' if municipio == selected_municipio else '#444' for municipio in df_antioquia['MPIO_CNMBR']],
-                    width=[4 if municipio == selected_municipio else 1 for municipio in df_antioquia['MPIO_CNMBR']]
+                    color=colores_borde,
+                    width=anchos_borde
                 )
             ),
             name='' # Para que no aparezca el nombre de la serie en la leyenda
@@ -226,6 +435,7 @@ def update_choropleth(selected_municipio, selected_year):
         margin={"r": 0, "t": 0, "l": 0, "b": 0},
         height=400,  # Ajusta el valor de altura según tus preferencias
     )
+    construccion_figuras.observar(time.perf_counter() - inicio, 'choropleth')
 
     return fig
 
@@ -235,111 +445,52 @@ def update_choropleth(selected_municipio, selected_year):
 # ---------------------------------------------------------------------------------------------------------------
 @dash.callback(
     [Output('flag-img', 'src'),
-    Output('line-chart-ANT', 'figure'),
     Output('subregion-button', 'children')],
     [Input('dropdown-municipios', 'value')]
 )
 def update_flag_img(selected_municipio):
 
-    # Selecciona la bandera del municipio seleccionado
-    bandera = df_antioquia[df_antioquia['MPIO_CNMBR'] == selected_municipio]['BANDERA'].values[0]
+    # Selecciona la bandera y la subregión del municipio seleccionado
+    bandera = registro_municipios[selected_municipio]['bandera']
+    subregion = registro_municipios[selected_municipio]['subregion']
 
-    # ------------------- Crear el diagrama de linea con puntajes por año -------------------
-    # Voy a tener una variable para seleccionar un municipio.
-    municipio = selected_municipio
+    return bandera, subregion
 
-    # Voy a tener una variable para seleccionar una variable. Ej. Puntaje matemáticas
-    variable = 'PUNT_GLOBAL'
 
-    # Crear el objeto gráfico de línea
-    fig = go.Figure()
+# Crear el diagrama de linea con puntajes por año del municipio y del puntaje seleccionados
+@dash.callback(
+    Output('line-chart-base', 'data'),
+    [Input('dropdown-municipios', 'value'),
+     Input('dropdown-puntaje', 'value')]
+)
+def update_line_chart(selected_municipio, variable='PUNT_GLOBAL'):
 
-    # Obtener datos del municipio seleccionado
-    data_municipio = df_antioquia_promedios[df_antioquia_promedios['COLE_MCPIO_UBICACION'] == municipio]
-
-    # Construir el gráfico de línea con marcadores
-    fig.add_scatter(x=data_municipio['AÑO'], y=data_municipio[variable], mode='lines+markers', name=municipio, line=dict(color='blue', width=2), marker=dict(color='blue', size=8, symbol='circle'))
-
-    # Comparar con el promedio de Colombia
-    fig.add_scatter(x=df_colombia['AÑO'], y=df_colombia[variable], mode='lines+markers', name='COLOMBIA', line=dict(color='grey', width=2), marker=dict(color='grey', size=8, symbol='square'))
-
-    # Añadir nombres de las series como anotaciones a la izquierda del comienzo de cada línea
-    annotations = []
-
-    for i in range(len(fig.data)):
-        series_name = fig.data[i].name
-        start_value = fig.data[i].y[0]
-
-        # Agregar anotaciones de nombres de series
-        annotations.append(
-            dict(
-                x=data_municipio['AÑO'].min(),
-                y=start_value,
-                text=series_name,
-                showarrow=False,
-                xanchor='right',
-                font=dict(family='Arial', size=12, color=fig.data[i].line.color),
-                xshift=-10
-            )
-        )
+    # Obtener la figura del caché (se construye solo la primera vez que se consulta el municipio con ese puntaje)
+    return cache_line_chart.obtener((selected_municipio, variable), lambda: construir_line_chart((selected_municipio, variable)))
 
-        # Agregar anotaciones de puntajes directamente
-        for j, y_value in enumerate(fig.data[i].y):
-            annotations.append(
-                dict(
-                    x=fig.data[i].x[j],
-                    y=y_value + 3,
-                    text=f'{y_value:.0f}',
-                    showarrow=False,
-                    arrowhead=0,
-                    ax=0,
-                    ay=-60,
-                    font=dict(family='Arial', size=10, color='black')
-                )
-            )
-
-    # Agregar anotaciones de fuente
-    annotations.extend([
-        dict(
-            xref='paper', yref='paper', x=0.5, y=-0.27,
-            xanchor='center', yanchor='top',
-            text='Fuente: ICFES (2023). DataIcfes. Saber 11. <a href="https://www.icfes.gov.co/web/guest/data-icfes" target="_blank">[Enlace]</a>',
-            font=dict(family='Arial', size=12, color='rgb(150,150,150)'),
-            showarrow=False
-        )
-    ])
 
-    # Configurar diseño y diseño de anotaciones
-    fig.update_layout(
-        # title='Promedio de ' + variable + ' en ' + municipio,
-        xaxis_title='Año',
-        xaxis=dict(
-            showline=True,
-            showgrid=False,
-            showticklabels=True,
-            linecolor='rgb(204, 204, 204)',
-            linewidth=2,
-            ticks='outside',
-        ),
-        yaxis=dict(
-            showgrid=False,
-            zeroline=False,
-            showline=False,
-            showticklabels=False,
-        ),
-        autosize=True,
-        plot_bgcolor='white',
-        showlegend=False,
-        annotations=annotations  # Añadir las anotaciones al diseño
-    )
-    fig.update_layout(hovermode="x unified",
-                      margin=dict(t=10, l=30, r=30),
-                      height=300,)
-    
-    # Selecciona la subregión del municipio seleccionado
-    subregion = df_antioquia[df_antioquia['MPIO_CNMBR'] == selected_municipio]['SUBREGION'].values[0]
-
-    return bandera, fig, subregion
+# ---------------------------------------------------------------------------------------------------------------
+#                                 CALLBACKS PARA LA COMPARACIÓN DE MUNICIPIOS
+# ---------------------------------------------------------------------------------------------------------------
+# Enviar el conjunto de datos de comparación solo si la sesión aún no lo tiene
+@dash.callback(
+    Output('datos-comparacion', 'data'),
+    [Input('datos-comparacion', 'modified_timestamp')],
+    [State('datos-comparacion', 'data')]
+)
+def cargar_datos_comparacion(modified_timestamp, datos):
+    if datos is not None:
+        raise PreventUpdate
+    return datos_comparacion
+
+# Superponer las series seleccionadas sobre la figura base en el navegador (ver assets/comparacion.js)
+dash.clientside_callback(
+    ClientsideFunction(namespace='comparacion', function_name='superponer'),
+    Output('line-chart-ANT', 'figure'),
+    [Input('line-chart-base', 'data'),
+     Input('dropdown-comparar', 'value'),
+     Input('datos-comparacion', 'data')]
+)
 
 
 # ---------------------------------------------------------------------------------------------------------------
@@ -356,16 +507,35 @@ def toggle_offcanvas(n_clicks, is_open):
 
 # Actualizar el contenido del offcanvas cuando se selecciona un municipio
 @dash.callback(
-    Output("offcanvas-subregion", "children"),
+    Output("contenido-subregion", "children"),
     [Input("dropdown-municipios", "value")]
 )
+@memoizar()
 def update_offcanvas(selected_municipio):
 
     # Selecciona la subregión del municipio seleccionado
-    subregion = df_antioquia[df_antioquia['MPIO_CNMBR'] == selected_municipio]['SUBREGION'].values[0]
+    subregion = registro_municipios[selected_municipio]['subregion']
 
     return create_offcanvas_content(subregion)
 
+# Actualizar los promedios de la subregión cuando cambia el municipio o el año (consulta de los agregados precalculados)
+@dash.callback(
+    Output("promedios-subregion", "children"),
+    [Input("dropdown-municipios", "value"),
+     Input("year-slider", "value")]
+)
+@memoizar()
+def update_promedios_subregion(selected_municipio, selected_year):
+    subregion = registro_municipios[selected_municipio]['subregion']
+    anio = selected_year if selected_year in indice_anio else ultimo_anio
+
+    promedios_subregion = agregados_subregiones['cubo'][indice_anio[anio], agregados_subregiones['indice'][subregion]]
+    promedios_departamento = agregados_subregiones['departamento'][indice_anio[anio]]
+    filas = [(ETIQUETAS_PUNTAJES.get(variable, variable), promedios_subregion[k], promedios_departamento[k])
+             for variable, k in indice_variable.items()]
+
+    return create_tabla_promedios(subregion, anio, filas)
+
 
 
 
@@ -0,0 +1,41 @@
+"""
+Construye el almacén columnar tipado (ver utils/almacen.py) a partir de los CSV de puntajes.
+
+Uso (desde la raíz del repositorio):
+    python -m scripts.construir_almacen
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from utils.almacen import guardar_tabla
+
+# Tablas del almacén: nombre -> CSV de origen
+TABLAS = {
+    'antioquia_promedios': 'df_antioquia_promedios.csv',
+    'antioquia_linechart': 'df_antioquia_linechart.csv',
+    'colombia_linechart': 'df_colombia_linechart.csv',
+}
+
+
+# Función para convertir los CSV de puntajes a tablas del almacén columnar
+def construir_almacen(origen, destino, tablas=TABLAS):
+    for tabla, archivo in tablas.items():
+        # Se lee todo como texto para que los códigos DANE conserven sus ceros y el almacén decida el tipo de cada columna
+        df = pd.read_csv(os.path.join(origen, archivo), dtype=str)
+        guardar_tabla(df, os.path.join(destino, tabla))
+        print(f"{tabla}: {len(df)} filas, {len(df.columns)} columnas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte los CSV de puntajes al almacén columnar tipado.")
+    parser.add_argument('--origen', default='datos', help="Directorio con los CSV.")
+    parser.add_argument('--destino', default='datos/almacen', help="Directorio del almacén.")
+    args = parser.parse_args()
+
+    construir_almacen(args.origen, args.destino)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Construye la versión TopoJSON cuantizada de la geometría de los municipios a partir de uno o varios GeoJSON.
+
+Uso (desde la raíz del repositorio):
+    python -m scripts.construir_topologia
+    python -m scripts.construir_topologia --objeto antioquia=datos/MunicipiosVeredas19MB.json --objeto choco=choco.json
+"""
+import argparse
+import json
+
+from utils.topologia import codificar_topologia
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Codifica la geometría de los municipios como TopoJSON cuantizado.")
+    parser.add_argument('--objeto', action='append', metavar='NOMBRE=RUTA',
+                        help="Objeto a incluir en la topología (uno por departamento). Se puede repetir.")
+    parser.add_argument('--salida', default='datos/MunicipiosAntioquia.topojson', help="Ruta del archivo de salida.")
+    parser.add_argument('--cuantizacion', type=int, default=100000, help="Tamaño de la grilla de cuantización por eje.")
+    args = parser.parse_args()
+
+    objetos = {}
+    for objeto in args.objeto or ['antioquia=datos/MunicipiosVeredas19MB.json']:
+        nombre, ruta = objeto.split('=', 1)
+        with open(ruta, encoding='utf-8') as archivo:
+            objetos[nombre] = json.load(archivo)
+
+    topologia = codificar_topologia(objetos, cuantizacion=args.cuantizacion)
+
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(topologia, archivo, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"{args.salida}: {len(topologia['arcs'])} arcos, objetos: {', '.join(objetos)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Genera las tablas del line chart (df_antioquia_linechart.csv y df_colombia_linechart.csv) a partir de los archivos de
+resultados Saber 11 publicados por el ICFES. Los archivos se leen por bloques y se procesan en paralelo.
+
+Las sumas y conteos por periodo se guardan en el almacén columnar, de modo que un periodo nuevo puede ingerirse solo
+y anexarse a los anteriores con --anexar (sin volver a procesar los microdatos históricos).
+
+Uso (desde la raíz del repositorio):
+    python -m scripts.ingestar_saber11 Saber_11__2019-2.csv Saber_11__2020-2.csv --procesos 4
+    python -m scripts.ingestar_saber11 Saber_11__2023-2.csv --anexar
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from scripts.construir_almacen import TABLAS, construir_almacen
+from utils.ingesta import agregar_archivos, anexar_parciales, cargar_parciales, guardar_parciales, materializar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrega los microdatos Saber 11 en promedios por año y municipio.")
+    parser.add_argument('archivos', nargs='+', help="Archivos CSV de resultados Saber 11.")
+    parser.add_argument('--salida', default='datos', help="Directorio donde se escriben los CSV del line chart.")
+    parser.add_argument('--almacen', default='datos/almacen', help="Directorio del almacén columnar.")
+    parser.add_argument('--catalogo', default='datos/df_antioquia_promedios.csv',
+                        help="CSV con los códigos DANE (DPTOMPIO) y nombres (MPIO_CNMBR) de los municipios.")
+    parser.add_argument('--anexar', action='store_true',
+                        help="Anexar los periodos ingeridos a los ya guardados en lugar de reemplazarlos.")
+    parser.add_argument('--procesos', type=int, default=None, help="Número de procesos (por defecto uno por núcleo).")
+    parser.add_argument('--bloque', type=int, default=500_000, help="Filas por bloque de lectura.")
+    parser.add_argument('--encoding', default='utf-8', help="Codificación de los archivos de resultados.")
+    args = parser.parse_args()
+
+    catalogo = pd.read_csv(args.catalogo, dtype=str)
+    catalogo_municipios = dict(zip(catalogo['DPTOMPIO'].astype(int), catalogo['MPIO_CNMBR']))
+
+    ruta_antioquia = os.path.join(args.salida, 'df_antioquia_linechart.csv')
+    ruta_colombia = os.path.join(args.salida, 'df_colombia_linechart.csv')
+    ruta_parciales_municipios = os.path.join(args.almacen, 'parciales_municipios')
+    ruta_parciales_pais = os.path.join(args.almacen, 'parciales_pais')
+
+    inicio = time.perf_counter()
+    municipios, pais, filas = agregar_archivos(args.archivos, procesos=args.procesos,
+                                               tamano_bloque=args.bloque, encoding=args.encoding)
+
+    # Anexar a los resúmenes guardados y conservar los años previos que no tienen resumen
+    df_antioquia_previo = df_colombia_previo = None
+    if args.anexar:
+        municipios = anexar_parciales(cargar_parciales(ruta_parciales_municipios, ['PERIODO', 'COLE_COD_MCPIO_UBICACION']), municipios)
+        pais = anexar_parciales(cargar_parciales(ruta_parciales_pais, ['PERIODO']), pais)
+        if os.path.exists(ruta_antioquia) and os.path.exists(ruta_colombia):
+            df_antioquia_previo = pd.read_csv(ruta_antioquia)
+            df_colombia_previo = pd.read_csv(ruta_colombia)
+
+    guardar_parciales(municipios, ruta_parciales_municipios)
+    guardar_parciales(pais, ruta_parciales_pais)
+
+    df_antioquia, df_colombia = materializar(municipios, pais, catalogo_municipios, df_antioquia_previo, df_colombia_previo)
+    duracion = time.perf_counter() - inicio
+
+    sin_nombre = df_antioquia['COLE_MCPIO_UBICACION'].isna()
+    if sin_nombre.any():
+        print(f"Advertencia: códigos sin municipio en el catálogo: {sorted(df_antioquia.loc[sin_nombre, 'COLE_COD_MCPIO_UBICACION'].unique())}")
+
+    df_antioquia.to_csv(ruta_antioquia, index=False)
+    df_colombia.to_csv(ruta_colombia, index=False)
+    print(f"{filas:,} filas en {duracion:.1f} s ({filas / duracion:,.0f} filas/s). "
+          f"Periodos guardados: {sorted(pais.index.get_level_values('PERIODO').unique().tolist())}. "
+          f"Años en el tablero: {sorted(df_colombia['AÑO'].unique().tolist())}")
+
+    # Actualizar las tablas del almacén columnar que lee el tablero
+    construir_almacen(args.salida, args.almacen, {tabla: archivo for tabla, archivo in TABLAS.items() if tabla.endswith('_linechart')})
+
+
+if __name__ == '__main__':
+    main()
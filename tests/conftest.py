@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Las pruebas usan rutas relativas a la raíz del repositorio (datos/, assets/), igual que la aplicación y los scripts
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(autouse=True)
+def en_raiz(monkeypatch):
+    monkeypatch.chdir(RAIZ)
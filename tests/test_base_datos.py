@@ -0,0 +1,124 @@
+"""
+Pruebas de la lectura de los puntajes desde una base de datos SQL (utils/base_datos.py) con SQLite en memoria: las
+tablas se cargan con scripts/cargar_base_datos.py desde los CSV de datos/ y las consultas se comparan con la lectura
+de los mismos CSV que hace el tablero cuando no hay base de datos.
+"""
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import cargar_base_datos
+from utils.base_datos import COLUMNAS_PUNTAJES, FuentePuntajes
+from utils.datos import construir_cubo_puntajes
+
+
+@pytest.fixture
+def dsn(monkeypatch, request):
+    # Base en memoria compartida por todas las conexiones del proceso; existe mientras haya una conexión abierta
+    uri = f'file:puntajes_{request.node.name}?mode=memory&cache=shared'
+    ancla = sqlite3.connect(uri, uri=True)
+    monkeypatch.setattr(sys, 'argv', ['cargar_base_datos', f'sqlite:///{uri}'])
+    cargar_base_datos.main()
+    yield f'sqlite:///{uri}'
+    ancla.close()
+
+
+@pytest.fixture
+def fuente(dsn):
+    fuente = FuentePuntajes(dsn, max_conexiones=2, max_resultados=8)
+    yield fuente
+    fuente.cerrar()
+
+
+@pytest.fixture(scope='module')
+def csv():
+    return {
+        'antioquia_promedios': pd.read_csv('datos/df_antioquia_promedios.csv', dtype=str),
+        'antioquia_linechart': pd.read_csv('datos/df_antioquia_linechart.csv', dtype={'COLE_COD_MCPIO_UBICACION': str}),
+        'colombia_linechart': pd.read_csv('datos/df_colombia_linechart.csv'),
+    }
+
+
+def test_tablas_iguales_a_los_csv(fuente, csv):
+    for nombre, esperado in csv.items():
+        tabla = fuente.tabla(nombre)
+        assert list(tabla.columns) == list(esperado.columns)
+        pd.testing.assert_frame_equal(tabla.astype(str), esperado.astype(str), check_dtype=False)
+
+
+def test_consultas_preparadas_iguales_al_cubo(fuente, csv):
+    variables = COLUMNAS_PUNTAJES
+    df_antioquia, df_linechart = csv['antioquia_promedios'], csv['antioquia_linechart']
+    cubo = construir_cubo_puntajes(df_antioquia, df_linechart, variables)
+    indice_anio = {anio: i for i, anio in enumerate(cubo['anios'])}
+
+    for posicion, municipio in enumerate(df_antioquia['MPIO_CNMBR']):
+        serie = fuente.serie_municipio(municipio)
+        assert serie['AÑO'].is_monotonic_increasing
+        np.testing.assert_array_equal(serie.set_index('AÑO')[variables].reindex(cubo['anios']).to_numpy(dtype=float),
+                                      cubo['cubo'][:, posicion, :].astype(float), err_msg=municipio)
+
+    for anio in cubo['anios']:
+        puntajes = fuente.puntajes_anio(anio).set_index('COLE_MCPIO_UBICACION')[variables]
+        np.testing.assert_array_equal(puntajes.reindex(df_antioquia['MPIO_CNMBR']).to_numpy(dtype=float),
+                                      cubo['cubo'][indice_anio[anio]].astype(float), err_msg=str(anio))
+
+    pd.testing.assert_frame_equal(fuente.serie_colombia(), csv['colombia_linechart'], check_dtype=False)
+
+
+def test_cache_de_resultados(fuente, csv):
+    municipios = csv['antioquia_promedios']['MPIO_CNMBR'].tolist()
+
+    primera = fuente.serie_municipio('MEDELLÍN')
+    assert fuente.serie_municipio('MEDELLÍN') is primera
+    assert (fuente.aciertos, fuente.fallos) == (1, 1)
+
+    # Acotado a max_resultados: el menos usado sale y la siguiente consulta vuelve a la base con el mismo resultado
+    for municipio in municipios[1:fuente.max_resultados + 1]:
+        fuente.serie_municipio(municipio)
+    segunda = fuente.serie_municipio('MEDELLÍN')
+    assert segunda is not primera
+    pd.testing.assert_frame_equal(segunda, primera)
+
+    fuente.vaciar()
+    assert fuente.serie_municipio('MEDELLÍN') is not segunda
+
+
+def test_pool_devuelve_conexiones_tras_excepcion(fuente):
+    pool = fuente._pool
+
+    with pool.conexion() as conexion:
+        pass
+
+    # Una excepción dentro del bloque de la conexión y una consulta que falla en la base de datos: la conexión vuelve
+    # al pool y se reutiliza en lugar de abrir otra
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            with pool.conexion() as usada:
+                raise RuntimeError("falla del callback")
+        assert usada is conexion
+        with pytest.raises(sqlite3.OperationalError):
+            with pool.conexion() as usada:
+                pool.ejecutar(usada, 'inexistente', "SELECT * FROM tabla_inexistente", ())
+        assert usada is conexion
+    assert pool._libres.qsize() == 1
+
+    # Los dos cupos del pool siguen libres (si se hubiera perdido uno, adquirirlos bloquearía)
+    cupos = [pool._cupos.acquire(timeout=1) for _ in range(2)]
+    assert all(cupos)
+    for _ in cupos:
+        pool._cupos.release()
+
+    # Y las consultas de varios hilos a la vez terminan con el pool de dos conexiones
+    resultados = []
+    hilos = [threading.Thread(target=lambda anio=anio: resultados.append(len(fuente.puntajes_anio(anio))))
+             for anio in range(2015, 2023)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(timeout=10)
+    assert len(resultados) == len(hilos) and all(resultados)
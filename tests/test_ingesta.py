@@ -0,0 +1,99 @@
+"""
+Pruebas de la ingesta de microdatos Saber 11 (scripts/ingestar_saber11.py y utils/ingesta.py) con archivos
+sintéticos: los promedios y conteos se comparan con un groupby directo de pandas sobre los mismos archivos.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_ingesta import generar_archivo_sintetico
+from scripts import ingestar_saber11
+from utils.ingesta import COLUMNAS_PUNTAJES, cargar_parciales
+
+# Dos periodos del mismo año (los promedios anuales se ponderan por el número de estudiantes de cada uno) y uno de otro
+PERIODOS = {20191: 2_300, 20194: 900, 20204: 1_700}
+
+# Bloques de lectura pequeños para que cada archivo se agregue en varios bloques
+BLOQUE = 400
+
+
+@pytest.fixture
+def archivos(tmp_path):
+    rutas = {}
+    for i, (periodo, filas) in enumerate(PERIODOS.items()):
+        rutas[periodo] = str(tmp_path / f'saber11_{periodo}.csv')
+        generar_archivo_sintetico(rutas[periodo], filas, periodo, semilla=i, separador=',' if i % 2 else ';',
+                                  tamano_bloque=500)
+    return rutas
+
+
+# Función para ejecutar el script de ingesta con salida en un directorio temporal
+def ingestar(monkeypatch, directorio, rutas, *opciones):
+    monkeypatch.setattr(sys, 'argv', ['ingestar_saber11', *rutas, '--salida', str(directorio),
+                                      '--almacen', str(directorio / 'almacen'), '--bloque', str(BLOQUE), *opciones])
+    ingestar_saber11.main()
+    return (pd.read_csv(directorio / 'df_antioquia_linechart.csv', dtype={'COLE_COD_MCPIO_UBICACION': str}),
+            pd.read_csv(directorio / 'df_colombia_linechart.csv'))
+
+
+# Función para leer los microdatos completos con pandas (la referencia de las pruebas)
+def leer_microdatos(rutas):
+    df = pd.concat([pd.read_csv(ruta, sep=None, engine='python') for ruta in rutas], ignore_index=True)
+    df['AÑO'] = df['PERIODO'] // 10
+    return df
+
+
+def referencia_antioquia(df):
+    antioquia = df[df['COLE_COD_MCPIO_UBICACION'] // 1000 == 5]
+    promedios = antioquia.groupby(['AÑO', 'COLE_COD_MCPIO_UBICACION'])[COLUMNAS_PUNTAJES].mean().round().reset_index()
+    promedios['COLE_COD_MCPIO_UBICACION'] = promedios['COLE_COD_MCPIO_UBICACION'].map('{:05d}'.format)
+    return promedios
+
+
+def comparar(resultado, esperado, claves):
+    resultado = resultado.set_index(claves).sort_index()
+    esperado = esperado.set_index(claves).sort_index()
+    assert resultado.index.equals(esperado.index)
+    for columna in COLUMNAS_PUNTAJES:
+        np.testing.assert_array_equal(resultado[columna].to_numpy(dtype=float), esperado[columna].to_numpy(dtype=float),
+                                      err_msg=columna)
+
+
+@pytest.mark.parametrize('procesos', [1, 2])
+def test_promedios_y_conteos_coinciden_con_groupby(monkeypatch, tmp_path, archivos, procesos):
+    df_antioquia, df_colombia = ingestar(monkeypatch, tmp_path, archivos.values(), '--procesos', str(procesos))
+    microdatos = leer_microdatos(archivos.values())
+
+    # Promedios por año y municipio (solo Antioquia) y nacionales por año
+    comparar(df_antioquia, referencia_antioquia(microdatos), ['AÑO', 'COLE_COD_MCPIO_UBICACION'])
+    comparar(df_colombia, microdatos.groupby('AÑO')[COLUMNAS_PUNTAJES].mean().round().reset_index(), ['AÑO'])
+    assert not df_antioquia['COLE_MCPIO_UBICACION'].isna().any()
+
+    # Conteos por periodo y municipio guardados en el almacén
+    parciales = cargar_parciales(str(tmp_path / 'almacen' / 'parciales_municipios'), ['PERIODO', 'COLE_COD_MCPIO_UBICACION'])
+    antioquia = microdatos[microdatos['COLE_COD_MCPIO_UBICACION'] // 1000 == 5]
+    conteos = antioquia.groupby(['PERIODO', 'COLE_COD_MCPIO_UBICACION']).size()
+    parciales.index = parciales.index.set_levels([nivel.astype(int) for nivel in parciales.index.levels])
+    np.testing.assert_array_equal(parciales['N_PUNT_GLOBAL'].sort_index().to_numpy(), conteos.sort_index().to_numpy())
+    assert parciales['N_PUNT_GLOBAL'].sum() == len(antioquia)
+
+
+def test_anexar_mismo_periodo_no_duplica(monkeypatch, tmp_path, archivos):
+    ruta_parciales = str(tmp_path / 'almacen' / 'parciales_pais')
+    df_antioquia, df_colombia = ingestar(monkeypatch, tmp_path, [archivos[20191], archivos[20194]], '--procesos', '1')
+    conteos = cargar_parciales(ruta_parciales, ['PERIODO'])['N_PUNT_GLOBAL']
+
+    # Volver a ingerir un periodo ya guardado lo reemplaza: tablas y conteos quedan iguales
+    df_antioquia_2, df_colombia_2 = ingestar(monkeypatch, tmp_path, [archivos[20194]], '--procesos', '1', '--anexar')
+    pd.testing.assert_frame_equal(df_antioquia_2, df_antioquia)
+    pd.testing.assert_frame_equal(df_colombia_2, df_colombia)
+    pd.testing.assert_series_equal(cargar_parciales(ruta_parciales, ['PERIODO'])['N_PUNT_GLOBAL'], conteos)
+
+    # Un periodo nuevo se anexa y los anteriores se conservan
+    df_antioquia_3, df_colombia_3 = ingestar(monkeypatch, tmp_path, [archivos[20204]], '--procesos', '1', '--anexar')
+    microdatos = leer_microdatos(archivos.values())
+    comparar(df_antioquia_3, referencia_antioquia(microdatos), ['AÑO', 'COLE_COD_MCPIO_UBICACION'])
+    comparar(df_colombia_3, microdatos.groupby('AÑO')[COLUMNAS_PUNTAJES].mean().round().reset_index(), ['AÑO'])
+    assert cargar_parciales(ruta_parciales, ['PERIODO'])['N_PUNT_GLOBAL'].sum() == sum(PERIODOS.values())
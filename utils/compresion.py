@@ -0,0 +1,96 @@
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Sin brotli se comprime solo con gzip
+    brotli = None
+
+# ======================================================================================================================
+#                               COMPRESIÓN DE LAS RESPUESTAS DE LOS CALLBACKS Y DEL LAYOUT
+# ======================================================================================================================
+# Las respuestas de _dash-update-component (p. ej. el choropleth con su geometría) y de _dash-layout son documentos
+# JSON grandes y muy repetitivos. Se comprimen con brotli o gzip según el encabezado Accept-Encoding del navegador.
+#
+# Los niveles por defecto salen de benchmarks/bench_compresion.py. Para la figura del mapa (~1 MB de JSON), brotli 4
+# la reduce a ~270 KB en ~25 ms de CPU (brotli 11 llega a ~175 KB pero tarda más de 2 s) y gzip 1 a ~390 KB en ~12 ms
+# (gzip 6 ahorra apenas un 11 % más con cinco veces más CPU). Las respuestas más pequeñas que el umbral se envían sin
+# comprimir, porque ahí la compresión no compensa su costo.
+#
+# Variables de entorno:
+#   COMPRESION_MINIMO         Tamaño mínimo (bytes) para comprimir una respuesta. Defaults to 1024.
+#   COMPRESION_NIVEL_GZIP     Nivel de gzip (1-9). Defaults to 1.
+#   COMPRESION_NIVEL_BROTLI   Nivel de brotli (0-11). Defaults to 4.
+
+RUTAS_COMPRIMIDAS = ('/_dash-update-component', '/_dash-layout')
+
+
+# Función para elegir la codificación según Accept-Encoding (respetando q=0, que significa "no aceptada")
+def elegir_codificacion(accept_encoding):
+    aceptadas = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        calidad = 1.0
+        if parametros.strip().startswith('q='):
+            try:
+                calidad = float(parametros.strip()[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre.strip().lower()] = calidad
+
+    comodin = aceptadas.get('*', 0.0)
+    if brotli is not None and aceptadas.get('br', comodin) > 0:
+        return 'br'
+    if aceptadas.get('gzip', comodin) > 0:
+        return 'gzip'
+    return None
+
+
+# Función para comprimir un contenido con la codificación elegida
+def comprimir(contenido, codificacion, nivel_gzip=1, nivel_brotli=4):
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=nivel_brotli, mode=brotli.MODE_TEXT)
+    return gzip.compress(contenido, compresslevel=nivel_gzip, mtime=0)
+
+
+# Función para registrar la compresión en el servidor Flask de Dash
+def registrar_compresion(server, rutas=RUTAS_COMPRIMIDAS, minimo=None, nivel_gzip=None, nivel_brotli=None):
+    """
+    Registra un after_request que comprime las respuestas de las rutas indicadas.
+
+    Args:
+        server (flask.Flask): Servidor de la aplicación (app.server).
+        rutas (tuple, optional): Sufijos de las rutas a comprimir. Defaults to ('/_dash-update-component', '/_dash-layout').
+        minimo (int, optional): Tamaño mínimo en bytes para comprimir. Defaults to None (COMPRESION_MINIMO o 1024).
+        nivel_gzip (int, optional): Nivel de gzip. Defaults to None (COMPRESION_NIVEL_GZIP o 1).
+        nivel_brotli (int, optional): Nivel de brotli. Defaults to None (COMPRESION_NIVEL_BROTLI o 4).
+    """
+    minimo = minimo if minimo is not None else int(os.environ.get('COMPRESION_MINIMO', '1024'))
+    nivel_gzip = nivel_gzip if nivel_gzip is not None else int(os.environ.get('COMPRESION_NIVEL_GZIP', '1'))
+    nivel_brotli = nivel_brotli if nivel_brotli is not None else int(os.environ.get('COMPRESION_NIVEL_BROTLI', '4'))
+
+    @server.after_request
+    def comprimir_respuesta(response):
+        if not request.path.endswith(rutas):
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.content_length is not None and response.content_length < minimo):
+            return response
+
+        codificacion = elegir_codificacion(request.headers.get('Accept-Encoding', ''))
+        if codificacion is None:
+            return response
+
+        contenido = response.get_data()
+        if len(contenido) < minimo:
+            return response
+
+        response.set_data(comprimir(contenido, codificacion, nivel_gzip, nivel_brotli))
+        response.headers['Content-Encoding'] = codificacion
+        return response
+
+    return comprimir_respuesta
@@ -0,0 +1,48 @@
+from pgmpy.inference import VariableElimination
+
+# ======================================================================================================================
+#                                   INFERENCIA REENTRANTE PARA EL SERVIDOR CON HILOS
+# ======================================================================================================================
+# Con los workers gthread de gunicorn (ver gunicorn.conf.py) varios hilos consultan a la vez el mismo objeto de
+# inferencia de cada modelo. Revisión de VariableElimination.query en pgmpy 0.1.24:
+#   - Con elimination_order='greedy' (el que usa el tablero) solo lee el modelo: poda una copia de la red
+#     (subgraph + get_ancestral_graph), reduce los valores de los CPD con índices (sin inplace) y contrae con einsum.
+#   - Con otro orden de eliminación crea su propio VariableElimination sobre la red podada; tampoco escribe en el modelo.
+#   - Con virtual_evidence reemplaza self.model por una copia con nodos nuevos. Ese camino no es seguro con un objeto
+#     compartido (y además deja la evidencia virtual en el objeto para las consultas siguientes).
+# Por eso las consultas sin evidencia virtual usan un único objeto compartido y las que la traen usan uno propio.
+#
+# Si se actualiza pgmpy hay que repetir la revisión: python -m benchmarks.bench_servidor --verificar compara las
+# consultas hechas desde muchos hilos a la vez con las mismas consultas en serie.
+
+
+class InferenciaConcurrente:
+    """
+    Objeto de inferencia por eliminación de variables que se puede consultar desde varios hilos a la vez.
+
+    Args:
+        modelo (BayesianNetwork): Modelo entrenado. No se debe modificar después de crear el objeto.
+    """
+
+    def __init__(self, modelo):
+        self.model = modelo
+        self._compartido = VariableElimination(modelo)
+
+    def query(self, variables, evidence=None, virtual_evidence=None, **kwargs):
+        """
+        Consulta la distribución de las variables dada la evidencia (ver VariableElimination.query).
+
+        Args:
+            variables (list): Variables de las que se quiere la distribución.
+            evidence (dict, optional): Evidencia {variable: estado}. Defaults to None.
+            virtual_evidence (list, optional): CPD de evidencia virtual. Defaults to None.
+
+        Returns:
+            DiscreteFactor: Distribución conjunta de las variables.
+        """
+        if virtual_evidence is None:
+            return self._compartido.query(variables, evidence=evidence, **kwargs)
+
+        # La evidencia virtual modifica el objeto de inferencia: se usa uno propio para esta consulta
+        return VariableElimination(self.model).query(variables, evidence=evidence, virtual_evidence=virtual_evidence,
+                                                     **kwargs)
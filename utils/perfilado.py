@@ -0,0 +1,167 @@
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, g, request
+
+# ======================================================================================================================
+#                                   PERFILADO BAJO DEMANDA DE LOS CALLBACKS DE DASH
+# ======================================================================================================================
+# Cuando una interacción es lenta en producción, un operador puede perfilar una sola petición agregando el encabezado
+# X-Perfilar (o el parámetro ?perfilar=) con el token de PERFILADO_TOKEN. Mientras se atiende esa petición, un hilo
+# muestreador toma la pila del hilo que ejecuta el callback cada PERFILADO_INTERVALO segundos, y al terminar se escribe
+# un archivo de pilas colapsadas ("funcion_a;funcion_b;funcion_c 12" por línea) en PERFILADO_DIR. Ese formato lo leen
+# directamente flamegraph.pl, speedscope (https://www.speedscope.app) e inferno para dibujar el flame graph.
+#
+# Un muestreador (y no cProfile) mantiene el costo proporcional al número de muestras y no a las llamadas, así que el
+# perfil no deforma los tiempos de plotly o de pgmpy, que hacen miles de llamadas pequeñas. Mientras hay un perfil en
+# curso se reduce el intervalo de cambio de hilo del intérprete (sys.setswitchinterval) para que el muestreador obtenga
+# el GIL a tiempo; al terminar se restaura.
+#
+# Si PERFILADO_TOKEN no está definido no se registra nada: las peticiones normales no pagan ningún costo. Con el token
+# definido, una petición sin el encabezado solo paga la lectura de un encabezado, y una con un token incorrecto recibe
+# un 403.
+#
+# Variables de entorno:
+#   PERFILADO_TOKEN       Token que habilita el perfilado. Sin definir, el perfilado queda deshabilitado.
+#   PERFILADO_DIR         Directorio de los perfiles. Defaults to '.cache/perfiles'.
+#   PERFILADO_INTERVALO   Segundos entre muestras. Defaults to 0.001.
+
+ENCABEZADO = 'X-Perfilar'
+PARAMETRO = 'perfilar'
+
+
+class Muestreador:
+    """
+    Muestreador de la pila de un hilo que acumula pilas colapsadas.
+
+    Args:
+        ident (int): Identificador del hilo a muestrear (threading.get_ident()).
+        intervalo (float, optional): Segundos entre muestras. Defaults to 0.001.
+    """
+
+    # Perfiles en curso en el proceso: el intervalo de cambio de hilo se restaura cuando termina el último
+    _activos = 0
+    _intervalo_original = None
+    _lock = threading.Lock()
+
+    def __init__(self, ident, intervalo=0.001):
+        self.ident = ident
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilado', daemon=True)
+
+    def iniciar(self):
+        with Muestreador._lock:
+            if Muestreador._activos == 0:
+                Muestreador._intervalo_original = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.intervalo, Muestreador._intervalo_original))
+            Muestreador._activos += 1
+        self.inicio = time.perf_counter()
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        self.duracion = time.perf_counter() - self.inicio
+        with Muestreador._lock:
+            Muestreador._activos -= 1
+            if Muestreador._activos == 0:
+                sys.setswitchinterval(Muestreador._intervalo_original)
+        return self
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.ident)
+            if marco is None:
+                continue
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+                marco = marco.f_back
+            self.pilas[';'.join(reversed(pila))] += 1
+            self.muestras += 1
+
+    def colapsado(self):
+        """
+        Retorna las pilas en formato colapsado (una línea por pila con su número de muestras).
+
+        Returns:
+            str: Texto para flamegraph.pl, speedscope o inferno.
+        """
+        return ''.join(f'{pila} {conteo}\n' for pila, conteo in self.pilas.most_common())
+
+
+# Función para escribir un perfil en el directorio de perfiles
+def guardar_perfil(muestreador, nombre, directorio):
+    os.makedirs(directorio, exist_ok=True)
+    nombre = re.sub(r'[^A-Za-z0-9_.-]+', '_', nombre).strip('_.')[:80] or 'callback'
+    ruta = os.path.join(directorio, f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{nombre}.folded")
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(muestreador.colapsado())
+    return ruta
+
+
+# Función para registrar el perfilado bajo demanda en el servidor Flask de Dash
+def registrar_perfilado(server, token=None, directorio=None, intervalo=None):
+    """
+    Registra los hooks que perfilan las peticiones a _dash-update-component que traen el token de perfilado. Si no hay
+    token (ni argumento ni PERFILADO_TOKEN) no registra nada.
+
+    Args:
+        server (flask.Flask): Servidor de la aplicación (app.server).
+        token (str, optional): Token de los operadores. Defaults to None (PERFILADO_TOKEN).
+        directorio (str, optional): Directorio de los perfiles. Defaults to None (PERFILADO_DIR o '.cache/perfiles').
+        intervalo (float, optional): Segundos entre muestras. Defaults to None (PERFILADO_INTERVALO o 0.001).
+
+    Returns:
+        bool: True si el perfilado quedó habilitado.
+    """
+    token = token or os.environ.get('PERFILADO_TOKEN')
+    if not token:
+        return False
+    directorio = directorio or os.environ.get('PERFILADO_DIR', '.cache/perfiles')
+    intervalo = intervalo or float(os.environ.get('PERFILADO_INTERVALO', '0.001'))
+    token_bytes = token.encode('utf-8')
+
+    @server.before_request
+    def iniciar_perfil():
+        solicitado = request.headers.get(ENCABEZADO) or request.args.get(PARAMETRO)
+        if not solicitado or not request.path.endswith('/_dash-update-component'):
+            return None
+        # Se comparan bytes: con str, compare_digest lanza TypeError (un 500) si el encabezado trae caracteres no ASCII
+        if not hmac.compare_digest(solicitado.encode('utf-8'), token_bytes):
+            return Response("Token de perfilado inválido.", status=403, mimetype='text/plain')
+        g.muestreador = Muestreador(threading.get_ident(), intervalo).iniciar()
+        return None
+
+    @server.after_request
+    def terminar_perfil(response):
+        muestreador = g.pop('muestreador', None)
+        if muestreador is not None:
+            muestreador.detener()
+            cuerpo = request.get_json(silent=True) or {}
+            try:
+                ruta = guardar_perfil(muestreador, str(cuerpo.get('output', 'callback')), directorio)
+                response.headers['X-Perfil'] = os.path.basename(ruta)
+                print(f"Perfil guardado en {ruta} ({muestreador.muestras} muestras en {muestreador.duracion * 1000:.0f} ms)")
+            except OSError as error:
+                print(f"No se pudo guardar el perfil: {error}")
+        return response
+
+    # Si la petición terminó con una excepción no se ejecuta after_request: se detiene el muestreador sin guardar nada
+    @server.teardown_request
+    def descartar_perfil(error=None):
+        muestreador = g.pop('muestreador', None)
+        if muestreador is not None:
+            muestreador.detener()
+
+    return True